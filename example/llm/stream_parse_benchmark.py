@@ -0,0 +1,69 @@
+"""
+Microbenchmark of the per-token overhead of parsing LiteLLM stream chunks.
+
+It compares the old parser, which serialized every chunk by
+`json.loads(json.dumps(chunk.json()))`, with the current lazy parser, which only
+materializes the raw data when it is accessed.
+
+Usage:
+    python example/llm/stream_parse_benchmark.py
+"""
+
+import json
+import timeit
+
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
+
+from promptulate.llms._litellm import parse_content
+from promptulate.schema import StreamIterator
+
+N_TOKENS = 10_000
+
+
+def legacy_parse_content(chunk):
+    content = chunk.choices[0].delta.content
+    ret_data = json.loads(json.dumps(chunk.json()))
+    return content, ret_data
+
+
+def build_chunks(n: int):
+    return [
+        ModelResponseStream(
+            id="chatcmpl-benchmark",
+            model="gpt-4o",
+            choices=[StreamingChoices(delta=Delta(content=f"token{i} "))],
+        )
+        for i in range(n)
+    ]
+
+
+def consume(chunks, parser, return_raw_response: bool) -> None:
+    iterator = StreamIterator(
+        iter(chunks), parse_content=parser, return_raw_response=return_raw_response
+    )
+    for _ in iterator:
+        pass
+
+
+def main():
+    chunks = build_chunks(N_TOKENS)
+    cases = [
+        ("legacy parser", legacy_parse_content, False),
+        ("lazy parser", parse_content, False),
+        ("legacy parser, raw response", legacy_parse_content, True),
+        ("lazy parser, raw response", parse_content, True),
+    ]
+
+    for name, parser, return_raw_response in cases:
+        seconds = min(
+            timeit.repeat(
+                lambda: consume(chunks, parser, return_raw_response),
+                number=1,
+                repeat=5,
+            )
+        )
+        print(f"{name:<30} {seconds / N_TOKENS * 1e6:8.2f} us/token")
+
+
+if __name__ == "__main__":
+    main()
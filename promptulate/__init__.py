@@ -24,7 +24,7 @@ from promptulate.agents.base import BaseAgent
 from promptulate.agents.planner.planner import Planner
 from promptulate.agents.tool_agent.agent import ToolAgent
 from promptulate.agents.web_agent.agent import WebAgent
-from promptulate.chat import AIChat, chat
+from promptulate.chat import AIChat, ChatSessions, achat, chat, chat_many
 from promptulate.llms.base import BaseLLM
 from promptulate.llms.factory import LLMFactory
 from promptulate.llms.openai.openai import ChatOpenAI
@@ -52,7 +52,16 @@ _schema_fields = [
     "MessageSet",
 ]
 
-_llm_fields = ["chat", "AIChat", "BaseLLM", "ChatOpenAI", "LLMFactory"]
+_llm_fields = [
+    "chat",
+    "achat",
+    "chat_many",
+    "AIChat",
+    "ChatSessions",
+    "BaseLLM",
+    "ChatOpenAI",
+    "LLMFactory",
+]
 
 _tool_fields = [
     "Tool",
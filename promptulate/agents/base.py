@@ -5,11 +5,17 @@ from promptulate.hook import Hook, HookTable
 from promptulate.llms import BaseLLM
 from promptulate.output_formatter import OutputFormatter
 from promptulate.pydantic_v1 import BaseModel
+from promptulate.utils.logger import logger
 
 
 class BaseAgent(ABC):
     """Base class of Agent."""
 
+    support_output_schema: bool = False
+    """Whether `_run` accepts output_schema and examples, and returns the instance
+    of output_schema in its final step. Otherwise, the result of the agent is
+    formatted by an extra llm call."""
+
     def __init__(self, hooks: Optional[List[Callable]] = None, *args, **kwargs):
         hooks = hooks or []
         for hook in hooks:
@@ -39,17 +45,17 @@ class BaseAgent(ABC):
             **kwargs,
         )
 
+        if output_schema and self.support_output_schema:
+            kwargs.update(output_schema=output_schema, examples=examples)
+
         # get original response from LLM
-        result: str = self._run(instruction, *args, **kwargs)
+        result: Any = self._run(instruction, *args, **kwargs)
 
         # Return Pydantic instance if output_schema is specified
         if output_schema:
-            formatter = OutputFormatter(output_schema, examples)
-            prompt = (
-                f"{formatter.get_formatted_instructions()}\n##User input:\n{result}"
-            )
-            json_response: str = self.get_llm()(prompt)
-            return formatter.formatting_result(json_response)
+            if isinstance(result, output_schema):
+                return result
+            return self._format_output(result, output_schema, examples)
 
         Hook.call_hook(
             HookTable.ON_AGENT_RESULT,
@@ -60,6 +66,26 @@ class BaseAgent(ABC):
         )
         return result
 
+    def _format_output(
+        self,
+        result: Any,
+        output_schema: type(BaseModel),
+        examples: Optional[List[BaseModel]] = None,
+    ) -> BaseModel:
+        """Format the result of the agent to output_schema by an extra llm call,
+        provider-native structured output is used if the llm supports it."""
+        logger.info(f"[pne agent] format the result to {output_schema.__name__}.")
+        llm: BaseLLM = self.get_llm()
+        formatter = OutputFormatter(output_schema, examples)
+        prompt = f"{formatter.get_formatted_instructions()}\n##User input:\n{result}"
+
+        response_format: Optional[dict] = llm.get_response_format(output_schema)
+        if response_format is not None:
+            json_response: str = llm(prompt, response_format=response_format)
+        else:
+            json_response: str = llm(prompt)
+        return formatter.formatting_result(json_response)
+
     @abstractmethod
     def _run(self, instruction: str, *args, **kwargs) -> str:
         """Run the detail agent, implemented by subclass."""
@@ -7,9 +7,12 @@ from promptulate.agents.tool_agent.prompt import (
     PREFIX_TEMPLATE,
     REACT_SYSTEM_PROMPT_TEMPLATE,
 )
+from promptulate.error import OutputParserError
 from promptulate.hook import Hook, HookTable
 from promptulate.llms.base import BaseLLM
 from promptulate.llms.openai.openai import ChatOpenAI
+from promptulate.output_formatter import formatting_result, get_formatted_instructions
+from promptulate.pydantic_v1 import BaseModel
 from promptulate.tools.base import ToolTypes
 from promptulate.tools.manager import ToolManager
 from promptulate.utils.logger import logger
@@ -47,6 +50,8 @@ class ToolAgent(BaseAgent):
         _from (Optional[str]): The initialization source. Default is None.
     """
 
+    support_output_schema: bool = True
+
     def __init__(
         self,
         *,
@@ -113,18 +118,38 @@ class ToolAgent(BaseAgent):
         return f"Current date: {time.strftime('%Y-%m-%d %H:%M:%S')}"
 
     def _run(
-        self, instruction: str, return_raw_data: bool = False, **kwargs
-    ) -> Union[str, ActionResponse]:
+        self,
+        instruction: str,
+        return_raw_data: bool = False,
+        output_schema: Optional[type(BaseModel)] = None,
+        examples: Optional[List[BaseModel]] = None,
+        **kwargs,
+    ) -> Union[str, ActionResponse, BaseModel]:
         """Run the tool agent. The tool agent will interact with the LLM and the tool.
 
         Args:
             instruction(str): The instruction to the tool agent.
             return_raw_data(bool): Whether to return raw data. Default is False.
+            output_schema(Optional[type(BaseModel)]): The content of the finish step
+                is generated as the instance of output_schema if it is provided, and
+                JSON mode is used if the llm supports it, so no extra llm call is
+                needed to format the output.
+            examples(Optional[List[BaseModel]]): examples for output_schema.
 
         Returns:
             The output of the tool agent.
         """
         self.conversation_prompt = self._build_system_prompt(instruction)
+        llm_kwargs: dict = {}
+        if output_schema:
+            self.conversation_prompt += (
+                "When you finish, the content of the finish args MUST be a JSON "
+                "object instead of text.\n"
+                f"{get_formatted_instructions(output_schema, examples)}\n"
+            )
+            response_format: Optional[dict] = self.llm.get_response_format()
+            if response_format is not None:
+                llm_kwargs["response_format"] = response_format
         logger.info(f"[pne] ToolAgent system prompt: {self.conversation_prompt}")
 
         iterations = 0
@@ -133,11 +158,12 @@ class ToolAgent(BaseAgent):
 
         while self._should_continue(iterations, used_time):
             llm_resp: str = self.llm(
-                instruction=self.conversation_prompt + self.current_date
+                instruction=self.conversation_prompt + self.current_date, **llm_kwargs
             )
             while llm_resp == "":
                 llm_resp = self.llm(
-                    instruction=self.conversation_prompt + self.current_date
+                    instruction=self.conversation_prompt + self.current_date,
+                    **llm_kwargs,
                 )
 
             action_resp: ActionResponse = self._parse_llm_response(llm_resp)
@@ -150,7 +176,10 @@ class ToolAgent(BaseAgent):
                 if return_raw_data:
                     return action_resp
 
-                return action_resp["action_parameters"]["content"]
+                content = action_resp["action_parameters"]["content"]
+                if output_schema:
+                    return self._parse_output(content, output_schema)
+                return content
 
             Hook.call_hook(
                 HookTable.ON_AGENT_ACTION,
@@ -171,6 +200,20 @@ class ToolAgent(BaseAgent):
             iterations += 1
             used_time += time.time() - start_time
 
+    @staticmethod
+    def _parse_output(
+        content: Union[str, dict], output_schema: type(BaseModel)
+    ) -> Union[str, BaseModel]:
+        """Parse the content of the finish step to output_schema, return the content
+        as str if it does not match, then it will be formatted by BaseAgent."""
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+        try:
+            return formatting_result(output_schema, content)
+        except OutputParserError as e:
+            logger.warning(f"[pne] ToolAgent output does not match the schema: {e}")
+            return content
+
     def _should_continue(self, current_iteration: int, current_time_elapsed) -> bool:
         """Determine whether to stop, both timeout and exceeding the maximum number of
         iterations will stop.
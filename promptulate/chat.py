@@ -1,15 +1,25 @@
-from typing import Dict, List, Optional, Type, TypeVar, Union
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Type, TypeVar, Union
 
 from promptulate.agents.base import BaseAgent
 from promptulate.agents.tool_agent.agent import ToolAgent
 from promptulate.beta.agents.assistant_agent import AssistantAgent
+from promptulate.error import EmptyMessageSetError
 from promptulate.llms import BaseLLM
 from promptulate.llms.factory import LLMFactory
+from promptulate.memory.base import BaseChatMemory
+from promptulate.memory.context import BaseContextPolicy
 from promptulate.output_formatter import formatting_result, get_formatted_instructions
 from promptulate.pydantic_v1 import BaseModel
 from promptulate.schema import (
     AssistantMessage,
+    AsyncStreamIterator,
     BaseMessage,
+    MessageRecord,
     MessageSet,
     StreamIterator,
     SystemMessage,
@@ -82,6 +92,7 @@ class AIChat:
         custom_llm: Optional[BaseLLM] = None,
         enable_plan: bool = False,
         enable_memory: bool = False,
+        context_policy: Optional[BaseContextPolicy] = None,
     ):
         """Initialize the AIChat.
 
@@ -93,6 +104,9 @@ class AIChat:
             custom_llm(Optional[BaseLLM]): custom LLM instance.
             enable_plan(bool): use Agent with plan ability if True.
             enable_memory(bool): enable memory if True.
+            context_policy(Optional[BaseContextPolicy]): decide which messages of
+                the memory are sent to the llm, eg: TokenWindowPolicy and
+                SummaryWindowPolicy. The whole memory is sent if it is None.
         """
         self.llm: BaseLLM = _get_llm(model, model_config, custom_llm)
         self.tools: Optional[List[ToolTypes]] = tools
@@ -100,6 +114,7 @@ class AIChat:
 
         self.enable_memory: bool = enable_memory
         self.memory: MessageSet = MessageSet(messages=[])
+        self.context_policy: Optional[BaseContextPolicy] = context_policy
 
         if tools:
             if enable_plan:
@@ -139,6 +154,180 @@ class AIChat:
             Return List[BaseMessage] if stream is True.
             Return T if output_schema is provided.
         """
+        self._prepare_memory(messages, stream)
+
+        if self.agent:
+            response: Union[str, BaseModel] = self.agent.run(
+                self._build_context().string_messages, output_schema=output_schema
+            )
+            self.memory.add_ai_message(response)
+
+            return response
+
+        self._add_output_instruction(output_schema, examples)
+        logger.info(f"[pne chat] messages: {messages}")
+
+        response: Union[AssistantMessage, StreamIterator] = self.llm.predict(
+            self._build_context(), stream=stream, **kwargs
+        )
+
+        if output_schema and stream:
+            return stream_to_model(response, output_schema)
+
+        # TODO: add stream memory support
+        if stream:
+            return response
+
+        return self._handle_response(response, output_schema, return_raw_response)
+
+    async def arun(
+        self,
+        messages: Union[List[Dict[str, str]], MessageSet, str],
+        output_schema: Optional[Type[BaseModel]] = None,
+        examples: Optional[List[BaseModel]] = None,
+        return_raw_response: bool = False,
+        stream: bool = False,
+        **kwargs,
+    ) -> Union[str, BaseMessage, T, AsyncStreamIterator]:
+        """Async version of `run`. LLM is called by `BaseLLM.apredict`, so the event
+        loop will not be blocked while waiting for the response. Agent mode runs in
+        the default thread pool executor.
+
+        Args:
+            messages(Union[List, MessageSet, str]): chat messages. It can be str or
+                OpenAI API type data(List[Dict]) or MessageSet type.
+            output_schema(BaseModel): specified return type. See detail on in
+                OutputFormatter module.
+            examples(List[BaseModel]): examples for output_schema. See detail
+                on: OutputFormatter.
+            return_raw_response(bool): return OpenAI completion result if true,
+                otherwise return string type data.
+            stream(bool): return AsyncStreamIterator if True, use it by `async for`.
+
+        Returns:
+            The same as `run`, return AsyncStreamIterator if stream is True.
+        """
+        if output_schema and stream:
+            raise ValueError("output_schema is not supported in async stream mode.")
+
+        self._prepare_memory(messages, stream)
+
+        if self.agent:
+            loop = asyncio.get_running_loop()
+            response: Union[str, BaseModel] = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    self.agent.run,
+                    self._build_context().string_messages,
+                    output_schema=output_schema,
+                ),
+            )
+            self.memory.add_ai_message(response)
+
+            return response
+
+        self._add_output_instruction(output_schema, examples)
+        logger.info(f"[pne chat] async messages: {messages}")
+
+        context: MessageSet = self._build_context()
+        if stream:
+            return await self.llm.apredict(context, stream=True, **kwargs)
+
+        response: AssistantMessage = await self.llm.apredict(context, **kwargs)
+        return self._handle_response(response, output_schema, return_raw_response)
+
+    def run_many(
+        self,
+        prompts: List[Union[List[Dict[str, str]], MessageSet, str]],
+        output_schema: Optional[Type[BaseModel]] = None,
+        examples: Optional[List[BaseModel]] = None,
+        return_raw_response: bool = False,
+        max_concurrency: int = 8,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> List[Union[str, BaseMessage, T, Exception]]:
+        """Run many independent prompts concurrently with the llm of AIChat, it is
+        useful for bulk jobs such as classification. Memory and context policy are
+        not used, every prompt is a new conversation.
+
+        Args:
+            prompts(List[Union[List, MessageSet, str]]): prompts to run, every prompt
+                is the same as messages of `run`.
+            output_schema(BaseModel): specified return type of every prompt.
+            examples(List[BaseModel]): examples for output_schema.
+            return_raw_response(bool): return AssistantMessage if true, otherwise
+                return string type data.
+            max_concurrency(int): the maximum number of in-flight requests.
+            return_exceptions(bool): If True, the exception of a failed prompt is put
+                in its position of the result list. Otherwise, the first exception
+                will be raised.
+            **kwargs: kwargs passed to predict.
+
+        Returns:
+            List of results in the same order as prompts, the result type is the same
+                as `run`.
+        """
+        if self.agent:
+            raise ValueError("run_many does not support tools.")
+
+        instruction: Optional[str] = None
+        if output_schema:
+            instruction = get_formatted_instructions(
+                json_schema=output_schema, examples=examples
+            )
+
+        messages_list: List[MessageSet] = [
+            self._build_messages(prompt, instruction) for prompt in prompts
+        ]
+        logger.info(f"[pne chat] run {len(messages_list)} prompts.")
+        responses: List[Union[AssistantMessage, Exception]] = self.llm.batch(
+            messages_list,
+            max_concurrency=max_concurrency,
+            return_exceptions=return_exceptions,
+            **kwargs,
+        )
+
+        results: List[Union[str, BaseMessage, T, Exception]] = []
+        for idx, response in enumerate(responses):
+            if isinstance(response, Exception):
+                results.append(response)
+                continue
+            try:
+                results.append(
+                    self._format_response(response, output_schema, return_raw_response)
+                )
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                logger.error(f"[pne chat] prompt {idx} failed: {e}")
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _build_messages(
+        messages: Union[List[Dict[str, str]], MessageSet, str],
+        instruction: Optional[str] = None,
+    ) -> MessageSet:
+        """Build the messages of an independent prompt, the same as the memory of a
+        new conversation."""
+        message_set: MessageSet = _convert_message(messages).fork()
+        if len(message_set.messages) == 1:
+            message_set.messages.insert(
+                0, SystemMessage(content="You are a helpful assistant")
+            )
+        if instruction:
+            last = message_set.messages[-1]
+            message_set.messages[-1] = MessageRecord(
+                last.type, f"{last.content}\n{instruction}"
+            )
+        return message_set
+
+    def _prepare_memory(
+        self,
+        messages: Union[List[Dict[str, str]], MessageSet, str],
+        stream: bool = False,
+    ) -> None:
+        """Validate the parameters and add the messages into memory."""
         if stream and self.tools:
             raise ValueError(
                 "stream, tools and output_schema can't be True at the same time, "
@@ -158,38 +347,44 @@ class AIChat:
                 *self.memory.messages,
             ]
 
-        if self.agent:
-            response: Union[str, BaseModel] = self.agent.run(
-                self.memory.string_messages, output_schema=output_schema
-            )
-            self.memory.add_ai_message(response)
+    def _build_context(self) -> MessageSet:
+        """Build the messages sent to the llm by the context policy."""
+        if self.context_policy is None:
+            return self.memory
+        return self.context_policy.build(self.memory, self.llm)
 
-            return response
-
-        # add output format into the last prompt if provide
+    def _add_output_instruction(
+        self,
+        output_schema: Optional[Type[BaseModel]],
+        examples: Optional[List[BaseModel]],
+    ) -> None:
+        """Add output format into the last prompt if provide."""
         if output_schema:
             instruction: str = get_formatted_instructions(
                 json_schema=output_schema, examples=examples
             )
             self.memory.messages[-1].content += f"\n{instruction}"
-        logger.info(f"[pne chat] messages: {messages}")
-
-        response: Union[AssistantMessage, StreamIterator] = self.llm.predict(
-            self.memory, stream=stream, **kwargs
-        )
-
-        if output_schema and stream:
-            return stream_to_model(response, output_schema)
-
-        # TODO: add stream memory support
-        if stream:
-            return response
 
+    def _handle_response(
+        self,
+        response: AssistantMessage,
+        output_schema: Optional[Type[BaseModel]],
+        return_raw_response: bool,
+    ) -> Union[str, BaseMessage, T]:
+        """Save the response into memory and convert it to the specified type."""
         logger.info(
             f"[pne chat] response: {response.additional_kwargs or response.content}"
         )
         self.memory.add_ai_message(response.content)
-
+        return self._format_response(response, output_schema, return_raw_response)
+
+    @staticmethod
+    def _format_response(
+        response: AssistantMessage,
+        output_schema: Optional[Type[BaseModel]],
+        return_raw_response: bool,
+    ) -> Union[str, BaseMessage, T]:
+        """Convert the response to the specified type."""
         # return output format if provide
         if output_schema:
             return formatting_result(
@@ -199,6 +394,221 @@ class AIChat:
         return response if return_raw_response else response.content
 
 
+class _ChatSession:
+    __slots__ = ("chat", "lock", "last_used", "active", "loaded")
+
+    def __init__(self, chat: AIChat):
+        self.chat = chat
+        self.lock = threading.Lock()
+        self.last_used: float = time.monotonic()
+        # number of running requests, the session is not evicted while running
+        self.active: int = 0
+        self.loaded: bool = False
+
+
+class ChatSessions:
+    """Serve many chat sessions with one llm, eg: a chat web service. Every session
+    has its own memory and lock, so the requests of the same session run in order and
+    the requests of different sessions run concurrently. Idle sessions are evicted by
+    LRU and TTL, and they can be spilled to a chat memory backend and loaded back
+    when they are used again.
+
+    ```python
+    import promptulate as pne
+    from promptulate.memory import FileChatMemory
+
+    sessions = pne.ChatSessions(
+        "gpt-4o-mini", max_sessions=1000, ttl=3600, memory=FileChatMemory()
+    )
+    response: str = sessions.run("user-1", "hello")
+    ```
+    """
+
+    def __init__(
+        self,
+        llm: Union[BaseLLM, str],
+        max_sessions: int = 1024,
+        ttl: Optional[float] = None,
+        memory: Optional[BaseChatMemory] = None,
+        model_config: Optional[dict] = None,
+        context_policy_factory: Optional[Callable[[], BaseContextPolicy]] = None,
+    ):
+        """
+        Args:
+            llm(Union[BaseLLM, str]): llm instance or model name, it is shared by all
+                sessions.
+            max_sessions(int): the maximum number of sessions kept in process, the
+                least recently used idle sessions are evicted.
+            ttl(Optional[float]): seconds before an idle session is evicted, None
+                means only evicted by max_sessions.
+            memory(Optional[BaseChatMemory]): chat memory backend, evicted sessions
+                are saved to it with session id as conversation id, and loaded from
+                it when they are used again. Evicted sessions are dropped if it is
+                None.
+            model_config(Optional[dict]): LLM model config if llm is model name.
+            context_policy_factory(Optional[Callable[[], BaseContextPolicy]]): create
+                the context policy of every session.
+        """
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be greater than 0.")
+
+        self.llm: BaseLLM = (
+            LLMFactory.build(llm, model_config=model_config)
+            if isinstance(llm, str)
+            else llm
+        )
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.memory = memory
+        self.context_policy_factory = context_policy_factory
+
+        self._sessions: "OrderedDict[str, _ChatSession]" = OrderedDict()
+        # evicted sessions which are being saved to the memory backend
+        self._spilling: Dict[str, _ChatSession] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        session_id: str,
+        messages: Union[List[Dict[str, str]], MessageSet, str],
+        **kwargs,
+    ) -> Union[str, BaseMessage, T, StreamIterator]:
+        """Run the chat of the session, the parameters are the same as `AIChat.run`.
+
+        Args:
+            session_id(str): id of the session, eg: user id or conversation id.
+            messages(Union[List, MessageSet, str]): new messages of the session.
+            **kwargs: parameters of `AIChat.run`, eg: output_schema and stream.
+
+        Returns:
+            The same as `AIChat.run`.
+        """
+        session: _ChatSession = self._acquire(session_id)
+        try:
+            with session.lock:
+                if not session.loaded:
+                    self._load(session_id, session)
+                return session.chat.run(messages, **kwargs)
+        finally:
+            with self._lock:
+                session.active -= 1
+                session.last_used = time.monotonic()
+                # keep the sessions ordered by last use for _evict
+                if self._sessions.get(session_id) is session:
+                    self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def flush(self) -> None:
+        """Save all in-process sessions to the memory backend, eg: before shutdown."""
+        if self.memory is None:
+            return
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for session_id, session in sessions:
+            self._save(session_id, session)
+
+    def get_memory(self, session_id: str) -> Optional[MessageSet]:
+        """Get the in-process memory of the session, None if it is not in process."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        return session.chat.memory if session is not None else None
+
+    def remove(self, session_id: str) -> None:
+        """Remove the session from process without saving it."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _acquire(self, session_id: str) -> _ChatSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                # reuse the evicted session if it is still being saved
+                session = self._spilling.get(session_id)
+                if session is None:
+                    session = _ChatSession(
+                        AIChat(
+                            custom_llm=self.llm,
+                            enable_memory=True,
+                            context_policy=(
+                                self.context_policy_factory()
+                                if self.context_policy_factory
+                                else None
+                            ),
+                        )
+                    )
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            session.active += 1
+            session.last_used = time.monotonic()
+        return session
+
+    def _load(self, session_id: str, session: _ChatSession) -> None:
+        """Load the memory of the session from the memory backend."""
+        session.loaded = True
+        if self.memory is None:
+            return
+        try:
+            message_set: MessageSet = self._get_backend(
+                session_id
+            ).load_message_set_from_memory()
+        except EmptyMessageSetError:
+            return
+        session.chat.memory = message_set
+        logger.debug(f"[pne chat sessions] load session {session_id}.")
+
+    def _get_backend(self, session_id: str) -> BaseChatMemory:
+        return self.memory.copy(update={"conversation_id": session_id})
+
+    def _save(self, session_id: str, session: _ChatSession) -> None:
+        with session.lock:
+            if not session.loaded:
+                return
+            try:
+                self._get_backend(session_id).save_message_set_to_memory(
+                    session.chat.memory
+                )
+            except Exception as e:
+                logger.error(
+                    f"[pne chat sessions] failed to save session {session_id}: {e}"
+                )
+
+    def _evict(self) -> None:
+        """Evict the expired and the least recently used idle sessions."""
+        evicted: List[tuple] = []
+        with self._lock:
+            now = time.monotonic()
+            overflow: int = len(self._sessions) - self.max_sessions
+            # sessions are ordered by last use, so only the head is visited
+            for session_id, session in self._sessions.items():
+                expired = self.ttl is not None and now - session.last_used > self.ttl
+                if overflow <= 0 and not expired:
+                    break
+                if session.active:
+                    continue
+                evicted.append((session_id, session))
+                overflow -= 1
+
+            for session_id, session in evicted:
+                del self._sessions[session_id]
+                if self.memory is not None:
+                    self._spilling[session_id] = session
+
+        if self.memory is not None:
+            for session_id, session in evicted:
+                self._save(session_id, session)
+                with self._lock:
+                    if self._spilling.get(session_id) is session:
+                        del self._spilling[session_id]
+        if evicted:
+            logger.debug(f"[pne chat sessions] evict {len(evicted)} sessions.")
+
+
 def chat(
     messages: Union[List, MessageSet, str],
     *,
@@ -252,3 +662,98 @@ def chat(
         stream=stream,
         **kwargs,
     )
+
+
+async def achat(
+    messages: Union[List, MessageSet, str],
+    *,
+    model: Optional[str] = None,
+    model_config: Optional[dict] = None,
+    tools: Optional[List[ToolTypes]] = None,
+    output_schema: Optional[type(BaseModel)] = None,
+    examples: Optional[List[BaseModel]] = None,
+    return_raw_response: bool = False,
+    custom_llm: Optional[BaseLLM] = None,
+    enable_plan: bool = False,
+    stream: bool = False,
+    **kwargs,
+) -> Union[str, BaseMessage, T, AsyncStreamIterator]:
+    """Async version of `chat`. The parameters are the same as `chat`.
+
+    Returns:
+        Return string normally, it means enable_original_return is default False.
+        Return BaseMessage if enable_original_return is True.
+        Return T if output_schema is provided.
+        Return AsyncStreamIterator if stream is True, use it by `async for`.
+    """
+    return await AIChat(
+        model=model,
+        model_config=model_config,
+        tools=tools,
+        custom_llm=custom_llm,
+        enable_plan=enable_plan,
+    ).arun(
+        messages=messages,
+        output_schema=output_schema,
+        examples=examples,
+        return_raw_response=return_raw_response,
+        stream=stream,
+        **kwargs,
+    )
+
+
+def chat_many(
+    prompts: List[Union[List, MessageSet, str]],
+    *,
+    model: Optional[str] = None,
+    model_config: Optional[dict] = None,
+    output_schema: Optional[type(BaseModel)] = None,
+    examples: Optional[List[BaseModel]] = None,
+    return_raw_response: bool = False,
+    custom_llm: Optional[BaseLLM] = None,
+    max_concurrency: int = 8,
+    return_exceptions: bool = True,
+    **kwargs,
+) -> List[Union[str, BaseMessage, T, Exception]]:
+    """Chat many independent prompts concurrently with one llm instance, eg:
+
+    ```python
+    import promptulate as pne
+
+    results = pne.chat_many(
+        ["Is it positive? I love it.", "Is it positive? It is broken."],
+        model="gpt-4o-mini",
+        max_concurrency=16,
+    )
+    ```
+
+    Args:
+        prompts(List[Union[List, MessageSet, str]]): prompts to chat, every prompt is
+            the same as messages of `chat`.
+        model(str): LLM model. Currently only support chat model.
+        model_config(Optional[dict]): LLM model config.
+        output_schema(BaseModel): specified return type of every prompt.
+        examples(List[BaseModel]): examples for output_schema.
+        return_raw_response(bool): return AssistantMessage if true, otherwise return
+            string type data.
+        custom_llm(BaseLLM): You can use custom LLM if you have.
+        max_concurrency(int): the maximum number of in-flight requests.
+        return_exceptions(bool): If True, the exception of a failed prompt is put in
+            its position of the result list. Otherwise, the first exception will be
+            raised.
+        **kwargs: litellm kwargs
+
+    Returns:
+        List of results in the same order as prompts, see `AIChat.run_many`.
+    """
+    return AIChat(
+        model=model, model_config=model_config, custom_llm=custom_llm
+    ).run_many(
+        prompts,
+        output_schema=output_schema,
+        examples=examples,
+        return_raw_response=return_raw_response,
+        max_concurrency=max_concurrency,
+        return_exceptions=return_exceptions,
+        **kwargs,
+    )
@@ -18,7 +18,7 @@
 # Contact Email: zeeland@foxmail.com
 
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import requests
 from dotenv import load_dotenv
@@ -29,6 +29,10 @@ from promptulate.utils.logger import logger
 from promptulate.utils.openai_key_pool import OpenAIKeyPool
 from promptulate.utils.singleton import Singleton
 
+if TYPE_CHECKING:
+    from promptulate.llms.cache import BaseLLMCache
+    from promptulate.llms.retry import RetryPolicy
+
 PROXY_MODE = ["off", "custom", "promptulate"]
 load_dotenv()
 
@@ -42,12 +46,20 @@ def turn_off_stdout_hook():
     Config().turn_off_stdout_hook()
 
 
+def set_llm_cache(cache: Optional["BaseLLMCache"]):
+    """Set the default response cache for all llms, None means disable it."""
+    Config().llm_cache = cache
+
+
 class Config(metaclass=Singleton):
     """
     Configuration class for managing application settings.
 
     Attributes:
         enable_cache (bool): Flag indicating whether caching is enabled.
+        llm_cache (Optional[BaseLLMCache]): Default response cache for all llms.
+        retry_policy (Optional[RetryPolicy]): Default retry policy for all llms.
+        single_flight (bool): Coalesce identical in-flight requests of all llms.
         _proxy_mode (str): The current proxy mode.
         _proxies (Optional[dict]): Dictionary of proxy settings.
         openai_chat_api_url (str): URL for OpenAI chat API.
@@ -60,11 +72,20 @@ class Config(metaclass=Singleton):
         ernie_embedding_v1_url (str): URL for Ernie embedding v1 API.
         key_default_retry_times (int): Default number of key retry times.
         enable_stdout_hook (bool): Flag indicating whether stdout hook is enabled.
+        http_pool_connections (int): Number of host pools cached by each session.
+        http_pool_maxsize (int): Maximum number of connections kept in a pool.
+        http_keep_alive (bool): Flag indicating whether to reuse connections.
+        http_keep_alive_expiry (float): Seconds an idle connection is kept alive.
+        http_timeout (Optional[float]): Request timeout in seconds, None means no
+            timeout.
     """
 
     def __init__(self):
         logger.info("[pne config] Config initialization")
         self.enable_cache: bool = True
+        self.llm_cache: Optional["BaseLLMCache"] = None
+        self.retry_policy: Optional["RetryPolicy"] = None
+        self.single_flight: bool = False
         self._proxy_mode: str = PROXY_MODE[0]
         self._proxies: Optional[dict] = None
 
@@ -82,6 +103,13 @@ class Config(metaclass=Singleton):
 
         self.key_default_retry_times = 5
         """If llm(like OpenAI) unable to obtain data, retry request until the data is obtained."""  # noqa: E501
+
+        self.http_pool_connections: int = 10
+        self.http_pool_maxsize: int = 100
+        self.http_keep_alive: bool = True
+        self.http_keep_alive_expiry: float = 30.0
+        self.http_timeout: Optional[float] = None
+        """Connection pool settings used by llm providers, see promptulate.utils.http"""  # noqa: E501
         self.enable_stdout_hook = True
 
         if self.enable_stdout_hook:
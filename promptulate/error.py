@@ -17,7 +17,7 @@
 # Project Link: https://github.com/Undertone0809/promptulate
 # Contact Email: zeeland@foxmail.com
 
-from typing import Optional
+from typing import Mapping, Optional
 
 __all__ = [
     "EmptyMessageSetError",
@@ -39,21 +39,45 @@ class MissingAttributionError(Exception):
 
 
 class LLMError(Exception):
-    def __init__(self, msg: str):
+    def __init__(
+        self,
+        msg: str,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
         super().__init__(f"<LLM> could not get data correctly, reasons: {msg}")
+        self.status_code = status_code
+        """HTTP status code of the response, used by RetryPolicy."""
+        self.headers = headers or {}
+        """HTTP headers of the response, used by RetryPolicy to get Retry-After."""
 
 
 class OpenAIError(Exception):
-    def __init__(self, msg: str):
+    def __init__(
+        self,
+        msg: str,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
         super().__init__(f"<OpenAI> could not get data correctly, reasons: {msg}")
+        self.status_code = status_code
+        self.headers = headers or {}
 
 
 class NetWorkError(Exception):
-    def __init__(self, origin: str, reason: Optional[str] = None):
+    def __init__(
+        self,
+        origin: str,
+        reason: Optional[str] = None,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
         msg = f"<{origin}> could not get data"
         if reason:
             msg += f", reason: {reason}"
         super().__init__(msg)
+        self.status_code = status_code
+        self.headers = headers or {}
 
 
 class OutputParserError(Exception):
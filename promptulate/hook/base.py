@@ -15,6 +15,9 @@ class HookTable:
     ON_LLM_CREATE = ("llm", "on_llm_create")
     ON_LLM_START = ("llm", "on_llm_start")
     ON_LLM_RESULT = ("llm", "on_llm_result")
+    ON_LLM_FIRST_TOKEN = ("llm", "on_llm_first_token")
+    ON_LLM_TOKEN = ("llm", "on_llm_token")
+    ON_LLM_STREAM_END = ("llm", "on_llm_stream_end")
 
     ON_TOOL_CREATE = ("Tool", "on_tool_create")
     ON_TOOL_START = ("Tool", "on_tool_start")
@@ -176,6 +179,27 @@ class LLMHookMixin:
 
         return decorator
 
+    @staticmethod
+    def on_llm_first_token(hook_type: HOOK_TYPE):
+        def decorator(fn):
+            return _hook_decorator(HookTable.ON_LLM_FIRST_TOKEN, hook_type, fn)
+
+        return decorator
+
+    @staticmethod
+    def on_llm_token(hook_type: HOOK_TYPE):
+        def decorator(fn):
+            return _hook_decorator(HookTable.ON_LLM_TOKEN, hook_type, fn)
+
+        return decorator
+
+    @staticmethod
+    def on_llm_stream_end(hook_type: HOOK_TYPE):
+        def decorator(fn):
+            return _hook_decorator(HookTable.ON_LLM_STREAM_END, hook_type, fn)
+
+        return decorator
+
 
 class Hook(ToolHookMixin, AgentHookMixin, LLMHookMixin):
     component_hook_store: List[ComponentHookSchema] = []
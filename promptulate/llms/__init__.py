@@ -21,10 +21,13 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from promptulate.llms.base import BaseLLM
+    from promptulate.llms.cache import LLMCache, SemanticCache
     from promptulate.llms.erniebot.erniebot import ErnieBot
     from promptulate.llms.factory import LLMFactory
+    from promptulate.llms.hedge import HedgedLLM
     from promptulate.llms.openai import ChatOpenAI, OpenAI
     from promptulate.llms.qianfan import QianFan
+    from promptulate.llms.router import RouterLLM
     from promptulate.llms.zhipu import ZhiPu
 
 
@@ -57,6 +60,22 @@ def __getattr__(name):
         from promptulate.llms.factory import LLMFactory
 
         return LLMFactory
+    elif name == "LLMCache":
+        from promptulate.llms.cache import LLMCache
+
+        return LLMCache
+    elif name == "SemanticCache":
+        from promptulate.llms.cache import SemanticCache
+
+        return SemanticCache
+    elif name == "HedgedLLM":
+        from promptulate.llms.hedge import HedgedLLM
+
+        return HedgedLLM
+    elif name == "RouterLLM":
+        from promptulate.llms.router import RouterLLM
+
+        return RouterLLM
 
 
 __all__ = [
@@ -67,4 +86,8 @@ __all__ = [
     "QianFan",
     "ZhiPu",
     "LLMFactory",
+    "LLMCache",
+    "SemanticCache",
+    "HedgedLLM",
+    "RouterLLM",
 ]
@@ -1,24 +1,47 @@
 """Docs: https://docs.litellm.ai/docs/"""
 
+import functools
 import json
-from typing import Optional, TypeVar, Union
+from typing import Optional, Tuple, TypeVar, Union
 
 import litellm
 
 from promptulate.llms import BaseLLM
+from promptulate.llms.rate_limit import estimate_tokens
+from promptulate.output_formatter import to_response_format
 from promptulate.pydantic_v1 import BaseModel
 from promptulate.schema import (
     AssistantMessage,
+    AsyncStreamIterator,
+    LazyChunkData,
     MessageSet,
     StreamIterator,
 )
 from promptulate.utils.logger import logger
+from promptulate.utils.tokenizer import Tokenizer, get_tokenizer
 
 T = TypeVar("T", bound=BaseModel)
 
 
-def parse_content(chunk) -> (str, str):
-    """Parse the litellm chunk.
+def _chunk_to_dict(chunk) -> dict:
+    data = chunk.json()
+    return data if isinstance(data, dict) else json.loads(data)
+
+
+def _get_usage(chunk) -> Optional[dict]:
+    # usage is a pydantic extra field of the chunk, read it directly to avoid the
+    # slow __getattr__ of pydantic when it is missing
+    extra: Optional[dict] = getattr(chunk, "__pydantic_extra__", None)
+    usage = extra.get("usage") if extra is not None else getattr(chunk, "usage", None)
+    if usage is None:
+        return None
+    return usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+
+
+def parse_content(chunk) -> (str, LazyChunkData):
+    """Parse the litellm chunk. The raw data is serialized only when it is accessed,
+    so the chunk is not serialized if return_raw_response is False.
+
     Args:
         chunk: litellm chunk.
 
@@ -26,9 +49,26 @@ def parse_content(chunk) -> (str, str):
         content: The content of the chunk.
         ret_data: The additional data of the chunk.
     """
-    content = chunk.choices[0].delta.content
-    ret_data = json.loads(json.dumps(chunk.json()))
-    return content, ret_data
+    choice = chunk.choices[0]
+    ret_data = LazyChunkData(
+        functools.partial(_chunk_to_dict, chunk),
+        usage=_get_usage(chunk),
+        finish_reason=choice.finish_reason,
+    )
+    return choice.delta.content, ret_data
+
+
+@functools.lru_cache(maxsize=None)
+def _get_structured_output_support(model: str) -> Tuple[bool, bool]:
+    """Whether the model supports JSON schema and JSON mode."""
+    try:
+        if litellm.supports_response_schema(model=model):
+            return True, True
+        params = litellm.get_supported_openai_params(model=model) or []
+        return False, "response_format" in params
+    except Exception as e:
+        logger.debug(f"[pne chat] can not get structured output support: {e}")
+        return False, False
 
 
 class LiteLLM(BaseLLM):
@@ -38,6 +78,32 @@ class LiteLLM(BaseLLM):
         self._model: str = model
         self._model_config: dict = model_config or {}
 
+    def _get_cache_params(self) -> dict:
+        return {"model": self._model, **self._model_config}
+
+    def get_tokenizer(self) -> Tokenizer:
+        return get_tokenizer(self._model)
+
+    def get_response_format(
+        self, output_schema: Optional[type(BaseModel)] = None
+    ) -> Optional[dict]:
+        supports_schema, supports_json = _get_structured_output_support(self._model)
+        if output_schema is not None and supports_schema:
+            return to_response_format(output_schema)
+        if supports_json:
+            return {"type": "json_object"}
+        return None
+
+    def _estimate_tokens(self, messages: MessageSet) -> int:
+        return estimate_tokens(messages, self._model_config.get("max_tokens"))
+
+    def _get_params(self, kwargs: dict) -> dict:
+        """Get the parameters of completion, response_format of predict overrides
+        the model config."""
+        if kwargs.get("response_format") is None:
+            return self._model_config
+        return {**self._model_config, "response_format": kwargs["response_format"]}
+
     def _predict(
         self, messages: MessageSet, stream: bool = False, *args, **kwargs
     ) -> Union[AssistantMessage, StreamIterator]:
@@ -45,7 +111,7 @@ class LiteLLM(BaseLLM):
         temp_response = litellm.completion(
             model=self._model,
             messages=messages.listdict_messages,
-            **self._model_config,
+            **self._get_params(kwargs),
             stream=stream,
         )
 
@@ -56,6 +122,32 @@ class LiteLLM(BaseLLM):
                 return_raw_response=False,
             )
 
+        return self._build_response(temp_response)
+
+    async def _apredict(
+        self, messages: MessageSet, stream: bool = False, *args, **kwargs
+    ) -> Union[AssistantMessage, AsyncStreamIterator]:
+        logger.info(f"[pne chat] async prompts: {messages.string_messages}")
+        temp_response = await litellm.acompletion(
+            model=self._model,
+            messages=messages.listdict_messages,
+            **self._get_params(kwargs),
+            stream=stream,
+        )
+
+        if stream:
+            return AsyncStreamIterator(
+                response_stream=temp_response,
+                parse_content=parse_content,
+                return_raw_response=False,
+                max_buffer_size=kwargs.get("max_buffer_size", 0),
+            )
+
+        return self._build_response(temp_response)
+
+    @staticmethod
+    def _build_response(temp_response) -> AssistantMessage:
+        """Convert litellm ModelResponse to AssistantMessage."""
         response = AssistantMessage(
             content=temp_response.choices[0].message.content,
             additional_kwargs=temp_response.json()
@@ -74,5 +166,6 @@ class LiteLLM(BaseLLM):
                     {"content": "You are a helpful assistant.", "role": "system"},
                     {"content": instruction, "role": "user"},
                 ]
-            )
+            ),
+            **kwargs,
         ).content
@@ -18,23 +18,51 @@
 # Contact Email: zeeland4work@gmail.com
 
 
+import asyncio
+import functools
+import json
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, TypeVar, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, TypeVar, Union
 
+from promptulate.config import pne_config
 from promptulate.hook import Hook, HookTable
+from promptulate.llms.cache import BaseLLMCache, get_cache_key
+from promptulate.llms.metrics import StreamObserver
+from promptulate.llms.rate_limit import RateLimiter, estimate_tokens, get_usage_tokens
+from promptulate.llms.retry import RetryPolicy
+from promptulate.llms.singleflight import single_flight_group
 from promptulate.pydantic_v1 import BaseModel
 from promptulate.schema import (
     AssistantMessage,
     BaseMessage,
+    BaseStreamIterator,
     LLMType,
     MessageSet,
+    StreamIterator,
 )
+from promptulate.utils.logger import logger
+from promptulate.utils.tokenizer import Tokenizer, get_tokenizer
 
 T = TypeVar("T", bound=BaseModel)
 
+_NON_CACHE_FIELDS = {"cache", "retry_policy", "rate_limiter", "single_flight"}
+
 
 class BaseLLM(BaseModel, ABC):
     llm_type: Union[str, LLMType] = "custom"
+    cache: Optional[BaseLLMCache] = None
+    """Response cache, see promptulate.llms.cache. pne_config.llm_cache will be used
+    if it is None."""
+    retry_policy: Optional[RetryPolicy] = None
+    """Retry policy of failed requests, see promptulate.llms.retry.
+    pne_config.retry_policy will be used if it is None."""
+    rate_limiter: Optional[RateLimiter] = None
+    """Client-side rpm and tpm limiter, see promptulate.llms.rate_limit."""
+    single_flight: Optional[bool] = None
+    """Coalesce identical in-flight requests, see promptulate.llms.singleflight.
+    pne_config.single_flight will be used if it is None."""
 
     class Config:
         """Configuration for this pydantic object."""
@@ -51,13 +79,270 @@ class BaseLLM(BaseModel, ABC):
 
     def predict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
         """llm generate prompt"""
+        start_time: float = time.perf_counter()
         Hook.call_hook(HookTable.ON_LLM_START, self, messages, *args, **kwargs)
-        result = self._predict(messages, *args, **kwargs)
+
+        cache: Optional[BaseLLMCache] = self._get_llm_cache(**kwargs)
+        if cache is not None:
+            llm_string: str = self._get_llm_string(*args, **kwargs)
+            result = cache.lookup(messages, llm_string)
+            if result is None:
+                result = self._coalesced_predict(messages, *args, **kwargs)
+                if isinstance(result, AssistantMessage):
+                    cache.update(messages, llm_string, result)
+        else:
+            result = self._coalesced_predict(messages, *args, **kwargs)
+
+        if isinstance(result, AssistantMessage):
+            Hook.call_hook(HookTable.ON_LLM_RESULT, self, result=result.content)
+        elif isinstance(result, BaseStreamIterator):
+            result.observer = StreamObserver(self, start_time)
+
+        return result
+
+    async def apredict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
+        """llm generate prompt asynchronously"""
+        start_time: float = time.perf_counter()
+        Hook.call_hook(HookTable.ON_LLM_START, self, messages, *args, **kwargs)
+
+        cache: Optional[BaseLLMCache] = self._get_llm_cache(**kwargs)
+        if cache is not None:
+            llm_string: str = self._get_llm_string(*args, **kwargs)
+            result = cache.lookup(messages, llm_string)
+            if result is None:
+                result = await self._coalesced_apredict(messages, *args, **kwargs)
+                if isinstance(result, AssistantMessage):
+                    cache.update(messages, llm_string, result)
+        else:
+            result = await self._coalesced_apredict(messages, *args, **kwargs)
+
         if isinstance(result, AssistantMessage):
             Hook.call_hook(HookTable.ON_LLM_RESULT, self, result=result.content)
+        elif isinstance(result, BaseStreamIterator):
+            result.observer = StreamObserver(self, start_time)
+
+        return result
+
+    def _coalesced_predict(self, messages: MessageSet, *args, **kwargs):
+        """Share the result with other callers which send the same request at the
+        same time if single flight is enabled."""
+        if not self._is_single_flight():
+            return self._call_predict(messages, *args, **kwargs)
+
+        key: str = get_cache_key(messages, self._get_llm_string(*args, **kwargs))
+        result, shared = single_flight_group.do(
+            key, self._call_predict, messages, *args, **kwargs
+        )
+        return self._unwrap_shared_result(result, shared)
+
+    async def _coalesced_apredict(self, messages: MessageSet, *args, **kwargs):
+        # async stream can only be consumed by one caller
+        if not self._is_single_flight() or kwargs.get("stream", False):
+            return await self._call_apredict(messages, *args, **kwargs)
+
+        key: str = get_cache_key(messages, self._get_llm_string(*args, **kwargs))
+        result, shared = await single_flight_group.ado(
+            key, self._call_apredict, messages, *args, **kwargs
+        )
+        return self._unwrap_shared_result(result, shared)
 
+    @staticmethod
+    def _unwrap_shared_result(result: Any, shared: bool) -> Any:
+        # every caller gets its own message in case it is modified
+        if shared and isinstance(result, BaseMessage):
+            return result.copy(deep=True)
         return result
 
+    def _is_single_flight(self) -> bool:
+        if self.single_flight is not None:
+            return self.single_flight
+        return pne_config.single_flight
+
+    def _call_predict(self, messages: MessageSet, *args, **kwargs):
+        """Call the provider by `_predict` with retry policy."""
+        retry_policy: Optional[RetryPolicy] = self._get_retry_policy()
+        if retry_policy is None:
+            return self._rate_limited_predict(messages, *args, **kwargs)
+        return retry_policy.call(self._rate_limited_predict, messages, *args, **kwargs)
+
+    async def _call_apredict(self, messages: MessageSet, *args, **kwargs):
+        """Call the provider by `_apredict` with retry policy."""
+        retry_policy: Optional[RetryPolicy] = self._get_retry_policy()
+        if retry_policy is None:
+            return await self._rate_limited_apredict(messages, *args, **kwargs)
+        return await retry_policy.acall(
+            self._rate_limited_apredict, messages, *args, **kwargs
+        )
+
+    def _rate_limited_predict(self, messages: MessageSet, *args, **kwargs):
+        """Wait for the rate limiter before every request, including retries."""
+        if self.rate_limiter is None:
+            return self._predict(messages, *args, **kwargs)
+
+        estimated_tokens: int = self._estimate_tokens(messages)
+        self.rate_limiter.acquire(estimated_tokens)
+        result = self._predict(messages, *args, **kwargs)
+        self._reconcile_rate_limit(estimated_tokens, result)
+        return result
+
+    async def _rate_limited_apredict(self, messages: MessageSet, *args, **kwargs):
+        if self.rate_limiter is None:
+            return await self._apredict(messages, *args, **kwargs)
+
+        estimated_tokens: int = self._estimate_tokens(messages)
+        await self.rate_limiter.aacquire(estimated_tokens)
+        result = await self._apredict(messages, *args, **kwargs)
+        self._reconcile_rate_limit(estimated_tokens, result)
+        return result
+
+    def get_tokenizer(self) -> Tokenizer:
+        """Get the tokenizer of the model, it is used to count tokens of messages.
+        Subclass can override it to select the tokenizer by model name."""
+        return get_tokenizer()
+
+    def get_response_format(
+        self, output_schema: Optional[type(BaseModel)] = None
+    ) -> Optional[dict]:
+        """Get the provider-native response format for structured output, which is
+        passed to predict by `response_format`. Subclass can override it if the
+        provider supports JSON mode or JSON schema.
+
+        Args:
+            output_schema(Optional[type(BaseModel)]): the schema of the output, get
+                JSON mode if it is None.
+
+        Returns:
+            Optional[dict]: None if the llm does not support it.
+        """
+        return None
+
+    def _estimate_tokens(self, messages: MessageSet) -> int:
+        """Estimate tokens of the request for tokens per minute limit."""
+        return estimate_tokens(messages)
+
+    def _reconcile_rate_limit(self, estimated_tokens: int, result: Any) -> None:
+        if not isinstance(result, AssistantMessage):
+            return
+        actual_tokens: Optional[int] = get_usage_tokens(result)
+        if actual_tokens is not None:
+            self.rate_limiter.reconcile(estimated_tokens, actual_tokens)
+
+    def _get_retry_policy(self) -> Optional[RetryPolicy]:
+        if self.retry_policy is not None:
+            return self.retry_policy
+        return pne_config.retry_policy
+
+    def _get_llm_cache(self, **kwargs) -> Optional[BaseLLMCache]:
+        """Get the cache of this llm. Stream response can not be cached."""
+        if kwargs.get("stream", False):
+            return None
+        return self.cache if self.cache is not None else pne_config.llm_cache
+
+    def _get_cache_params(self) -> Dict[str, Any]:
+        """Get the parameters which affect the response, it is used to generate the
+        cache key. Subclass can override it to specify model name and sampling config.
+        """
+        return {
+            name: getattr(self, name)
+            for name in self.__fields__
+            if name not in _NON_CACHE_FIELDS
+        }
+
+    def _get_llm_string(self, *args, **kwargs) -> str:
+        """Serialize the llm parameters and the predict parameters to a string."""
+        return json.dumps(
+            {
+                "llm": self.__class__.__name__,
+                "params": self._get_cache_params(),
+                "args": args,
+                "kwargs": kwargs,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+
+    def batch(
+        self,
+        messages_list: List[MessageSet],
+        *args,
+        max_concurrency: int = 8,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> List[Union[AssistantMessage, Exception]]:
+        """Run predict for many MessageSets in a thread pool with bounded concurrency.
+
+        Args:
+            messages_list(List[MessageSet]): MessageSets to predict.
+            max_concurrency(int): the maximum number of in-flight requests.
+            return_exceptions(bool): If True, the exception of a failed item is put
+                in its position of the result list. Otherwise, the first exception
+                will be raised and the pending items will be cancelled.
+            *args: args passed to predict.
+            **kwargs: kwargs passed to predict.
+
+        Returns:
+            List of AssistantMessage or Exception, in the same order as messages_list.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0.")
+        if not messages_list:
+            return []
+
+        results: List[Union[AssistantMessage, Exception]] = []
+        max_workers = min(max_concurrency, len(messages_list))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures: List[Future] = [
+                executor.submit(self.predict, messages, *args, **kwargs)
+                for messages in messages_list
+            ]
+            for idx, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    logger.error(f"[pne llm batch] item {idx} failed: {e}")
+                    results.append(e)
+
+        return results
+
+    async def abatch(
+        self,
+        messages_list: List[MessageSet],
+        *args,
+        max_concurrency: int = 8,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> List[Union[AssistantMessage, Exception]]:
+        """Async version of `batch`, it runs apredict on the event loop with bounded
+        concurrency. The parameters are the same as `batch`."""
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0.")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _run(messages: MessageSet) -> AssistantMessage:
+            async with semaphore:
+                return await self.apredict(messages, *args, **kwargs)
+
+        tasks: List[asyncio.Task] = [
+            asyncio.ensure_future(_run(messages)) for messages in messages_list
+        ]
+        if return_exceptions:
+            return list(await asyncio.gather(*tasks, return_exceptions=True))
+
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # cancel the pending items like batch, so they do not spend tokens
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     @abstractmethod
     def _predict(
         self, messages: MessageSet, *args, **kwargs
@@ -65,6 +350,17 @@ class BaseLLM(BaseModel, ABC):
         """Run the llm, implemented through subclass."""
         raise NotImplementedError()
 
+    async def _apredict(
+        self, messages: MessageSet, *args, **kwargs
+    ) -> Optional[type(BaseMessage)]:
+        """Run the llm asynchronously. Subclass can override it to provide a native
+        async implementation, otherwise `_predict` will be run in the default thread
+        pool executor so that the event loop is not blocked."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self._predict, messages, *args, **kwargs)
+        )
+
     def __call__(self, instruction: str, *args, **kwargs) -> str:
         """Invoke the llm to generate a string response, which is a simplified version
         of predict.
@@ -82,3 +378,20 @@ class BaseLLM(BaseModel, ABC):
             ]
         )
         return self.predict(messages, **kwargs).content
+
+    async def acall(self, instruction: str, *args, **kwargs) -> str:
+        """Async version of `__call__`.
+
+        Args:
+            instruction(str): The instruction to be processed.
+
+        Returns:
+            str: The response generated by the llm.
+        """
+        messages = MessageSet.from_listdict_data(
+            [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": instruction},
+            ]
+        )
+        return (await self.apredict(messages, **kwargs)).content
@@ -0,0 +1,574 @@
+"""LLM response cache.
+
+BaseLLM will look up the cache before calling the provider if a cache is provided,
+eg:
+
+```python
+import promptulate as pne
+from promptulate.llms.cache import LLMCache
+
+llm = pne.LLMFactory.build("gpt-4o", model_config={"temperature": 0}, cache=LLMCache())
+```
+
+LLMCache is a two-tier cache, it looks up a bounded in-memory LRU cache first, then a
+persistent SQLite cache. You can also enable the cache for all llms by
+`pne_config.llm_cache = LLMCache()`.
+
+SemanticCache returns the stored response if the embedding of a new prompt is similar
+enough to a cached prompt. It requires numpy.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from promptulate.schema import AssistantMessage, MessageSet
+from promptulate.utils.core_utils import get_default_storage_path
+from promptulate.utils.logger import logger
+
+__all__ = [
+    "CacheStats",
+    "BaseLLMCache",
+    "InMemoryCache",
+    "SQLiteCache",
+    "LLMCache",
+    "SemanticCache",
+    "get_cache_key",
+]
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def get_cache_key(messages: MessageSet, llm_string: str) -> str:
+    """Generate the cache key by normalized messages and llm parameters.
+
+    Args:
+        messages(MessageSet): prompt messages.
+        llm_string(str): serialized llm parameters, eg: model name and sampling
+            config.
+
+    Returns:
+        sha256 hex digest of the messages and llm parameters.
+    """
+    raw = _dumps({"messages": messages.listdict_messages, "llm": llm_string})
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _serialize_message(message: AssistantMessage) -> str:
+    return _dumps(
+        {"content": message.content, "additional_kwargs": message.additional_kwargs}
+    )
+
+
+def _deserialize_message(value: str) -> AssistantMessage:
+    data: Dict[str, Any] = json.loads(value)
+    return AssistantMessage(
+        content=data["content"], additional_kwargs=data.get("additional_kwargs", {})
+    )
+
+
+class CacheStats:
+    """Thread-safe cache hit/miss statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def __repr__(self) -> str:
+        return f"<CacheStats hits={self.hits} misses={self.misses}>"
+
+
+class BaseLLMCache(ABC):
+    """Base class of llm cache. Subclass needs to implement `lookup` and `update`."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def lookup(
+        self, messages: MessageSet, llm_string: str
+    ) -> Optional[AssistantMessage]:
+        """Return the cached response, or None if it is not cached."""
+
+    @abstractmethod
+    def update(
+        self, messages: MessageSet, llm_string: str, message: AssistantMessage
+    ) -> None:
+        """Save the response of messages into the cache."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all cached responses."""
+
+
+class _KeyValueCache(BaseLLMCache, ABC):
+    """Exact-match cache which stores serialized responses by cache key."""
+
+    def lookup(
+        self, messages: MessageSet, llm_string: str
+    ) -> Optional[AssistantMessage]:
+        value: Optional[str] = self.get(get_cache_key(messages, llm_string))
+        if value is None:
+            self.stats.record_miss()
+            return None
+
+        self.stats.record_hit()
+        return _deserialize_message(value)
+
+    def update(
+        self, messages: MessageSet, llm_string: str, message: AssistantMessage
+    ) -> None:
+        self.set(get_cache_key(messages, llm_string), _serialize_message(message))
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get serialized response by key."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Set serialized response by key."""
+
+
+class InMemoryCache(_KeyValueCache):
+    """Bounded in-process LRU cache."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size(int): the maximum number of cached responses.
+            ttl(Optional[float]): seconds before a response expires, None means
+                never expires.
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            created_at, value = item
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(_KeyValueCache):
+    """Persistent cache stored in a SQLite database. The least recently used
+    responses will be evicted when the number of entries exceeds max_entries."""
+
+    def __init__(
+        self,
+        database_path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_entries: int = 100_000,
+    ):
+        """
+        Args:
+            database_path(Optional[str]): SQLite file path, default is
+                ~/.zeeland/pne/llm_cache/cache.db
+            ttl(Optional[float]): seconds before a response expires, None means
+                never expires.
+            max_entries(int): the maximum number of cached responses.
+        """
+        super().__init__()
+        self.database_path = database_path or os.path.join(
+            get_default_storage_path("llm_cache"), "cache.db"
+        )
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at "
+                "ON llm_cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMCache(_KeyValueCache):
+    """Two-tier cache. It looks up the in-memory LRU cache first, then the SQLite
+    cache. The response hit in SQLite will be promoted to the memory cache."""
+
+    def __init__(
+        self,
+        max_memory_size: int = 1024,
+        database_path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_disk_entries: int = 100_000,
+        enable_disk: bool = True,
+    ):
+        """
+        Args:
+            max_memory_size(int): the maximum number of responses in memory.
+            database_path(Optional[str]): SQLite file path.
+            ttl(Optional[float]): seconds before a response expires, None means
+                never expires.
+            max_disk_entries(int): the maximum number of responses in SQLite.
+            enable_disk(bool): use in-memory cache only if False.
+        """
+        super().__init__()
+        self.memory = InMemoryCache(max_size=max_memory_size, ttl=ttl)
+        self.disk: Optional[SQLiteCache] = (
+            SQLiteCache(database_path, ttl=ttl, max_entries=max_disk_entries)
+            if enable_disk
+            else None
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory.stats.record_hit()
+            return value
+        self.memory.stats.record_miss()
+
+        if self.disk is None:
+            return None
+
+        value = self.disk.get(key)
+        if value is None:
+            self.disk.stats.record_miss()
+            return None
+
+        self.disk.stats.record_hit()
+        self.memory.set(key, value)
+        logger.debug(f"[pne cache] promote {key} from disk to memory")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+EmbeddingFunction = Callable[[List[str]], List[List[float]]]
+
+
+def _import_numpy():
+    try:
+        import numpy as np  # noqa
+    except ImportError:
+        raise ImportError(
+            "Could not import numpy python package. "
+            "This is needed in order to for SemanticCache. "
+            "Please install it with `pip install numpy`."
+        )
+    return np
+
+
+def _litellm_embedding(model: str) -> EmbeddingFunction:
+    def embed(texts: List[str]) -> List[List[float]]:
+        import litellm
+
+        response = litellm.embedding(model=model, input=texts)
+        return [item["embedding"] for item in response.data]
+
+    return embed
+
+
+_EMBEDDING_BUFFER_SIZE = 64
+
+
+class _SemanticIndex:
+    """Normalized embedding matrix and responses of one cache namespace."""
+
+    def __init__(self, np, dim: int, capacity: int):
+        self.np = np
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.values: List[str] = []
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.accessed_at = np.zeros(capacity, dtype=np.float64)
+        self.hit_counts = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def search(self, vector) -> Tuple[int, float]:
+        """Return the index and cosine similarity of the most similar vector."""
+        scores = self.vectors[: len(self)] @ vector
+        idx = int(scores.argmax())
+        return idx, float(scores[idx])
+
+    def add(self, vector, value: str, victim: Optional[int] = None) -> None:
+        if victim is None:
+            victim = len(self)
+            if victim == self.vectors.shape[0]:
+                self._grow()
+            self.values.append(value)
+        else:
+            self.values[victim] = value
+
+        now = time.time()
+        self.vectors[victim] = vector
+        self.created_at[victim] = now
+        self.accessed_at[victim] = now
+        self.hit_counts[victim] = 0
+
+    def _grow(self) -> None:
+        np = self.np
+        capacity = self.vectors.shape[0] * 2
+        self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+        self.created_at = np.resize(self.created_at, capacity)
+        self.accessed_at = np.resize(self.accessed_at, capacity)
+        self.hit_counts = np.resize(self.hit_counts, capacity)
+
+
+class SemanticCache(BaseLLMCache):
+    """Cache responses by the embedding similarity of prompts.
+
+    The last message is embedded and searched in a normalized embedding matrix, the
+    previous messages and llm parameters are matched exactly. So the paraphrases of a
+    question in the same conversation context can share the response.
+    """
+
+    def __init__(
+        self,
+        embedding: Union[str, EmbeddingFunction],
+        threshold: float = 0.95,
+        model_thresholds: Optional[Dict[str, float]] = None,
+        max_entries: int = 10_000,
+        eviction_policy: str = "lru",
+        max_namespaces: int = 1024,
+    ):
+        """
+        Args:
+            embedding(Union[str, EmbeddingFunction]): litellm embedding model name, eg:
+                "text-embedding-3-small", or a function which converts a list of
+                texts to a list of embeddings.
+            threshold(float): the minimum cosine similarity to hit the cache.
+            model_thresholds(Optional[Dict[str, float]]): threshold of specified
+                models, eg: {"gpt-4o": 0.97}
+            max_entries(int): the maximum number of responses of a namespace.
+            eviction_policy(str): which response will be evicted when the cache is
+                full, "lru", "lfu" or "fifo".
+            max_namespaces(int): the maximum number of namespaces. Every
+                conversation context has its own namespace, the least recently used
+                namespace is evicted when the limit is exceeded.
+        """
+        super().__init__()
+        if eviction_policy not in ("lru", "lfu", "fifo"):
+            raise ValueError("eviction_policy must be one of 'lru', 'lfu', 'fifo'.")
+
+        self.np = _import_numpy()
+        self.embed: EmbeddingFunction = (
+            _litellm_embedding(embedding) if isinstance(embedding, str) else embedding
+        )
+        self.threshold = threshold
+        self.model_thresholds: Dict[str, float] = model_thresholds or {}
+        self.max_entries = max_entries
+        self.eviction_policy = eviction_policy
+        self.max_namespaces = max_namespaces
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, _SemanticIndex]" = OrderedDict()
+        # embeddings of the recent missed queries, reused by update
+        self._embeddings: "OrderedDict[str, Any]" = OrderedDict()
+
+    def _get_threshold(self, llm_string: str) -> float:
+        try:
+            model = json.loads(llm_string).get("params", {}).get("model")
+        except (ValueError, AttributeError):
+            model = None
+        return self.model_thresholds.get(model, self.threshold)
+
+    @staticmethod
+    def _get_namespace(messages: MessageSet, llm_string: str) -> str:
+        context = messages.listdict_messages[:-1]
+        raw = _dumps({"context": context, "llm": llm_string})
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _embed(self, messages: MessageSet):
+        content = messages.messages[-1].content
+        with self._lock:
+            vector = self._embeddings.pop(content, None)
+        if vector is not None:
+            return vector
+
+        vector = self.np.asarray(self.embed([content])[0], dtype=self.np.float32)
+        norm = self.np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remember_embedding(self, messages: MessageSet, vector) -> None:
+        """Keep the embedding of a missed query, so update does not embed it
+        again. The caller should hold the lock."""
+        self._embeddings[messages.messages[-1].content] = vector
+        while len(self._embeddings) > _EMBEDDING_BUFFER_SIZE:
+            self._embeddings.popitem(last=False)
+
+    def _get_victim(self, index: _SemanticIndex) -> int:
+        size = len(index)
+        if self.eviction_policy == "lfu":
+            return int(index.hit_counts[:size].argmin())
+        if self.eviction_policy == "fifo":
+            return int(index.created_at[:size].argmin())
+        return int(index.accessed_at[:size].argmin())
+
+    def lookup(
+        self, messages: MessageSet, llm_string: str
+    ) -> Optional[AssistantMessage]:
+        if not messages.messages:
+            return None
+
+        namespace = self._get_namespace(messages, llm_string)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None or len(index) == 0:
+                self.stats.record_miss()
+                return None
+            self._indexes.move_to_end(namespace)
+
+        vector = self._embed(messages)
+        with self._lock:
+            idx, score = index.search(vector)
+            if score < self._get_threshold(llm_string):
+                self._remember_embedding(messages, vector)
+                self.stats.record_miss()
+                return None
+
+            index.accessed_at[idx] = time.time()
+            index.hit_counts[idx] += 1
+            value = index.values[idx]
+
+        self.stats.record_hit()
+        logger.debug(f"[pne semantic cache] hit, similarity: {score}")
+        return _deserialize_message(value)
+
+    def update(
+        self, messages: MessageSet, llm_string: str, message: AssistantMessage
+    ) -> None:
+        if not messages.messages:
+            return
+
+        namespace = self._get_namespace(messages, llm_string)
+        vector = self._embed(messages)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = _SemanticIndex(self.np, vector.shape[0], capacity=16)
+                self._indexes[namespace] = index
+                while len(self._indexes) > self.max_namespaces:
+                    self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(namespace)
+
+            victim = self._get_victim(index) if len(index) >= self.max_entries else None
+            index.add(vector, _serialize_message(message), victim)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._embeddings.clear()
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
@@ -4,13 +4,12 @@ import warnings
 from abc import ABC
 from typing import Any, Dict, List, Optional
 
-import requests
-
 from promptulate.config import pne_config
 from promptulate.error import LLMError
 from promptulate.llms import BaseLLM
 from promptulate.preset_roles.prompt import PRESET_SYSTEM_PROMPT_ERNIE
 from promptulate.schema import AssistantMessage, LLMType, MessageSet, UserMessage
+from promptulate.utils.http import get_session
 from promptulate.utils.logger import logger
 
 
@@ -96,11 +95,12 @@ class ErnieBot(BaseLLM, ABC):
                 raise ValueError("pne not found this model")
 
         body: Dict[str, Any] = self._build_api_params_dict(prompts, stop)
-        response = requests.post(
+        response = get_session(url).post(
             url=url + "?access_token=" + os.environ["ERNIE_API_KEY"],
             headers=headers,
             json=body,
             proxies=pne_config.proxies,
+            timeout=pne_config.http_timeout,
         )
         if response.status_code == 200:
             # todo enable stream mode
@@ -125,6 +125,10 @@ class ErnieBot(BaseLLM, ABC):
             logger.debug(f"[pne ernie answer] {content}")
             return AssistantMessage(content=content, additional_kwargs=ret_data)
 
+        raise LLMError(
+            response.text, status_code=response.status_code, headers=response.headers
+        )
+
     def _build_api_params_dict(
         self,
         prompts: MessageSet,
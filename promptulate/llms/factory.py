@@ -1,7 +1,58 @@
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import litellm
 
 from promptulate.llms._litellm import LiteLLM
 from promptulate.llms.base import BaseLLM
+from promptulate.llms.rate_limit import RateLimiter, get_rate_limiter
+
+if TYPE_CHECKING:
+    from promptulate.llms.hedge import HedgedLLM
+
+
+_NATIVE_PROVIDERS = ("zhipu", "qianfan")
+
+
+def _resolve_provider(model_name: str) -> Tuple[str, str]:
+    """Get the provider and model id of a model name in the same way as LLMFactory,
+    so "gpt-4o" and "openai/gpt-4o" share the same provider.
+
+    Returns:
+        (provider, model_id), eg: ("openai", "gpt-4o")
+    """
+    provider, _, model_id = model_name.rpartition("/")
+    if provider in _NATIVE_PROVIDERS:
+        return provider, model_id
+
+    try:
+        model_id, provider, *_ = litellm.get_llm_provider(model_name)
+    except Exception:
+        return provider or "litellm", model_id
+    return provider, model_id
+
+
+def _build_rate_limiter(
+    model_name: str, model_config: Dict[str, Any], rate_limit: Union[dict, RateLimiter]
+) -> RateLimiter:
+    """Get the rate limiter shared by the same provider, model and api key.
+
+    Args:
+        model_name(str): model name of LLMFactory, eg: gpt-4o, zhipu/glm-4
+        model_config(Dict[str, Any]): model config without rate_limit.
+        rate_limit(Union[dict, RateLimiter]): {"rpm": int, "tpm": int} or a
+            RateLimiter instance.
+    """
+    if isinstance(rate_limit, RateLimiter):
+        return rate_limit
+
+    provider, model_id = _resolve_provider(model_name)
+    return get_rate_limiter(
+        provider=provider,
+        model=model_id,
+        api_key=model_config.get("api_key"),
+        rpm=rate_limit.get("rpm"),
+        tpm=rate_limit.get("tpm"),
+    )
 
 
 class LLMFactory:
@@ -9,7 +60,13 @@ class LLMFactory:
     def build(
         cls, model_name: str, *, model_config: Optional[Dict[str, Any]] = None, **kwargs
     ) -> BaseLLM:
-        model_config = model_config or {}
+        model_config = dict(model_config or {})
+
+        rate_limit = model_config.pop("rate_limit", None)
+        if rate_limit is not None and "rate_limiter" not in kwargs:
+            kwargs["rate_limiter"] = _build_rate_limiter(
+                model_name, model_config, rate_limit
+            )
 
         try:
             provider, model_id = model_name.split("/")
@@ -26,3 +83,34 @@ class LLMFactory:
             pass
 
         return LiteLLM(model=model_name, model_config=model_config, **kwargs)
+
+    @classmethod
+    def build_hedged(
+        cls,
+        model_names: List[str],
+        *,
+        model_config: Optional[Dict[str, Any]] = None,
+        hedge_delay: Optional[float] = None,
+        **kwargs,
+    ) -> "HedgedLLM":
+        """Build an llm which sends a hedge request to the next model if the previous
+        one has not answered within its p95 latency, the first response wins.
+
+        Args:
+            model_names(List[str]): model names in order of preference, eg:
+                ["gpt-4o", "zhipu/glm-4"]
+            model_config(Optional[Dict[str, Any]]): model config of every model.
+            hedge_delay(Optional[float]): fixed seconds to wait before sending the
+                hedge request, None means p95 latency of the previous model.
+            **kwargs: other parameters of HedgedLLM.
+
+        Returns:
+            HedgedLLM
+        """
+        from promptulate.llms.hedge import HedgedLLM
+
+        llms: List[BaseLLM] = [
+            cls.build(model_name, model_config=model_config)
+            for model_name in model_names
+        ]
+        return HedgedLLM(llms, hedge_delay=hedge_delay, **kwargs)
@@ -0,0 +1,217 @@
+"""Hedged requests across multiple llms.
+
+HedgedLLM sends the request to the first llm, if it does not answer within its p95
+latency, a hedge request is sent to the next llm. The first response wins and the
+others are cancelled. It cuts the tail latency of a single provider, eg:
+
+```python
+import promptulate as pne
+
+llm = pne.LLMFactory.build_hedged(["gpt-4o", "zhipu/glm-4"])
+ai = pne.AIChat(custom_llm=llm)
+```
+"""
+
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Union
+
+from promptulate.llms.base import BaseLLM
+from promptulate.llms.metrics import LatencyWindow
+from promptulate.schema import AssistantMessage, MessageSet, StreamIterator
+from promptulate.utils.logger import logger
+
+__all__ = ["HedgedLLM", "LatencyWindow"]
+
+
+def _close_stream(future: Future) -> None:
+    """Close the stream of a request which lost the race."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if isinstance(result, StreamIterator):
+        close = getattr(result.response_stream, "close", None)
+        if callable(close):
+            close()
+
+
+class HedgedLLM(BaseLLM):
+    """Send hedge requests to the backup llms if the previous one is slow. Every llm
+    runs with its own retry policy and rate limiter."""
+
+    llm_type: str = "hedged"
+
+    def __init__(
+        self,
+        llms: List[Union[str, BaseLLM]],
+        hedge_delay: Optional[float] = None,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        initial_hedge_delay: float = 2.0,
+        window_size: int = 200,
+        max_workers: int = 32,
+        model_config: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            llms(List[Union[str, BaseLLM]]): llms in order of preference, it can be
+                model name of LLMFactory or llm instance.
+            hedge_delay(Optional[float]): fixed seconds to wait before sending the
+                next hedge request. If it is None, the quantile of the latency of the
+                previous llm is used.
+            quantile(float): the latency quantile to send hedge request.
+            min_samples(int): use initial_hedge_delay until the llm has enough
+                latency samples.
+            initial_hedge_delay(float): seconds to wait before there are enough
+                latency samples.
+            window_size(int): the number of latest latencies to calculate quantile.
+            max_workers(int): the size of the thread pool of this llm, it should
+                cover the expected concurrent requests times the number of llms.
+            model_config(Optional[Dict[str, Any]]): model config of llms which are
+                built by model name.
+        """
+        super().__init__(**kwargs)
+        if len(llms) < 2:
+            raise ValueError("HedgedLLM needs at least 2 llms.")
+
+        from promptulate.llms.factory import LLMFactory
+
+        self._llms: List[BaseLLM] = [
+            LLMFactory.build(llm, model_config=model_config)
+            if isinstance(llm, str)
+            else llm
+            for llm in llms
+        ]
+        self._hedge_delay = hedge_delay
+        self._quantile = quantile
+        self._min_samples = min_samples
+        self._initial_hedge_delay = initial_hedge_delay
+        self._latencies: List[LatencyWindow] = [
+            LatencyWindow(window_size) for _ in self._llms
+        ]
+        # every instance has its own pool, so a busy or nested HedgedLLM does not
+        # starve the others
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pne-hedge"
+        )
+
+    @property
+    def llms(self) -> List[BaseLLM]:
+        return self._llms
+
+    def _get_cache_params(self) -> Dict[str, Any]:
+        return {"llms": [llm._get_llm_string() for llm in self._llms]}
+
+    def get_hedge_delay(self, index: int) -> float:
+        """Get seconds to wait for the llm of index before sending the next hedge
+        request."""
+        if self._hedge_delay is not None:
+            return self._hedge_delay
+
+        latencies: LatencyWindow = self._latencies[index]
+        if len(latencies) < self._min_samples:
+            return self._initial_hedge_delay
+        return latencies.quantile(self._quantile)
+
+    def _timed_predict(
+        self, index: int, started: Future, messages: MessageSet, *args, **kwargs
+    ):
+        start = time.monotonic()
+        started.set_result(start)
+        result = self._llms[index]._call_predict(messages, *args, **kwargs)
+        self._latencies[index].add(time.monotonic() - start)
+        return result
+
+    async def _timed_apredict(self, index: int, messages: MessageSet, *args, **kwargs):
+        start = time.monotonic()
+        result = await self._llms[index]._call_apredict(messages, *args, **kwargs)
+        self._latencies[index].add(time.monotonic() - start)
+        return result
+
+    def _predict(
+        self, messages: MessageSet, *args, **kwargs
+    ) -> Union[AssistantMessage, StreamIterator]:
+        pending: Set[Future] = set()
+        error: Optional[BaseException] = None
+
+        for index in range(len(self._llms)):
+            started: Future = Future()
+            pending.add(
+                self._executor.submit(
+                    self._timed_predict, index, started, messages, *args, **kwargs
+                )
+            )
+            is_last: bool = index == len(self._llms) - 1
+            delay = None if is_last else self.get_hedge_delay(index)
+
+            # wait for the hedge delay, all the requests fail or one of them succeeds
+            while pending:
+                waiters: Set[Future] = set(pending)
+                timeout: Optional[float] = None
+                if delay is not None:
+                    if started.done():
+                        # the delay starts when the request leaves the queue
+                        timeout = max(started.result() + delay - time.monotonic(), 0)
+                    else:
+                        waiters.add(started)
+
+                done, _ = wait(waiters, timeout=timeout, return_when=FIRST_COMPLETED)
+                done.discard(started)
+                pending -= done
+                for future in done:
+                    if future.exception() is None:
+                        for loser in pending:
+                            loser.cancel()
+                            loser.add_done_callback(_close_stream)
+                        return future.result()
+
+                    error = future.exception()
+                    logger.warning(f"[pne hedge] request failed, reason: {error}")
+
+                if not is_last and (done or timeout is not None):
+                    break
+
+            if not is_last:
+                logger.debug(f"[pne hedge] send hedge request to llm {index + 1}")
+
+        raise error
+
+    async def _apredict(
+        self, messages: MessageSet, *args, **kwargs
+    ) -> AssistantMessage:
+        pending: Set[asyncio.Task] = set()
+        error: Optional[BaseException] = None
+
+        try:
+            for index in range(len(self._llms)):
+                pending.add(
+                    asyncio.ensure_future(
+                        self._timed_apredict(index, messages, *args, **kwargs)
+                    )
+                )
+                is_last: bool = index == len(self._llms) - 1
+                timeout = None if is_last else self.get_hedge_delay(index)
+
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+
+                        error = task.exception()
+                        logger.warning(f"[pne hedge] request failed, reason: {error}")
+
+                    if not done or not is_last:
+                        break
+
+                if not is_last:
+                    logger.debug(f"[pne hedge] send hedge request to llm {index + 1}")
+        finally:
+            for loser in pending:
+                loser.cancel()
+
+        raise error
@@ -0,0 +1,303 @@
+"""Latency metrics of llms.
+
+Every stream returned by `BaseLLM.predict` is observed by a StreamObserver. It calls
+the streaming hooks (ON_LLM_FIRST_TOKEN, ON_LLM_TOKEN and ON_LLM_STREAM_END) with
+timing data and records the stream in `stream_metrics`, which reports time to first
+token (TTFT), inter-token latency and tokens per second of every model, eg:
+
+```python
+import promptulate as pne
+from promptulate.llms.metrics import get_stream_metrics
+
+for chunk in pne.chat("hello", model="gpt-4o", stream=True):
+    print(chunk)
+
+print(get_stream_metrics("gpt-4o"))
+```
+"""
+
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from promptulate.hook import Hook, HookTable
+from promptulate.utils.logger import logger
+
+if TYPE_CHECKING:
+    from promptulate.llms.base import BaseLLM  # noqa
+
+__all__ = [
+    "LatencyWindow",
+    "StreamStats",
+    "StreamMetrics",
+    "StreamObserver",
+    "stream_metrics",
+    "get_stream_metrics",
+    "get_llm_name",
+]
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencyWindow:
+    """Store the latest latencies to calculate quantiles."""
+
+    def __init__(self, window_size: int = 200):
+        self._latencies = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def extend(self, latencies: List[float]) -> None:
+        with self._lock:
+            self._latencies.extend(latencies)
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Get the q quantile of latencies, None if there is no latency."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        return _get_quantile(latencies, q)
+
+    def quantiles(self, qs=QUANTILES) -> Dict[str, Optional[float]]:
+        """Get quantiles by a single sort, eg: {"p50": 0.1, "p90": 0.2}"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        return {f"p{round(q * 100)}": _get_quantile(latencies, q) for q in qs}
+
+
+def _get_quantile(latencies: List[float], q: float) -> Optional[float]:
+    if not latencies:
+        return None
+    return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+
+def get_llm_name(llm: "BaseLLM") -> str:
+    """Get the name of llm with its model, eg: LiteLLM(gpt-4o)"""
+    model = getattr(llm, "_model", None) or getattr(llm, "model", None)
+    return f"{type(llm).__name__}({model})" if model else type(llm).__name__
+
+
+class StreamStats:
+    """Timing data of a stream."""
+
+    __slots__ = (
+        "model",
+        "start_time",
+        "first_token_time",
+        "last_token_time",
+        "end_time",
+        "token_count",
+        "inter_token_latencies",
+        "usage",
+        "error",
+    )
+
+    def __init__(self, model: str, start_time: Optional[float] = None):
+        self.model = model
+        self.start_time: float = (
+            time.perf_counter() if start_time is None else start_time
+        )
+        self.first_token_time: Optional[float] = None
+        self.last_token_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.token_count: int = 0
+        self.inter_token_latencies: List[float] = []
+        self.usage: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Seconds from sending the request to receiving the first token."""
+        if self.first_token_time is None:
+            return None
+        return self.first_token_time - self.start_time
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    @property
+    def output_tokens(self) -> int:
+        """Completion tokens of usage if the provider returns it, otherwise the
+        number of chunks with content."""
+        if self.usage and self.usage.get("completion_tokens"):
+            return self.usage["completion_tokens"]
+        return self.token_count
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Output tokens per second after the first token."""
+        if self.first_token_time is None or self.last_token_time is None:
+            return None
+        elapsed = self.last_token_time - self.first_token_time
+        if elapsed <= 0 or self.output_tokens <= 1:
+            return None
+        return (self.output_tokens - 1) / elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "ttft": self.ttft,
+            "duration": self.duration,
+            "token_count": self.token_count,
+            "output_tokens": self.output_tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+
+class _ModelStreamMetrics:
+    def __init__(self, window_size: int):
+        self.count = 0
+        self.errors = 0
+        self.ttft = LatencyWindow(window_size)
+        self.inter_token_latency = LatencyWindow(window_size * 100)
+        self.tokens_per_second = LatencyWindow(window_size)
+
+
+class StreamMetrics:
+    """Aggregate streaming latency of every model in a rolling window."""
+
+    def __init__(self, window_size: int = 1000):
+        """
+        Args:
+            window_size(int): the latest streams to aggregate, inter-token latencies
+                of the latest window_size * 100 tokens are kept.
+        """
+        self.window_size = window_size
+        self._models: Dict[str, _ModelStreamMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stats: StreamStats) -> None:
+        with self._lock:
+            metrics = self._models.get(stats.model)
+            if metrics is None:
+                metrics = self._models[stats.model] = _ModelStreamMetrics(
+                    self.window_size
+                )
+            metrics.count += 1
+            if stats.error is not None:
+                metrics.errors += 1
+
+        if stats.ttft is not None:
+            metrics.ttft.add(stats.ttft)
+        if stats.inter_token_latencies:
+            metrics.inter_token_latency.extend(stats.inter_token_latencies)
+        if stats.tokens_per_second is not None:
+            metrics.tokens_per_second.add(stats.tokens_per_second)
+
+    def get(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Get metrics of the model, or all models if model is None.
+
+        Args:
+            model(Optional[str]): model name such as gpt-4o, or llm name such as
+                LiteLLM(gpt-4o).
+
+        Returns:
+            Dict[str, Any]: the example is as follows:
+                {
+                    "LiteLLM(gpt-4o)": {
+                        "count": 10,
+                        "errors": 0,
+                        "ttft": {"p50": 0.4, "p90": 0.8, "p99": 1.2},
+                        "inter_token_latency": {"p50": 0.01, ...},
+                        "tokens_per_second": {"p50": 80.0, ...},
+                    }
+                }
+        """
+        with self._lock:
+            models = dict(self._models)
+
+        result: Dict[str, Any] = {}
+        for name, metrics in models.items():
+            if model is not None and model != name and not name.endswith(f"({model})"):
+                continue
+            result[name] = {
+                "count": metrics.count,
+                "errors": metrics.errors,
+                "ttft": metrics.ttft.quantiles(),
+                "inter_token_latency": metrics.inter_token_latency.quantiles(),
+                "tokens_per_second": metrics.tokens_per_second.quantiles(),
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+stream_metrics = StreamMetrics()
+"""Streaming latency metrics of all llms."""
+
+
+def get_stream_metrics(model: Optional[str] = None) -> Dict[str, Any]:
+    """Get streaming latency metrics, see `StreamMetrics.get`."""
+    return stream_metrics.get(model)
+
+
+class StreamObserver:
+    """Observe the tokens of a stream, call the streaming hooks and record the
+    metrics. Hooks are looked up once when the stream starts, so the per-token cost
+    is only a timestamp when there is no token hook."""
+
+    def __init__(
+        self,
+        llm: "BaseLLM",
+        start_time: Optional[float] = None,
+        metrics: Optional[StreamMetrics] = None,
+    ):
+        self.llm = llm
+        self.stats = StreamStats(get_llm_name(llm), start_time)
+        self.metrics = metrics or stream_metrics
+        self._first_token_hooks = Hook.get_hooks(HookTable.ON_LLM_FIRST_TOKEN[1], llm)
+        self._token_hooks = Hook.get_hooks(HookTable.ON_LLM_TOKEN[1], llm)
+        self._stream_end_hooks = Hook.get_hooks(HookTable.ON_LLM_STREAM_END[1], llm)
+        self._ended = False
+
+    def on_token(self, token: str) -> None:
+        now = time.perf_counter()
+        stats = self.stats
+        if stats.last_token_time is None:
+            stats.first_token_time = now
+            latency = now - stats.start_time
+            for hook in self._first_token_hooks:
+                hook.callback(token=token, ttft=latency, stats=stats)
+        else:
+            latency = now - stats.last_token_time
+            stats.inter_token_latencies.append(latency)
+        stats.last_token_time = now
+        stats.token_count += 1
+
+        for hook in self._token_hooks:
+            hook.callback(
+                token=token, index=stats.token_count - 1, latency=latency, stats=stats
+            )
+
+    def on_end(
+        self,
+        result: str,
+        usage: Optional[dict] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Called once when the stream ends or fails."""
+        if self._ended:
+            return
+        self._ended = True
+
+        stats = self.stats
+        stats.end_time = time.perf_counter()
+        stats.usage = usage
+        stats.error = error
+        self.metrics.record(stats)
+        logger.debug(f"[pne stream metrics] {stats.to_dict()}")
+
+        for hook in self._stream_end_hooks:
+            hook.callback(result=result, stats=stats)
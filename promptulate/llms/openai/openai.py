@@ -5,13 +5,12 @@ There are 2 kinds of model in OpenAI, namely text generative and conversational.
 import json
 import warnings
 from abc import ABC
-from typing import Any, Dict, List, Optional
-
-import requests
+from typing import Any, Dict, List, Optional, Tuple
 
 from promptulate.config import pne_config
 from promptulate.error import OpenAIError
 from promptulate.llms.base import BaseLLM
+from promptulate.llms.retry import RetryPolicy
 from promptulate.preset_roles.prompt import PRESET_SYSTEM_PROMPT
 from promptulate.schema import (
     AssistantMessage,
@@ -21,7 +20,9 @@ from promptulate.schema import (
     SystemMessage,
     UserMessage,
 )
+from promptulate.utils.http import get_async_client, get_session
 from promptulate.utils.logger import logger
+from promptulate.utils.tokenizer import Tokenizer, get_tokenizer
 
 
 class BaseOpenAI(BaseLLM, ABC):
@@ -69,12 +70,12 @@ class BaseOpenAI(BaseLLM, ABC):
     """Store private api key"""
     enable_retry: bool = True
     """Retry if API failed to get response. You can enable retry when you have a rate
-    limited API."""
+    limited API. It is ignored if retry_policy or pne_config.retry_policy is
+    provided."""
     retry_times: int = 5
     """If llm(like OpenAI) unable to obtain data, retry request until the data is
-    obtained. You should enable retry if you want to use retry times."""
-    retry_counter: int = 0
-    """Used in conjunction with retry_times. Refresh when get data successfully."""
+    obtained. You should enable retry if you want to use retry times. It is ignored
+    if retry_policy or pne_config.retry_policy is provided."""
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -88,6 +89,21 @@ class BaseOpenAI(BaseLLM, ABC):
             return self.private_api_key
         return pne_config.get_openai_api_key(self.model)
 
+    def _get_cache_params(self) -> Dict[str, Any]:
+        return {key: getattr(self, key, None) for key in self.api_param_keys}
+
+    def get_tokenizer(self) -> Tokenizer:
+        return get_tokenizer(self.model)
+
+    def _get_retry_policy(self) -> Optional[RetryPolicy]:
+        if self.retry_policy is not None:
+            return self.retry_policy
+        if pne_config.retry_policy is not None:
+            return pne_config.retry_policy
+        if self.enable_retry:
+            return RetryPolicy(max_retries=self.retry_times)
+        return None
+
     def set_private_api_key(self, value: str):
         self.enable_private_api_key = True
         self.private_api_key = value
@@ -155,32 +171,29 @@ class OpenAI(BaseOpenAI):
         logger.debug(
             f"[pne openai request] url: {pne_config.openai_completion_request_url} proxies: {pne_config.proxies}"  # noqa: E501
         )
-        response = requests.post(
-            url=pne_config.openai_completion_request_url,
+        url = pne_config.openai_completion_request_url
+        response = get_session(url).post(
+            url=url,
             headers=headers,
             json=body,
             proxies=pne_config.proxies,
+            timeout=pne_config.http_timeout,
         )
         if response.status_code == 200:
             # todo enable stream mode
             # for chunk in response.iter_content(chunk_size=None):
             #     logger.debug(chunk)
-            self.retry_counter = 0
             ret_data = response.json()
             logger.debug(f"[pne openai response] {json.dumps(ret_data, indent=2)}")
             content = ret_data["choices"][0]["text"]
             return AssistantMessage(content=content, additional_kwargs=ret_data)
 
         logger.error(
-            f"[pne OpenAI] <key sk-....{api_key[-6:]}>Failed to get data. Please check your network or api key."  # noqa: E501
+            f"[pne OpenAI] <key sk-....{api_key[-6:]}>Failed to get data, status code: {response.status_code}. Please check your network or api key."  # noqa: E501
+        )
+        raise OpenAIError(
+            response.text, status_code=response.status_code, headers=response.headers
         )
-        logger.debug("[promptulate OpenAI] retry to get response")
-        if self.enable_retry and self.retry_counter < self.retry_times:
-            self.retry_counter += 1
-            return self._predict(messages, stop)
-
-        logger.error(f"[pne OpenAI] Has retry {self.retry_times}, but all failed.")
-        raise OpenAIError(json.dumps(response.content))
 
     def _build_api_params_dict(
         self, prompts: MessageSet, stop: Optional[List[str]] = None
@@ -289,7 +302,50 @@ class ChatOpenAI(BaseOpenAI):
             "ChatOpenAI is deprecated in v1.16.0. Please use pne.LLMFactory instead. \nSee the detail in https://undertone0809.github.io/promptulate/#/modules/llm/llm?id=llm",  # noqa
             DeprecationWarning,
         )
+        url, headers, body = self._build_request(prompts, stop, **kwargs)
+        response = get_session(url).post(
+            url=url,
+            headers=headers,
+            json=body,
+            proxies=pne_config.proxies,
+            timeout=pne_config.http_timeout,
+        )
+        if response.status_code == 200:
+            # todo enable stream mode
+            # for chunk in response.iter_content(chunk_size=None):
+            #     logger.debug(chunk)
+            ret_data = response.json()
+            response.close()
+
+            return self._build_response(ret_data)
 
+        logger.error(
+            f"[pne OpenAI] <key sk-....{self.api_key[-6:]}>Failed to get data, status code: {response.status_code}. Please check your network or api key."  # noqa: E501
+        )
+        raise OpenAIError(
+            response.text, status_code=response.status_code, headers=response.headers
+        )
+
+    async def _apredict(
+        self, prompts: MessageSet, stop: Optional[List[str]] = None, *args, **kwargs
+    ) -> Optional[AssistantMessage]:
+        url, headers, body = self._build_request(prompts, stop, **kwargs)
+        client = get_async_client(url, pne_config.proxies)
+        response = await client.post(url, headers=headers, json=body)
+        if response.status_code == 200:
+            return self._build_response(response.json())
+
+        logger.error(
+            f"[pne OpenAI] Failed to get data asynchronously, status code: {response.status_code}"  # noqa: E501
+        )
+        raise OpenAIError(
+            response.text, status_code=response.status_code, headers=response.headers
+        )
+
+    def _build_request(
+        self, prompts: MessageSet, stop: Optional[List[str]] = None, **kwargs
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Build url, headers and body of the request."""
         for key in self.api_param_keys:
             if key in kwargs:
                 setattr(self, key, kwargs[key])
@@ -305,35 +361,13 @@ class ChatOpenAI(BaseOpenAI):
         logger.debug(f"[pne openai request] {json.dumps(body, indent=2)}")
         url = self.base_url or pne_config.openai_chat_api_url
         logger.debug(f"[pne openai request] url: {url} proxies: {pne_config.proxies}")
-        response = requests.post(
-            url=url,
-            headers=headers,
-            json=body,
-            proxies=pne_config.proxies,
-        )
-        if response.status_code == 200:
-            # todo enable stream mode
-            # for chunk in response.iter_content(chunk_size=None):
-            #     logger.debug(chunk)
-            self.retry_counter = 0
-            ret_data = response.json()
-            logger.debug(f"[pne openai response] {json.dumps(ret_data, indent=2)}")
-            content = ret_data["choices"][0]["message"]["content"]
-
-            response.close()
-
-            return AssistantMessage(content=content, additional_kwargs=ret_data)
-
-        logger.error(
-            f"[pne OpenAI] <key sk-....{api_key[-6:]}>Failed to get data. Please check your network or api key."  # noqa: E501
-        )
-        logger.debug("[promptulate OpenAI] retry to get response")
-        if self.enable_retry and self.retry_counter < self.retry_times:
-            self.retry_counter += 1
-            return self._predict(prompts, stop)
+        return url, headers, body
 
-        logger.error(f"[pne OpenAI] Has retry {self.retry_times}, but all failed.")
-        raise OpenAIError(json.dumps(json.loads(response.content)))
+    @staticmethod
+    def _build_response(ret_data: Dict[str, Any]) -> AssistantMessage:
+        logger.debug(f"[pne openai response] {json.dumps(ret_data, indent=2)}")
+        content = ret_data["choices"][0]["message"]["content"]
+        return AssistantMessage(content=content, additional_kwargs=ret_data)
 
     def _build_api_params_dict(
         self, prompts: MessageSet, stop: Optional[List[str]] = None
@@ -0,0 +1,173 @@
+"""Client-side rate limiter for llm requests.
+
+Providers limit requests per minute (rpm) and tokens per minute (tpm) of an api key.
+RateLimiter is a token bucket shared by all llm instances and threads in the process
+which use the same (provider, model, api key), so they wait for the quota instead of
+bursting together and getting 429. You can enable it by `model_config`, eg:
+
+```python
+import promptulate as pne
+
+llm = pne.LLMFactory.build(
+    "gpt-4o", model_config={"rate_limit": {"rpm": 500, "tpm": 30_000}}
+)
+ai = pne.AIChat(model="gpt-4o", model_config={"rate_limit": {"rpm": 500}})
+```
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from promptulate.schema import AssistantMessage, MessageSet
+from promptulate.utils.logger import logger
+
+__all__ = ["TokenBucket", "RateLimiter", "get_rate_limiter", "estimate_tokens"]
+
+
+class TokenBucket:
+    """A token bucket which refills `capacity` tokens every `period` seconds. It is
+    not thread safe, RateLimiter holds the lock."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than 0.")
+
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def get_wait_time(self, amount: float) -> float:
+        """Get seconds to wait until the bucket has enough tokens."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Consume tokens, the bucket can be negative if it is used more than
+        expected, which delays the following requests."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Limit requests per minute and tokens per minute. Call `acquire` before sending a
+    request, it blocks until both of the quotas are available."""
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        """
+        Args:
+            rpm(Optional[int]): requests per minute, None means no limit.
+            tpm(Optional[int]): tokens per minute, include prompt and completion
+                tokens. None means no limit.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._request_bucket: Optional[TokenBucket] = TokenBucket(rpm) if rpm else None
+        self._token_bucket: Optional[TokenBucket] = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Consume quotas if both of them are available, otherwise return the seconds
+        to wait."""
+        with self._lock:
+            wait_time = 0.0
+            if self._request_bucket:
+                wait_time = self._request_bucket.get_wait_time(1)
+            if self._token_bucket:
+                wait_time = max(wait_time, self._token_bucket.get_wait_time(tokens))
+            if wait_time > 0:
+                return wait_time
+
+            if self._request_bucket:
+                self._request_bucket.consume(1)
+            if self._token_bucket:
+                self._token_bucket.consume(tokens)
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until a request with the estimated tokens can be sent."""
+        while True:
+            wait_time = self._try_acquire(tokens)
+            if wait_time <= 0:
+                return
+            logger.debug(f"[pne rate limit] wait {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async version of `acquire`, it does not block the event loop."""
+        while True:
+            wait_time = self._try_acquire(tokens)
+            if wait_time <= 0:
+                return
+            logger.debug(f"[pne rate limit] wait {wait_time:.2f}s")
+            await asyncio.sleep(wait_time)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket with the actual usage returned by the provider."""
+        if not self._token_bucket:
+            return
+        with self._lock:
+            self._token_bucket.consume(actual_tokens - estimated_tokens)
+
+    def __repr__(self) -> str:
+        return f"<RateLimiter rpm={self.rpm} tpm={self.tpm}>"
+
+
+_rate_limiters: Dict[Tuple[str, str, str], RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    model: str,
+    api_key: Optional[str] = None,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None,
+) -> RateLimiter:
+    """Get the rate limiter shared by the same (provider, model, api key). The limits
+    of the first call are used if the limiter exists.
+
+    Args:
+        provider(str): provider name, eg: openai, zhipu.
+        model(str): model name.
+        api_key(Optional[str]): api key, None means the default key of the
+            environment. It is hashed and will not be stored.
+        rpm(Optional[int]): requests per minute.
+        tpm(Optional[int]): tokens per minute.
+
+    Returns:
+        RateLimiter
+    """
+    api_key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()
+    key = (provider, model, api_key_hash)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(rpm=rpm, tpm=tpm)
+        return _rate_limiters[key]
+
+
+def estimate_tokens(messages: MessageSet, max_tokens: Optional[int] = None) -> int:
+    """Estimate tokens of a request without a tokenizer, about 4 characters per token,
+    plus the max tokens of the completion if it is provided."""
+    prompt_tokens = sum(len(str(message.content)) for message in messages.messages)
+    return prompt_tokens // 4 + 4 * len(messages.messages) + (max_tokens or 0)
+
+
+def get_usage_tokens(message: AssistantMessage) -> Optional[int]:
+    """Get total tokens from the OpenAI style usage of the response."""
+    usage = (message.additional_kwargs or {}).get("usage") or {}
+    total_tokens = usage.get("total_tokens")
+    return int(total_tokens) if total_tokens is not None else None
@@ -0,0 +1,202 @@
+"""Retry policy for llm requests.
+
+BaseLLM runs `_predict` through a RetryPolicy if it is provided, eg:
+
+```python
+import promptulate as pne
+from promptulate.llms.retry import RetryPolicy
+
+llm = pne.LLMFactory.build(
+    "gpt-4o", retry_policy=RetryPolicy(max_retries=3, initial_delay=1)
+)
+```
+
+You can also set the default policy for all llms by
+`pne_config.retry_policy = RetryPolicy()`.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Optional, Tuple, Type
+
+from promptulate.utils.logger import logger
+
+__all__ = ["RetryPolicy", "get_status_code", "get_retry_after"]
+
+DEFAULT_RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+
+def _default_retry_exceptions() -> Tuple[Type[BaseException], ...]:
+    import httpx
+    import requests
+
+    return (
+        ConnectionError,
+        TimeoutError,
+        requests.ConnectionError,
+        requests.Timeout,
+        httpx.TransportError,
+    )
+
+
+def get_status_code(e: BaseException) -> Optional[int]:
+    """Get HTTP status code from the exception of providers, requests, httpx and
+    litellm."""
+    status_code = getattr(e, "status_code", None)
+    if status_code is None:
+        response = getattr(e, "response", None)
+        status_code = getattr(response, "status_code", None)
+
+    try:
+        return int(status_code) if status_code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _get_headers(e: BaseException) -> Mapping[str, str]:
+    headers = getattr(e, "headers", None)
+    if not headers:
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None)
+    return headers or {}
+
+
+def get_retry_after(e: BaseException) -> Optional[float]:
+    """Get the seconds to wait from Retry-After header, which can be delay seconds or
+    a HTTP date."""
+    headers = _get_headers(e)
+    value = headers.get("retry-after-ms") or headers.get("Retry-After-Ms")
+    if value is not None:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except (TypeError, ValueError):
+            pass
+
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retry failed requests with exponential backoff and jitter.
+
+    An exception is retryable if it has a retryable HTTP status code, or it is a
+    connection error. The delay of the nth retry is
+    `min(max_delay, initial_delay * backoff_factor ** n)`, it will be randomized in
+    [0, delay] if jitter is True (full jitter). Retry-After header will be used
+    instead if the server returns it.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        initial_delay: float = 0.5,
+        max_delay: float = 60.0,
+        backoff_factor: float = 2.0,
+        jitter: bool = True,
+        retry_on_status: Iterable[int] = DEFAULT_RETRY_STATUS_CODES,
+        retry_on_exceptions: Optional[Tuple[Type[BaseException], ...]] = None,
+        respect_retry_after: bool = True,
+    ):
+        """
+        Args:
+            max_retries(int): the maximum number of retries, 0 means no retry.
+            initial_delay(float): seconds to wait before the first retry.
+            max_delay(float): the maximum seconds to wait between retries, it also
+                limits Retry-After.
+            backoff_factor(float): multiplier of the delay after each retry.
+            jitter(bool): randomize the delay to avoid all clients retrying at the
+                same time.
+            retry_on_status(Iterable[int]): retryable HTTP status codes.
+            retry_on_exceptions(Optional[Tuple[Type[BaseException], ...]]): retryable
+                exception types even if they have no status code, default is
+                connection errors and timeouts.
+            respect_retry_after(bool): wait for Retry-After if the server returns it.
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must be greater than or equal to 0.")
+
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.retry_on_status = frozenset(retry_on_status)
+        self.retry_on_exceptions = (
+            retry_on_exceptions
+            if retry_on_exceptions is not None
+            else _default_retry_exceptions()
+        )
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(self, e: BaseException) -> bool:
+        status_code = get_status_code(e)
+        if status_code is not None:
+            return status_code in self.retry_on_status
+        return isinstance(e, self.retry_on_exceptions)
+
+    def get_delay(self, retry_number: int, e: Optional[BaseException] = None) -> float:
+        """Get seconds to wait before the nth retry, retry_number starts from 0."""
+        if self.respect_retry_after and e is not None:
+            retry_after = get_retry_after(e)
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+
+        delay = min(
+            self.max_delay, self.initial_delay * self.backoff_factor**retry_number
+        )
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call fn and retry it if it raises a retryable exception."""
+        retry_number = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(retry_number, e)
+                time.sleep(delay)
+                retry_number += 1
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async version of `call`, fn should be a coroutine function."""
+        retry_number = 0
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(retry_number, e)
+                await asyncio.sleep(delay)
+                retry_number += 1
+
+    def _on_error(self, retry_number: int, e: Exception) -> float:
+        """Raise the exception if it can not be retried, otherwise return the delay."""
+        if retry_number >= self.max_retries or not self.is_retryable(e):
+            if retry_number > 0:
+                logger.error(f"[pne retry] Has retry {retry_number}, but all failed.")
+            raise e
+
+        delay = self.get_delay(retry_number, e)
+        logger.warning(
+            f"[pne retry] retry {retry_number + 1}/{self.max_retries} in {delay:.2f}s, "
+            f"reason: {e}"
+        )
+        return delay
+
+    def __repr__(self) -> str:
+        return (
+            f"<RetryPolicy max_retries={self.max_retries} "
+            f"initial_delay={self.initial_delay} max_delay={self.max_delay}>"
+        )
@@ -0,0 +1,189 @@
+"""Route requests to the healthiest llm.
+
+RouterLLM holds several llms, it keeps an exponentially weighted moving average
+(EWMA) of latency and error rate of every llm, sends each request to the healthiest
+one and fails over to the next one on errors. It works as a normal llm, eg:
+
+```python
+import promptulate as pne
+from promptulate.llms import RouterLLM, ZhiPu
+
+llm = RouterLLM(["gpt-4o", "deepseek/deepseek-chat", ZhiPu()])
+ai = pne.AIChat(custom_llm=llm)
+agent = pne.ToolAgent(tools=[...], llm=llm)
+```
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from promptulate.llms.base import BaseLLM
+from promptulate.llms.metrics import get_llm_name
+from promptulate.schema import AssistantMessage, MessageSet, StreamIterator
+from promptulate.utils.logger import logger
+
+__all__ = ["RouterLLM", "BackendHealth"]
+
+
+class BackendHealth:
+    """EWMA latency and error rate of an llm. The error rate also decays by time, so
+    a failed llm will be tried again after it recovers."""
+
+    def __init__(self, alpha: float = 0.3, recovery_time: float = 30.0):
+        """
+        Args:
+            alpha(float): weight of the latest observation, in (0, 1].
+            recovery_time(float): half-life seconds of the error rate.
+        """
+        self.alpha = alpha
+        self.recovery_time = recovery_time
+        self.latency: Optional[float] = None
+        self._error_rate: float = 0.0
+        self._updated_at: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self) -> float:
+        elapsed = time.monotonic() - self._updated_at
+        return self._error_rate * 0.5 ** (elapsed / self.recovery_time)
+
+    def _update_error_rate(self, error: float) -> None:
+        self._error_rate = self.alpha * error + (1 - self.alpha) * self.error_rate
+        self._updated_at = time.monotonic()
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency = self.alpha * latency + (1 - self.alpha) * self.latency
+            self._update_error_rate(0.0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._update_error_rate(1.0)
+
+    def score(self, error_penalty: float) -> float:
+        """The lower the healthier. An llm without latency is scored 0 so that it
+        will be tried."""
+        return (self.latency or 0.0) * (1 + error_penalty * self.error_rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"latency": self.latency, "error_rate": self.error_rate}
+
+
+class RouterLLM(BaseLLM):
+    """Send each request to the healthiest llm and fail over to the others on errors.
+    Every llm runs with its own retry policy and rate limiter."""
+
+    llm_type: str = "router"
+
+    def __init__(
+        self,
+        llms: List[Union[str, BaseLLM]],
+        alpha: float = 0.3,
+        error_penalty: float = 10.0,
+        max_error_rate: float = 0.25,
+        recovery_time: float = 30.0,
+        model_config: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            llms(List[Union[str, BaseLLM]]): model name of LLMFactory or llm instance,
+                the former is preferred if they have the same health score.
+            alpha(float): EWMA weight of the latest latency and error.
+            error_penalty(float): the score of an llm is `latency * (1 + error_penalty
+                * error_rate)`, the lower the healthier.
+            max_error_rate(float): an llm whose error rate is higher than it is
+                unhealthy, it is only tried after all the healthy llms fail.
+            recovery_time(float): half-life seconds of the error rate, a failed llm
+                will be tried again when its error rate decays.
+            model_config(Optional[Dict[str, Any]]): model config of llms which are
+                built by model name.
+        """
+        super().__init__(**kwargs)
+        if not llms:
+            raise ValueError("RouterLLM needs at least 1 llm.")
+
+        from promptulate.llms.factory import LLMFactory
+
+        self._llms: List[BaseLLM] = [
+            LLMFactory.build(llm, model_config=model_config)
+            if isinstance(llm, str)
+            else llm
+            for llm in llms
+        ]
+        self._error_penalty = error_penalty
+        self._max_error_rate = max_error_rate
+        self._health: List[BackendHealth] = [
+            BackendHealth(alpha, recovery_time) for _ in self._llms
+        ]
+
+    @property
+    def llms(self) -> List[BaseLLM]:
+        return self._llms
+
+    def get_health(self) -> List[Dict[str, Any]]:
+        """Get the health of every llm, eg:
+        [{"llm": "LiteLLM(gpt-4o)", "latency": 1.2, "error_rate": 0.0}]"""
+        return [
+            {"llm": get_llm_name(llm), **health.to_dict()}
+            for llm, health in zip(self._llms, self._health)
+        ]
+
+    def _get_cache_params(self) -> Dict[str, Any]:
+        return {"llms": [llm._get_llm_string() for llm in self._llms]}
+
+    def _get_route(self) -> List[Tuple[int, BaseLLM]]:
+        """Get healthy llms sorted by health score, then the unhealthy ones."""
+        keys = [
+            (
+                health.error_rate > self._max_error_rate,
+                health.score(self._error_penalty),
+            )
+            for health in self._health
+        ]
+        indexes = sorted(range(len(self._llms)), key=lambda i: (*keys[i], i))
+        return [(i, self._llms[i]) for i in indexes]
+
+    def _on_failure(self, index: int, llm: BaseLLM, e: Exception) -> None:
+        self._health[index].record_failure()
+        logger.warning(f"[pne router] {get_llm_name(llm)} failed, reason: {e}")
+
+    def _predict(
+        self, messages: MessageSet, *args, **kwargs
+    ) -> Union[AssistantMessage, StreamIterator]:
+        error: Optional[Exception] = None
+        for index, llm in self._get_route():
+            start = time.monotonic()
+            try:
+                result = llm._call_predict(messages, *args, **kwargs)
+            except Exception as e:
+                self._on_failure(index, llm, e)
+                error = e
+                continue
+
+            self._health[index].record_success(time.monotonic() - start)
+            return result
+
+        raise error
+
+    async def _apredict(
+        self, messages: MessageSet, *args, **kwargs
+    ) -> AssistantMessage:
+        error: Optional[Exception] = None
+        for index, llm in self._get_route():
+            start = time.monotonic()
+            try:
+                result = await llm._call_apredict(messages, *args, **kwargs)
+            except Exception as e:
+                self._on_failure(index, llm, e)
+                error = e
+                continue
+
+            self._health[index].record_success(time.monotonic() - start)
+            return result
+
+        raise error
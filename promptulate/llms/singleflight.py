@@ -0,0 +1,113 @@
+"""Coalesce identical in-flight llm requests.
+
+If several threads or coroutines call `predict` with the same messages and config at
+the same time, only the first one sends the request, the others wait for it and get
+the same result. Stream response is fanned out to every caller by
+`StreamIterator.tee`, which only buffers the chunks that some caller has not read.
+You can enable it for an llm or all llms, eg:
+
+```python
+import promptulate as pne
+from promptulate.config import pne_config
+
+llm = pne.LLMFactory.build("gpt-4o", single_flight=True)
+pne_config.single_flight = True  # enable for all llms
+```
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from promptulate.schema import StreamIterator
+
+__all__ = ["SingleFlight", "single_flight_group"]
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.followers: int = 0
+        # stream iterators of the followers if the result is a stream
+        self.streams: List[StreamIterator] = []
+
+
+class SingleFlight:
+    """Execute only one function call for the same key at the same time. Threads
+    and coroutines are coalesced separately, coroutines are coalesced in the same
+    event loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # event loop -> {key: asyncio.Task}
+        self._tasks = weakref.WeakKeyDictionary()
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """Call fn, or wait for the in-flight call of the same key.
+
+        If the result is a StreamIterator, every caller gets its own iterator of the
+        stream.
+
+        Returns:
+            (result, shared), shared is True if the result comes from the call of
+            another caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            with self._lock:
+                return (call.streams.pop() if call.streams else call.result), True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers: int = call.followers
+            # no one joins after the key is removed, so the followers are known
+            if followers and isinstance(call.result, StreamIterator):
+                call.result, *call.streams = call.result.tee(followers + 1)
+            call.event.set()
+
+        return call.result, False
+
+    async def ado(
+        self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs
+    ) -> Tuple[Any, bool]:
+        """Async version of `do`. The request runs in a task, so cancelling one of the
+        callers does not cancel the others."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks: Dict[str, asyncio.Task] = self._tasks.setdefault(loop, {})
+            task = tasks.get(key)
+            shared = task is not None
+            if not shared:
+                task = tasks[key] = loop.create_task(fn(*args, **kwargs))
+                task.add_done_callback(lambda _: self._remove_task(tasks, key, task))
+
+        return await asyncio.shield(task), shared
+
+    def _remove_task(self, tasks: Dict[str, asyncio.Task], key: str, task) -> None:
+        with self._lock:
+            if tasks.get(key) is task:
+                del tasks[key]
+
+
+single_flight_group = SingleFlight()
+"""Shared by all llms, the key contains llm config so different llms never collide."""
@@ -3,10 +3,9 @@ import os
 import time
 from abc import ABC
 from json import JSONDecodeError
-from typing import Any, Dict, List, Optional, TypeVar, Union
+from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union
 
 import jwt
-import requests
 
 from promptulate.config import pne_config
 from promptulate.error import NetWorkError
@@ -23,6 +22,7 @@ from promptulate.schema import (
     UserMessage,
 )
 from promptulate.utils import logger
+from promptulate.utils.http import get_async_client, get_session
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -133,17 +133,14 @@ class ZhiPu(BaseLLM, ABC):
               Return T if output_schema is provided.
               Return ZhiPuStreamIterator if stream is enable
         """
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": self.generate_token(self.api_key, self.exp_seconds),
-        }
-        body: Dict[str, Any] = self._build_api_params_dict(prompts)
-        logger.debug(f"[pne zhipu request] {json.dumps(body, indent=2)}")
-        response = requests.post(
+        headers, body = self._build_request(prompts)
+        response = get_session(pne_config.zhipu_model_url).post(
             url=pne_config.zhipu_model_url,
             headers=headers,
             stream=stream,
             json=body,
+            proxies=pne_config.proxies,
+            timeout=pne_config.http_timeout,
         )
         # return stream
         if stream:
@@ -159,7 +156,51 @@ class ZhiPu(BaseLLM, ABC):
                 content = ret_data["choices"][0]["message"]["content"]
                 return AssistantMessage(content=content, additional_kwargs=ret_data)
             else:
-                raise NetWorkError(str(response.status_code))
+                raise NetWorkError(
+                    str(response.status_code),
+                    status_code=response.status_code,
+                    headers=response.headers,
+                )
+
+    async def _apredict(
+        self,
+        prompts: MessageSet,
+        stream: bool = False,
+        return_raw_response: bool = False,
+        *args,
+        **kwargs,
+    ) -> AssistantMessage:
+        """Async version of `_predict`, it uses a non-blocking http client."""
+        if stream:
+            raise ValueError("stream is not supported in async mode currently.")
+
+        headers, body = self._build_request(prompts)
+        client = get_async_client(pne_config.zhipu_model_url, pne_config.proxies)
+        response = await client.post(
+            pne_config.zhipu_model_url, headers=headers, json=body
+        )
+
+        if response.status_code == 200:
+            ret_data = response.json()
+            logger.debug(f"[pne zhipu response] {json.dumps(ret_data, indent=2)}")
+            content = ret_data["choices"][0]["message"]["content"]
+            return AssistantMessage(content=content, additional_kwargs=ret_data)
+
+        raise NetWorkError(
+            str(response.status_code),
+            status_code=response.status_code,
+            headers=response.headers,
+        )
+
+    def _build_request(self, prompts: MessageSet) -> Tuple[dict, Dict[str, Any]]:
+        """Build headers and body of the request."""
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": self.generate_token(self.api_key, self.exp_seconds),
+        }
+        body: Dict[str, Any] = self._build_api_params_dict(prompts)
+        logger.debug(f"[pne zhipu request] {json.dumps(body, indent=2)}")
+        return headers, body
 
     def _build_api_params_dict(self, prompts: MessageSet) -> Dict[str, Any]:
         dic = {
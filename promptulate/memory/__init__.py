@@ -18,6 +18,17 @@
 # Contact Email: zeeland@foxmail.com
 
 from promptulate.memory.buffer import BufferChatMemory
+from promptulate.memory.context import (
+    BaseContextPolicy,
+    SummaryWindowPolicy,
+    TokenWindowPolicy,
+)
 from promptulate.memory.file import FileChatMemory
 
-__all__ = ["BufferChatMemory", "FileChatMemory"]
+__all__ = [
+    "BufferChatMemory",
+    "FileChatMemory",
+    "BaseContextPolicy",
+    "TokenWindowPolicy",
+    "SummaryWindowPolicy",
+]
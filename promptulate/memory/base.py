@@ -18,10 +18,11 @@
 # Contact Email: zeeland@foxmail.com
 
 from abc import abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from promptulate.pydantic_v1 import BaseModel
 from promptulate.schema import MessageSet
+from promptulate.utils import serialization
 from promptulate.utils.core_utils import generate_conversation_id
 
 
@@ -48,6 +49,11 @@ class BaseChatMemory(BaseModel):
     summary: str = ""
     conversation_id: Optional[str] = None
     additional_kwargs: Dict[str, Any] = {}
+    binary: bool = False
+    """Store messages as bytes by `MessageSet.to_bytes` instead of list of dict, it
+    is faster to load and save big histories and takes less storage."""
+    compression: Optional[str] = None
+    """Compression of binary messages, it can be zstd, zlib or None."""
 
     class Config:
         arbitrary_types_allowed = True
@@ -57,6 +63,26 @@ class BaseChatMemory(BaseModel):
         if "conversation_id" not in kwargs:
             self.conversation_id = generate_conversation_id()
 
+    def _dump_message_set(self, message_set: MessageSet) -> Union[bytes, List[Dict]]:
+        """Convert MessageSet to the data stored in memory."""
+        if self.binary:
+            return message_set.to_bytes(compression=self.compression)
+        return message_set.listdict_messages
+
+    @staticmethod
+    def _load_message_set(
+        data: Union[bytes, List[Dict]], recently_n: Optional[int] = None
+    ) -> MessageSet:
+        """Load MessageSet from the data stored in memory, both binary messages and
+        list of dict are supported."""
+        if serialization.is_serialized(data):
+            message_set = MessageSet.from_bytes(data)
+            if recently_n:
+                message_set.messages = message_set.messages[-recently_n:]
+            return message_set
+
+        return MessageSet.from_listdict_data(data[-recently_n:] if recently_n else data)
+
     @abstractmethod
     def load_message_set_from_memory(
         self, recently_n: Optional[int] = None
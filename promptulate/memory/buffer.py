@@ -17,13 +17,13 @@
 # Project Link: https://github.com/Undertone0809/promptulate
 # Contact Email: zeeland@foxmail.com
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from promptulate.error import EmptyMessageSetError
 from promptulate.memory.base import BaseChatMemory
 from promptulate.schema import MessageSet
 
-buffer: Dict[str, List[Dict]] = {}
+buffer: Dict[str, Union[bytes, List[Dict]]] = {}
 """global message buffer, here is a buffer example:
 {
     "conversation_id1": [message...],
@@ -46,13 +46,9 @@ class BufferChatMemory(BaseChatMemory):
         Returns:
             messages wrapping by MessageSet
         """
-        if not buffer:
+        if self.conversation_id not in buffer:
             raise EmptyMessageSetError
-        recently_n = recently_n if recently_n else len(buffer[self.conversation_id])
-        num_messages = len(buffer[self.conversation_id])
-        return MessageSet.from_listdict_data(
-            buffer[self.conversation_id][num_messages - recently_n :]
-        )
+        return self._load_message_set(buffer[self.conversation_id], recently_n)
 
     def save_message_set_to_memory(self, message_set: MessageSet) -> None:
-        buffer[self.conversation_id] = message_set.memory_messages
+        buffer[self.conversation_id] = self._dump_message_set(message_set)
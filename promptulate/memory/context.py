@@ -0,0 +1,270 @@
+"""Context policies decide which messages of the memory are sent to the llm.
+
+By default AIChat sends the whole history, so the latency and the cost of every turn
+grow with the conversation. A context policy keeps the request in a token budget:
+
+- TokenWindowPolicy: keep the system prompt and the latest messages which fit into
+    the budget.
+- SummaryWindowPolicy: the same as TokenWindowPolicy, but the old messages are
+    summarized into a rolling summary in a background thread, so summarizing never
+    blocks a turn.
+
+```python
+import promptulate as pne
+from promptulate.memory import SummaryWindowPolicy
+
+ai = pne.AIChat(
+    model="gpt-4o-mini",
+    enable_memory=True,
+    context_policy=SummaryWindowPolicy(max_tokens=4000),
+)
+```
+
+The memory still keeps the full history, only the request is bounded.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, Union
+
+from promptulate.schema import BaseMessage, MessageRecord, MessageSet
+from promptulate.utils.logger import logger
+from promptulate.utils.tokenizer import Tokenizer
+
+if TYPE_CHECKING:
+    from promptulate.llms.base import BaseLLM  # noqa
+
+__all__ = ["BaseContextPolicy", "TokenWindowPolicy", "SummaryWindowPolicy"]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def _count_pinned(messages: List[Union[BaseMessage, MessageRecord]]) -> int:
+    """Count the system messages at the beginning."""
+    n = 0
+    while n < len(messages) and messages[n].type == "system":
+        n += 1
+    return n
+
+
+class BaseContextPolicy(ABC):
+    """Build the messages sent to the llm from the memory of a chat."""
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        """
+        Args:
+            tokenizer(Optional[Tokenizer]): tokenizer to count tokens, use the
+                tokenizer of the memory or the llm if it is not specified.
+        """
+        self.tokenizer: Optional[Tokenizer] = tokenizer
+
+    def _get_tokenizer(self, memory: MessageSet, llm: "BaseLLM") -> Tokenizer:
+        return self.tokenizer or memory.tokenizer or llm.get_tokenizer()
+
+    @abstractmethod
+    def build(self, memory: MessageSet, llm: "BaseLLM") -> MessageSet:
+        """Build the messages of the request. The memory should not be changed.
+
+        Args:
+            memory(MessageSet): the full history of the chat, the last message is
+                the new user message.
+            llm(BaseLLM): the llm which will receive the messages.
+
+        Returns:
+            MessageSet: messages sent to the llm.
+        """
+
+
+class TokenWindowPolicy(BaseContextPolicy):
+    """Keep the latest messages in the token budget. The system messages at the
+    beginning are pinned if pin_system is True."""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        pin_system: bool = True,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        """
+        Args:
+            max_tokens(int): max tokens of the request messages.
+            pin_system(bool): always keep the system messages at the beginning.
+            tokenizer(Optional[Tokenizer]): tokenizer to count tokens.
+        """
+        super().__init__(tokenizer)
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be greater than 0.")
+        self.max_tokens = max_tokens
+        self.pin_system = pin_system
+
+    def build(self, memory: MessageSet, llm: "BaseLLM") -> MessageSet:
+        return memory.fit_to(
+            self.max_tokens,
+            strategy="pin_system" if self.pin_system else "drop_oldest",
+            tokenizer=self._get_tokenizer(memory, llm),
+        )
+
+
+class SummaryWindowPolicy(BaseContextPolicy):
+    """Keep the system prompt, a rolling summary and the latest messages in the
+    token budget.
+
+    When the unsummarized messages exceed trigger_tokens, the oldest of them are
+    merged into the summary in a background thread, and the latest messages of
+    keep_tokens are kept as they are. Turns never wait for the summary, they use the
+    latest finished summary and drop the oldest messages which do not fit, so the
+    request size and the cost of every turn stay constant in a long conversation.
+
+    The summary is stored in the policy, use one policy for one chat.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        trigger_tokens: Optional[int] = None,
+        keep_tokens: Optional[int] = None,
+        summarizer: Optional[Callable[[str], str]] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        """
+        Args:
+            max_tokens(int): max tokens of the request messages.
+            trigger_tokens(Optional[int]): start summarizing when the unsummarized
+                messages exceed it, default is 3/4 of max_tokens.
+            keep_tokens(Optional[int]): tokens of the latest messages which are not
+                summarized, default is 1/2 of max_tokens.
+            summarizer(Optional[Callable[[str], str]]): a function or an llm to
+                generate the summary from a prompt, use the llm of the chat if it is
+                not specified.
+            tokenizer(Optional[Tokenizer]): tokenizer to count tokens.
+        """
+        super().__init__(tokenizer)
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be greater than 0.")
+        self.max_tokens = max_tokens
+        self.trigger_tokens = trigger_tokens or max_tokens * 3 // 4
+        self.keep_tokens = keep_tokens or max_tokens // 2
+        if self.keep_tokens >= self.trigger_tokens:
+            raise ValueError("keep_tokens must be less than trigger_tokens.")
+        self.summarizer = summarizer
+
+        self.summary: str = ""
+        # memory which the summary belongs to and the number of summarized messages
+        self._memory: Optional[MessageSet] = None
+        self._summarized: int = 0
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def build(self, memory: MessageSet, llm: "BaseLLM") -> MessageSet:
+        tokenizer = self._get_tokenizer(memory, llm)
+        messages = memory.messages
+        n_pinned = _count_pinned(messages)
+
+        with self._lock:
+            if self._memory is not memory or self._summarized > len(messages):
+                # a new conversation, or the history has been rewritten
+                self._memory, self._summarized, self.summary = memory, 0, ""
+            self._summarized = start = max(self._summarized, n_pinned)
+            summary = self.summary
+
+        # only the unsummarized messages are counted, which are bounded by
+        # trigger_tokens once the summary catches up
+        tail = MessageSet(messages=messages[start:], tokenizer=tokenizer)
+        counts: List[int] = tail._get_token_counts(tokenizer)
+        if sum(counts) > self.trigger_tokens:
+            self._schedule(memory, llm, tail.messages, counts, start, summary)
+
+        context = MessageSet(
+            messages=[
+                *messages[:n_pinned],
+                *(
+                    [MessageRecord("system", SUMMARY_PREFIX + summary)]
+                    if summary
+                    else []
+                ),
+                *tail.messages,
+            ],
+            additional_kwargs=memory.additional_kwargs,
+            tokenizer=tokenizer,
+        )
+        return context.fit_to(self.max_tokens, strategy="pin_system")
+
+    def _schedule(
+        self,
+        memory: MessageSet,
+        llm: "BaseLLM",
+        messages: List[Union[BaseMessage, MessageRecord]],
+        counts: List[int],
+        start: int,
+        summary: str,
+    ) -> None:
+        """Summarize the messages before the latest keep_tokens in background."""
+        # the last message is always kept
+        end, kept = len(messages) - 1, counts[-1]
+        while end > 0 and kept + counts[end - 1] <= self.keep_tokens:
+            end -= 1
+            kept += counts[end]
+        if end == 0:
+            return
+
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="pne-context"
+                )
+            self._future = self._executor.submit(
+                self._summarize,
+                memory,
+                self.summarizer or llm,
+                messages[:end],
+                start,
+                start + end,
+                summary,
+            )
+
+    def _summarize(
+        self,
+        memory: MessageSet,
+        summarizer: Callable[[str], str],
+        messages: List[Union[BaseMessage, MessageRecord]],
+        start: int,
+        end: int,
+        summary: str,
+    ) -> None:
+        prompt = (
+            "Summarize the following conversation briefly and keep the key "
+            "information.\n"
+        )
+        if summary:
+            prompt += f"Summary of the earlier conversation:\n{summary}\n"
+        prompt += "Conversation:\n" + "\n".join(
+            f"{message.type}: {message.content}" for message in messages
+        )
+
+        try:
+            new_summary: str = summarizer(prompt)
+        except Exception as e:
+            logger.warning(f"[pne context] failed to summarize the conversation: {e}")
+            return
+
+        with self._lock:
+            # the history may be replaced while summarizing
+            if self._memory is memory and self._summarized == start:
+                self.summary, self._summarized = new_summary, end
+        logger.debug(f"[pne context] summarized {end - start} messages.")
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the running summary to finish."""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+    def close(self) -> None:
+        """Shutdown the background thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -55,7 +55,7 @@ class FileChatMemory(BaseChatMemory):
         """
         if self.conversation_id not in self.cache:
             raise EmptyMessageSetError()
-        return MessageSet.from_listdict_data(self.cache[self.conversation_id])
+        return self._load_message_set(self.cache[self.conversation_id], recently_n)
 
     def save_message_set_to_memory(self, message_set: MessageSet) -> None:
-        self.cache[self.conversation_id] = message_set.listdict_messages
+        self.cache[self.conversation_id] = self._dump_message_set(message_set)
@@ -2,6 +2,12 @@ from promptulate.output_formatter.formatter import (
     OutputFormatter,
     formatting_result,
     get_formatted_instructions,
+    to_response_format,
 )
 
-__all__ = ["OutputFormatter", "get_formatted_instructions", "formatting_result"]
+__all__ = [
+    "OutputFormatter",
+    "get_formatted_instructions",
+    "formatting_result",
+    "to_response_format",
+]
@@ -1,6 +1,9 @@
+import functools
 import json
 import re
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
 
 from promptulate.error import OutputParserError
 from promptulate.output_formatter.prompt import OUTPUT_FORMAT
@@ -8,6 +11,17 @@ from promptulate.pydantic_v1 import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
 
+_INSTRUCTIONS_CACHE_SIZE = 256
+# (schema class, json of examples) -> instructions
+_instructions_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+# (schema class, ids of examples) -> (instructions, examples, fields of examples).
+# The examples are kept, so their ids will not be reused by other objects, and the
+# fields are compared to find the examples which have been changed.
+_identity_cache: "OrderedDict[Tuple, Tuple[str, Tuple[BaseModel, ...], Tuple]]" = (
+    OrderedDict()
+)
+_instructions_lock = threading.Lock()
+
 
 def _get_schema(pydantic_obj: Type[BaseModel]) -> dict:
     """Get reduced schema from pydantic object.
@@ -37,6 +51,46 @@ def _get_schema(pydantic_obj: Type[BaseModel]) -> dict:
     return reduced_schema
 
 
+@functools.lru_cache(maxsize=_INSTRUCTIONS_CACHE_SIZE)
+def _get_schema_instructions(pydantic_obj: Type[BaseModel]) -> str:
+    """Render the instructions of a pydantic object without examples."""
+    return OUTPUT_FORMAT.format(schema=json.dumps(_get_schema(pydantic_obj)))
+
+
+@functools.lru_cache(maxsize=_INSTRUCTIONS_CACHE_SIZE)
+def to_response_format(pydantic_obj: Type[BaseModel]) -> Dict[str, Any]:
+    """Convert a Pydantic object to the json_schema response format of OpenAI API,
+    which is used by the providers supporting native structured output.
+
+    Args:
+        pydantic_obj (type(BaseModel)): The Pydantic object of the output.
+
+    Returns:
+        Dict[str, Any]: eg: {"type": "json_schema", "json_schema": {...}}
+    """
+    if hasattr(pydantic_obj, "model_json_schema"):
+        schema: dict = pydantic_obj.model_json_schema()
+    else:
+        schema: dict = pydantic_obj.schema()
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": re.sub(r"[^a-zA-Z0-9_-]", "_", pydantic_obj.__name__),
+            "schema": schema,
+            "strict": False,
+        },
+    }
+
+
+def _render_examples(examples: List[BaseModel]) -> str:
+    instructions = "\nExamples:\n"
+    for example in examples:
+        example_str = json.dumps(example.dict())
+        instructions += f"{example_str}\n"
+    return instructions
+
+
 class OutputFormatter:
     """
     Class for formatting the output of a Pydantic object.
@@ -75,7 +129,9 @@ def get_formatted_instructions(
     examples: List[BaseModel] = None,
 ) -> str:
     """
-    Get formatted instructions for a JSON schema or Pydantic object.
+    Get formatted instructions for a JSON schema or Pydantic object. The
+    instructions of a Pydantic object are cached by the object and the examples,
+    the examples are rendered again if one of their fields is reassigned.
 
     Args:
         json_schema (Union[Dict, type(BaseModel)]): The JSON schema or Pydantic object
@@ -86,20 +142,59 @@ def get_formatted_instructions(
     Returns:
         str: The formatted instructions.
     """
-    # If a Pydantic model is passed, extract the schema from it.
-    if not isinstance(json_schema, dict):
-        json_schema: dict = _get_schema(json_schema)
-
-    # Ensure json with double quotes.
-    schema_str = json.dumps(json_schema)
-
-    instructions: str = OUTPUT_FORMAT.format(schema=schema_str)
-    if examples:
-        instructions += "\nExamples:\n"
-        for example in examples:
-            example_str = json.dumps(example.dict())
-            instructions += f"{example_str}\n"
-    return instructions
+    if isinstance(json_schema, dict):
+        # Ensure json with double quotes.
+        instructions: str = OUTPUT_FORMAT.format(schema=json.dumps(json_schema))
+        if examples:
+            instructions += _render_examples(examples)
+        return instructions
+
+    # Instructions of a Pydantic model are cached by the model and the examples.
+    instructions: str = _get_schema_instructions(json_schema)
+    if not examples:
+        return instructions
+
+    identity_key = (json_schema, tuple(map(id, examples)))
+    with _instructions_lock:
+        cached = _identity_cache.get(identity_key)
+    # comparing the fields is cheap, the values are usually the same objects
+    if cached is not None and all(
+        example.__dict__ == fields for example, fields in zip(examples, cached[2])
+    ):
+        with _instructions_lock:
+            _identity_cache.move_to_end(identity_key)
+        return cached[0]
+
+    # fallback to the content of the examples, eg: new example objects
+    content_key = (
+        json_schema,
+        tuple(json.dumps(example.dict(), sort_keys=True) for example in examples),
+    )
+    with _instructions_lock:
+        cached_instructions: Optional[str] = _instructions_cache.get(content_key)
+    if cached_instructions is None:
+        cached_instructions = instructions + _render_examples(examples)
+
+    with _instructions_lock:
+        _put(_instructions_cache, content_key, cached_instructions)
+        _put(
+            _identity_cache,
+            identity_key,
+            (
+                cached_instructions,
+                tuple(examples),
+                tuple(dict(example.__dict__) for example in examples),
+            ),
+        )
+    return cached_instructions
+
+
+def _put(cache: OrderedDict, key: Tuple, value: Any) -> None:
+    """Put a value into a bounded LRU cache, the caller should hold the lock."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _INSTRUCTIONS_CACHE_SIZE:
+        cache.popitem(last=False)
 
 
 def formatting_result(pydantic_obj: type(BaseModel), llm_output: str) -> T:
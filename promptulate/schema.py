@@ -1,10 +1,33 @@
+import asyncio
+import operator
+import threading
+import time
 import warnings
 from abc import abstractmethod
+from collections import deque
 from datetime import datetime
 from enum import Enum, auto
-from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from typing_extensions import Literal
 
 from promptulate.pydantic_v1 import BaseModel, Field
+from promptulate.utils import serialization
+from promptulate.utils.logger import logger
+from promptulate.utils.tokenizer import TOKENS_PER_MESSAGE, Tokenizer, get_tokenizer
 
 __all__ = [
     "LLMType",
@@ -13,9 +36,15 @@ __all__ = [
     "SystemMessage",
     "UserMessage",
     "AssistantMessage",
+    "MessageRecord",
     "MessageSet",
     "init_chat_message_history",
+    "LazyChunkData",
+    "StreamAccumulator",
+    "BaseStreamIterator",
     "StreamIterator",
+    "StreamBroadcast",
+    "AsyncStreamIterator",
 ]
 
 
@@ -32,9 +61,89 @@ class BaseMessage(BaseModel):
         """Type of the message, used for serialization."""
 
 
-class StreamIterator:
+class LazyChunkData(Mapping):
+    """Raw data of a stream chunk. It is materialized only when it is accessed, eg:
+    return_raw_response is True, so the fast path does not pay for serializing every
+    chunk. usage and finish_reason are extracted eagerly because they are cheap and
+    used by StreamAccumulator."""
+
+    __slots__ = ("_loader", "_data", "usage", "finish_reason")
+
+    def __init__(
+        self,
+        loader: Callable[[], dict],
+        usage: Optional[dict] = None,
+        finish_reason: Optional[str] = None,
+    ):
+        self._loader = loader
+        self._data: Optional[dict] = None
+        self.usage = usage
+        self.finish_reason = finish_reason
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = self._loader()
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"LazyChunkData({self.data!r})"
+
+
+class StreamAccumulator:
+    """Accumulate the content, usage and finish reason of a stream, so the complete
+    response can be recovered after the stream ends."""
+
+    def __init__(self, content: Optional[str] = None):
+        self._chunks: List[str] = [content] if content else []
+        self._content: Optional[str] = None
+        self.usage: Optional[dict] = None
+        self.finish_reason: Optional[str] = None
+
+    def add(self, content: Optional[str], ret_data: Any = None) -> None:
+        """Add a parsed chunk, ret_data is the OpenAI style raw chunk data."""
+        if content:
+            self._chunks.append(content)
+            self._content = None
+
+        if isinstance(ret_data, LazyChunkData):
+            self.usage = ret_data.usage or self.usage
+            self.finish_reason = ret_data.finish_reason or self.finish_reason
+            return
+        if not isinstance(ret_data, dict):
+            return
+        if ret_data.get("usage"):
+            self.usage = ret_data["usage"]
+        choices = ret_data.get("choices") or [{}]
+        if choices[0].get("finish_reason"):
+            self.finish_reason = choices[0]["finish_reason"]
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = "".join(self._chunks)
+        return self._content
+
+    def to_message(self) -> "AssistantMessage":
+        additional_kwargs = {"usage": self.usage, "finish_reason": self.finish_reason}
+        return AssistantMessage(
+            content=self.content, additional_kwargs=additional_kwargs
+        )
+
+
+class BaseStreamIterator:
     """
-    This class is an iterator for the response stream from the LLM model.
+    Base class of StreamIterator and AsyncStreamIterator. It parses the chunks and
+    accumulates the content, usage and finish reason of the stream.
 
     Attributes:
         response_stream: The stream of responses from the LLM model.
@@ -42,7 +151,9 @@ class StreamIterator:
         return_raw_response: A boolean indicating whether to return the raw response
         or not.
         additional_kwargs: Optional dictionary with additional keyword parameters
-        content: An optional string that represents the content
+        content: The content which has been yielded
+        usage: The token usage if the provider returns it in the stream
+        finish_reason: The finish reason of the stream
     """
 
     def __init__(
@@ -68,16 +179,29 @@ class StreamIterator:
         self.return_raw_response = return_raw_response
         self.parse_content = parse_content
         self.additional_kwargs = additional_kwargs or {}
-        self.content = content
+        self.accumulator = StreamAccumulator(content)
+        # StreamObserver of promptulate.llms.metrics, it is attached by BaseLLM
+        self.observer: Optional[Any] = None
 
-    def __iter__(self) -> Union[Iterator[BaseMessage], Iterator[str]]:
-        """
-        The iterator method for the BaseStreamIterator class.
+    @property
+    def content(self) -> str:
+        return self.accumulator.content
 
-        Returns:
-            self: An instance of the BaseStreamIterator class.
-        """
-        return self
+    @property
+    def usage(self) -> Optional[dict]:
+        return self.accumulator.usage
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        return self.accumulator.finish_reason
+
+    def to_message(self) -> "AssistantMessage":
+        """Get the complete message of the content which has been yielded."""
+        return self.accumulator.to_message()
+
+    def _on_stream_end(self, error: Optional[BaseException] = None) -> None:
+        if self.observer is not None:
+            self.observer.on_end(self.content, self.usage, error)
 
     def parse_chunk(self, chunk) -> Optional[Union[str, BaseMessage]]:
         """
@@ -91,6 +215,9 @@ class StreamIterator:
             Optional: The parsed chunk or None if the chunk is empty.
         """
         content, ret_data = self.parse_content(chunk)
+        self.accumulator.add(content, ret_data)
+        if content and self.observer is not None:
+            self.observer.on_token(content)
         if content is None:
             return None
         if self.return_raw_response:
@@ -103,6 +230,162 @@ class StreamIterator:
 
         return content
 
+
+class StreamBroadcast:
+    """Fan out a stream to multiple subscribers. The chunks are pulled from the
+    source once and kept in a ring buffer until every subscriber has read them, so
+    the buffer only holds the gap between the fastest and the slowest subscriber.
+
+    If max_buffer_size is set, a subscriber which is ahead by max_buffer_size chunks
+    waits for the slowest one, so subscribers should be consumed in different
+    threads. A subscriber which stops reading should be closed, otherwise it keeps
+    the chunks in the buffer.
+    """
+
+    def __init__(self, source: Iterable[Any], max_buffer_size: Optional[int] = None):
+        """
+        Args:
+            source(Iterable[Any]): the stream to fan out.
+            max_buffer_size(Optional[int]): max chunks in the buffer, unbounded if it
+                is None.
+        """
+        if max_buffer_size is not None and max_buffer_size <= 0:
+            raise ValueError("max_buffer_size must be greater than 0.")
+
+        self.max_buffer_size = max_buffer_size
+        self._source: Iterator[Any] = iter(source)
+        self._buffer: Deque[Any] = deque()
+        # sequence number of the first chunk in the buffer
+        self._head: int = 0
+        # subscriber id -> sequence number of the next chunk it reads
+        self._positions: Dict[int, int] = {}
+        self._next_id: int = 0
+        self._cond = threading.Condition()
+        self._pulling = False
+        self._done = False
+        self._error: Optional[BaseException] = None
+
+    @property
+    def _tail(self) -> int:
+        return self._head + len(self._buffer)
+
+    def subscribe(self, start: Optional[int] = None) -> "StreamSubscription":
+        """Subscribe the stream.
+
+        Args:
+            start(Optional[int]): sequence number of the first chunk to read, it
+                starts from the oldest chunk in the buffer if it is None.
+        """
+        with self._cond:
+            subscriber_id = self._next_id
+            self._next_id += 1
+            self._positions[subscriber_id] = max(
+                self._head, self._head if start is None else start
+            )
+        return StreamSubscription(self, subscriber_id)
+
+    def _read(self, subscriber_id: int) -> Any:
+        while True:
+            with self._cond:
+                while True:
+                    position = self._positions.get(subscriber_id)
+                    if position is None:
+                        raise StopIteration
+                    if position < self._tail:
+                        chunk = self._buffer[position - self._head]
+                        self._positions[subscriber_id] = position + 1
+                        self._trim()
+                        return chunk
+                    if self._done:
+                        if self._error is not None:
+                            raise self._error
+                        raise StopIteration
+                    if not self._pulling and (
+                        self.max_buffer_size is None
+                        or len(self._buffer) < self.max_buffer_size
+                    ):
+                        break
+                    self._cond.wait()
+                self._pulling = True
+
+            # pull without the lock, so that the others can read the buffer
+            self._pull()
+
+    def _pull(self) -> None:
+        chunk, done, error = None, False, None
+        try:
+            chunk = next(self._source)
+        except StopIteration:
+            done = True
+        except BaseException as e:
+            done, error = True, e
+
+        with self._cond:
+            self._pulling = False
+            if done:
+                self._done, self._error = True, error
+            else:
+                self._buffer.append(chunk)
+            self._cond.notify_all()
+
+    def _trim(self) -> None:
+        """Drop the chunks which have been read by all the subscribers."""
+        head = min(self._positions.values(), default=self._tail)
+        if head <= self._head:
+            return
+        for _ in range(head - self._head):
+            self._buffer.popleft()
+        self._head = head
+        self._cond.notify_all()
+
+    def _unsubscribe(self, subscriber_id: int) -> None:
+        with self._cond:
+            if self._positions.pop(subscriber_id, None) is not None:
+                self._trim()
+
+
+class StreamSubscription:
+    """A subscriber of StreamBroadcast, it iterates over the chunks of the stream."""
+
+    def __init__(self, broadcast: StreamBroadcast, subscriber_id: int):
+        self._broadcast = broadcast
+        self._id = subscriber_id
+
+    @property
+    def position(self) -> int:
+        """Sequence number of the next chunk to read."""
+        with self._broadcast._cond:
+            return self._broadcast._positions.get(self._id, self._broadcast._tail)
+
+    def __iter__(self) -> "StreamSubscription":
+        return self
+
+    def __next__(self) -> Any:
+        return self._broadcast._read(self._id)
+
+    def close(self) -> None:
+        """Stop reading, the chunks will not be kept for this subscriber."""
+        self._broadcast._unsubscribe(self._id)
+
+    def __del__(self):
+        self.close()
+
+
+class StreamIterator(BaseStreamIterator):
+    """
+    This class is an iterator for the response stream from the LLM model. It pulls
+    the next chunk only when the consumer asks for it.
+    """
+
+    def __iter__(self) -> Union[Iterator[BaseMessage], Iterator[str]]:
+        """
+        The iterator method for the BaseStreamIterator class.
+
+        Returns:
+            self: An instance of the BaseStreamIterator class.
+        """
+        return self
+
     def __next__(self) -> Union[str, BaseMessage]:
         """
         The next method for the BaseStreamIterator class.
@@ -118,23 +401,175 @@ class StreamIterator:
             return_raw_response is True, it returns an AssistantMessage instance,
             otherwise it returns the content of the response as a string.
         """
-        for chunk in self.response_stream:
-            content, ret_data = self.parse_content(chunk)
-            if content is None:
-                continue
-            if self.return_raw_response:
-                additional_kwargs: dict = ret_data
-                message = AssistantMessage(
-                    content=content,
-                    additional_kwargs=additional_kwargs,
-                )
-                return message
-
-            return content
+        try:
+            for chunk in self.response_stream:
+                message = self.parse_chunk(chunk)
+                if message is not None:
+                    return message
+        except Exception as e:
+            self._on_stream_end(e)
+            raise
 
         # If there are no more messages, stop the iteration
+        self._on_stream_end()
         raise StopIteration
 
+    def subscribe(self, max_buffer_size: Optional[int] = None) -> "StreamIterator":
+        """Subscribe the stream, so several consumers, such as UI, logger and memory,
+        can read the same stream with one upstream request. The subscriber starts
+        from the position of this iterator, and this iterator can still be used.
+
+        Args:
+            max_buffer_size(Optional[int]): max chunks buffered for the slowest
+                subscriber, it only takes effect for the first subscription. See
+                StreamBroadcast for details.
+
+        Returns:
+            StreamIterator: a new iterator of the stream.
+        """
+        if not isinstance(self.response_stream, StreamSubscription):
+            broadcast = StreamBroadcast(self.response_stream, max_buffer_size)
+            self.response_stream = broadcast.subscribe()
+
+        subscription: StreamSubscription = self.response_stream
+        subscriber = StreamIterator(
+            response_stream=subscription._broadcast.subscribe(subscription.position),
+            parse_content=self.parse_content,
+            return_raw_response=self.return_raw_response,
+            additional_kwargs=self.additional_kwargs,
+            content=self.content,
+        )
+        subscriber.accumulator.usage = self.usage
+        subscriber.accumulator.finish_reason = self.finish_reason
+        return subscriber
+
+    def tee(
+        self, n: int = 2, max_buffer_size: Optional[int] = None
+    ) -> List["StreamIterator"]:
+        """Split the stream into n iterators, like `itertools.tee`. This iterator
+        should not be used after tee.
+
+        Args:
+            n(int): number of iterators.
+            max_buffer_size(Optional[int]): max chunks buffered for the slowest
+                iterator. See StreamBroadcast for details.
+
+        Returns:
+            List[StreamIterator]: n iterators of the stream.
+        """
+        iterators = [self.subscribe(max_buffer_size) for _ in range(n)]
+        self.response_stream.close()
+        # the metrics of the stream follow the first iterator
+        iterators[0].observer, self.observer = self.observer, None
+        return iterators
+
+
+class _StreamError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_STREAM_END = object()
+
+
+class AsyncStreamIterator(BaseStreamIterator):
+    """
+    Async iterator for the response stream from the LLM model, use it by
+    `async for`. If max_buffer_size is 0, the next chunk is pulled only when the
+    consumer asks for it. Otherwise a background task prefetches at most
+    max_buffer_size chunks, and it stops reading the response when the buffer is
+    full, so a slow consumer applies backpressure instead of piling up memory.
+    """
+
+    def __init__(
+        self,
+        response_stream: AsyncIterable,
+        parse_content: callable([[Any], [str, str]]),
+        return_raw_response: bool = False,
+        additional_kwargs: dict = None,
+        content: str = None,
+        max_buffer_size: int = 0,
+    ):
+        """
+        Args:
+            response_stream: The async stream of responses from the LLM model.
+            parse_content: The callback function to parse the chunk.
+            return_raw_response: A boolean indicating whether to return the raw response
+            or not.
+            additional_kwargs: Optional dictionary with additional keyword parameters
+            content: An optional string that represents the content
+            max_buffer_size: The maximum number of prefetched chunks, 0 means no
+            prefetch.
+        """
+        super().__init__(
+            response_stream=response_stream,
+            parse_content=parse_content,
+            return_raw_response=return_raw_response,
+            additional_kwargs=additional_kwargs,
+            content=content,
+        )
+        self.max_buffer_size = max_buffer_size
+        self._iterator: AsyncIterator = response_stream.__aiter__()
+        self._buffer: Optional[asyncio.Queue] = None
+        self._producer: Optional[asyncio.Task] = None
+
+    def __aiter__(self) -> "AsyncStreamIterator":
+        return self
+
+    async def __anext__(self) -> Union[str, BaseMessage]:
+        while True:
+            try:
+                chunk = await self._next_chunk()
+            except StopAsyncIteration:
+                self._on_stream_end()
+                raise
+            except Exception as e:
+                self._on_stream_end(e)
+                raise
+            message = self.parse_chunk(chunk)
+            if message is not None:
+                return message
+
+    async def _next_chunk(self):
+        """Get the next raw chunk, raise StopAsyncIteration if the stream ends."""
+        if self.max_buffer_size <= 0:
+            return await self._iterator.__anext__()
+
+        if self._producer is None:
+            self._buffer = asyncio.Queue(maxsize=self.max_buffer_size)
+            self._producer = asyncio.ensure_future(self._produce())
+
+        item = await self._buffer.get()
+        if item is _STREAM_END:
+            raise StopAsyncIteration
+        if isinstance(item, _StreamError):
+            raise item.error
+        return item
+
+    async def _produce(self) -> None:
+        """Read the response into the buffer, it waits when the buffer is full."""
+        try:
+            async for chunk in self._iterator:
+                await self._buffer.put(chunk)
+        except Exception as e:
+            await self._buffer.put(_StreamError(e))
+        else:
+            await self._buffer.put(_STREAM_END)
+
+    async def aclose(self) -> None:
+        """Stop reading the response and close it."""
+        if self._producer is not None:
+            self._producer.cancel()
+        aclose = getattr(self._iterator, "aclose", None)
+        if callable(aclose):
+            await aclose()
+
+    async def __aenter__(self) -> "AsyncStreamIterator":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
 
 class CompletionMessage(BaseMessage):
     """Type of completion message. Used in OpenAI currently"""
@@ -177,6 +612,80 @@ MESSAGE_TYPE = {
 }
 
 
+class MessageRecord:
+    """Lightweight message without validation, MessageSet uses it to store messages
+    built from raw data. It has the same attributes as BaseMessage, and it can be
+    converted to pydantic message by `to_message` when needed.
+
+    It uses __slots__ and stores created_at as a timestamp, so it is much cheaper to
+    create and keep in memory than pydantic message.
+    """
+
+    __slots__ = ("role", "content", "_additional_kwargs", "_timestamp")
+
+    def __init__(
+        self,
+        role: str,
+        content: str,
+        additional_kwargs: Optional[dict] = None,
+        timestamp: Optional[float] = None,
+    ):
+        if role not in MESSAGE_TYPE:
+            raise KeyError(f"Unknown message role: {role}")
+
+        self.role = role
+        self.content = content
+        self._additional_kwargs = additional_kwargs
+        self._timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def type(self) -> str:
+        return self.role
+
+    @property
+    def additional_kwargs(self) -> dict:
+        if self._additional_kwargs is None:
+            self._additional_kwargs = {}
+        return self._additional_kwargs
+
+    @additional_kwargs.setter
+    def additional_kwargs(self, value: dict) -> None:
+        self._additional_kwargs = value
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self._timestamp)
+
+    @classmethod
+    def from_message(cls, message: BaseMessage) -> "MessageRecord":
+        return cls(
+            role=message.type,
+            content=message.content,
+            additional_kwargs=message.additional_kwargs,
+            timestamp=message.created_at.timestamp(),
+        )
+
+    def to_message(self) -> BaseMessage:
+        """Convert to pydantic message without validation."""
+        return MESSAGE_TYPE[self.role].construct(
+            content=self.content,
+            additional_kwargs=self.additional_kwargs,
+            created_at=self.created_at,
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (MessageRecord, BaseMessage)):
+            return NotImplemented
+        return (
+            self.type == other.type
+            and self.content == other.content
+            and self.additional_kwargs == other.additional_kwargs
+        )
+
+    def __repr__(self) -> str:
+        return f"MessageRecord(role={self.role!r}, content={self.content!r})"
+
+
 class LLMType(str, Enum):
     """All LLM type here"""
 
@@ -187,22 +696,42 @@ class LLMType(str, Enum):
     ZhiPu = auto()
 
 
+_get_content = operator.attrgetter("content")
+_get_type = operator.attrgetter("type")
+_get_timestamp = operator.attrgetter("_timestamp")
+_get_raw_kwargs = operator.attrgetter("_additional_kwargs")
+
+
 class MessageSet:
     """MessageSet can be used in Memory, LLMs, Framework and some else.
     It's a universal chat message format in promptulate.
+
+    Messages can be BaseMessage or MessageRecord. Messages built from raw data, such
+    as `from_listdict_data` and `add_user_message`, are stored as MessageRecord to
+    skip validation, use `to_messages` if you need pydantic messages.
     """
 
     def __init__(
         self,
-        messages: List[BaseMessage],
+        messages: List[Union[BaseMessage, MessageRecord]],
         conversation_id: Optional[str] = None,
         additional_kwargs: Optional[dict] = None,
+        tokenizer: Optional[Tokenizer] = None,
     ):
-        self.messages: List[BaseMessage] = messages
+        self.messages = messages
         self.conversation_id: Optional[str] = conversation_id
         self.additional_kwargs: dict = additional_kwargs or {}
+        # tokenizer of the llm, see `BaseLLM.get_tokenizer`
+        self.tokenizer: Optional[Tokenizer] = tokenizer
         self.created_at: datetime = datetime.now()
 
+        # cached views of messages, see `_sync_views`
+        self._view_messages: List[Union[BaseMessage, MessageRecord]] = []
+        self._view_contents: List[str] = []
+        self._listdict_view: List[Dict[str, str]] = []
+        self._string_view: str = ""
+        self._token_counts: Dict[Tokenizer, List[int]] = {}
+
         if conversation_id:
             # show tip, this will be deprecated in v1.9.0
             warnings.warn(
@@ -211,6 +740,73 @@ class MessageSet:
                 stacklevel=2,
             )
 
+    @property
+    def messages(self) -> List[Union[BaseMessage, MessageRecord]]:
+        """Messages of the MessageSet. A forked MessageSet copies the message
+        references of its parent here at the first access, and a MessageSet which has
+        been forked copies its own list at the first access after the fork, so that
+        the changes of the list are not visible to each other."""
+        if self._fork_parent is not None:
+            self._materialize_fork()
+        elif self._shared:
+            self._messages = list(self._messages)
+            self._shared = False
+        return self._messages
+
+    @messages.setter
+    def messages(self, value: List[Union[BaseMessage, MessageRecord]]) -> None:
+        self._messages = value
+        # the parent MessageSet and the prefix length of a lazy fork
+        self._fork_parent: Optional["MessageSet"] = None
+        self._fork_prefix: Optional[List[Union[BaseMessage, MessageRecord]]] = None
+        self._fork_size: int = 0
+        # whether _messages is shared with the forks
+        self._shared: bool = False
+
+    def fork(self) -> "MessageSet":
+        """Create a child MessageSet which shares the messages of this one, it takes
+        constant time. The list of messages is copy-on-write, the child copies the
+        message references and the cached views (listdict, string and token counts)
+        of this one when it is used, so nothing is converted or counted again.
+
+        Messages are shared rather than copied, so replace a message instead of
+        editing it in place if the change should not be visible to the others.
+
+        Returns:
+            MessageSet: the child MessageSet.
+        """
+        child = MessageSet(
+            messages=[],
+            additional_kwargs=dict(self.additional_kwargs),
+            tokenizer=self.tokenizer,
+        )
+        if self._fork_parent is not None:
+            parent, prefix, size = self._fork_parent, self._fork_prefix, self._fork_size
+        else:
+            parent, prefix, size = self, self._messages, len(self._messages)
+            self._shared = True
+
+        child._fork_parent, child._fork_prefix, child._fork_size = parent, prefix, size
+        return child
+
+    def _materialize_fork(self) -> None:
+        """Copy the message references and the cached views from the parent."""
+        parent, size = self._fork_parent, self._fork_size
+        self._messages = self._fork_prefix[:size]
+        self._fork_parent, self._fork_prefix = None, None
+
+        # views of the parent are validated by `_sync_views` before they are used
+        n = min(size, len(parent._view_messages))
+        self._view_messages = parent._view_messages[:n]
+        self._view_contents = parent._view_contents[:n]
+        self._listdict_view = parent._listdict_view[:n]
+        self._string_view = parent._string_view[
+            : sum(map(len, self._view_contents)) + n
+        ]
+        self._token_counts = {
+            tokenizer: counts[:n] for tokenizer, counts in parent._token_counts.items()
+        }
+
     @classmethod
     def from_listdict_data(
         cls, value: List[Dict], additional_kwargs: Optional[dict] = None
@@ -228,14 +824,115 @@ class MessageSet:
         Returns:
             initialized MessageSet
         """
-        messages: List[BaseMessage] = [
-            MESSAGE_TYPE[item["role"]](content=item["content"]) for item in value
+        timestamp: float = time.time()
+        messages: List[MessageRecord] = [
+            MessageRecord(item["role"], item["content"], timestamp=timestamp)
+            for item in value
         ]
         return cls(messages=messages, additional_kwargs=additional_kwargs)
 
+    def to_bytes(
+        self,
+        codec: Optional[Literal["msgpack", "json"]] = None,
+        compression: Optional[Literal["zstd", "zlib"]] = None,
+    ) -> bytes:
+        """Serialize the MessageSet to compact bytes. Messages are stored by columns,
+        and additional kwargs are only stored for the messages which have them. See
+        `promptulate.utils.serialization` for the format.
+
+        Args:
+            codec(Optional[str]): msgpack or json to encode additional kwargs, use
+                msgpack if it is installed.
+            compression(Optional[str]): zstd, zlib or None.
+
+        Returns:
+            bytes: serialized MessageSet, use `from_bytes` to load it.
+        """
+        messages = self.messages
+        try:
+            timestamps: List[float] = list(map(_get_timestamp, messages))
+            all_kwargs: List[Optional[dict]] = list(map(_get_raw_kwargs, messages))
+        except AttributeError:
+            # there are pydantic messages
+            timestamps = [
+                message._timestamp
+                if isinstance(message, MessageRecord)
+                else message.created_at.timestamp()
+                for message in messages
+            ]
+            all_kwargs = [message.additional_kwargs for message in messages]
+        kwargs: List[list] = [[i, value] for i, value in enumerate(all_kwargs) if value]
+
+        return serialization.dump_messages(
+            list(map(_get_type, messages)),
+            list(map(_get_content, messages)),
+            timestamps,
+            {"kwargs": kwargs, "additional_kwargs": self.additional_kwargs},
+            codec=codec,
+            compression=compression,
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MessageSet":
+        """Load MessageSet from bytes which are serialized by `to_bytes`."""
+        roles, contents, timestamps, meta = serialization.load_messages(data)
+        kwargs: Dict[int, dict] = {i: value for i, value in meta["kwargs"]}
+        messages: List[MessageRecord] = [
+            MessageRecord(role, content, kwargs.get(i), timestamp)
+            for i, (role, content, timestamp) in enumerate(
+                zip(roles, contents, timestamps)
+            )
+        ]
+        return cls(messages=messages, additional_kwargs=meta["additional_kwargs"])
+
+    def to_messages(self) -> List[BaseMessage]:
+        """Get messages as pydantic messages."""
+        return [
+            message.to_message() if isinstance(message, MessageRecord) else message
+            for message in self.messages
+        ]
+
+    def _sync_views(self) -> None:
+        """Update the cached listdict and string views of messages.
+
+        Messages can be appended, replaced or changed in place (eg:
+        `messages[-1].content += "..."`), so the cached messages and their contents
+        are compared with the current ones first. The comparison runs in C and
+        short-circuits on identity, which is much cheaper than rebuilding the views.
+        Only the new messages at the tail are converted, the views are rebuilt if any
+        cached message is changed.
+        """
+        messages = self.messages
+        n = len(self._view_messages)
+        if not (
+            len(messages) >= n
+            and self._view_messages == messages[:n]
+            and self._view_contents == list(map(_get_content, messages[:n]))
+        ):
+            n = 0
+            self._view_messages = []
+            self._view_contents = []
+            self._listdict_view = []
+            self._string_view = ""
+            self._token_counts = {}
+
+        if len(messages) == n:
+            return
+
+        tail = messages[n:]
+        contents: List[str] = [message.content for message in tail]
+        self._view_messages.extend(tail)
+        self._view_contents.extend(contents)
+        self._listdict_view.extend(
+            {"role": message.type, "content": content}
+            for message, content in zip(tail, contents)
+        )
+        self._string_view += "\n".join(contents) + "\n"
+
     @property
     def listdict_messages(self) -> List[Dict[str, str]]:
-        """Convert the MessageSet messages to a list of dictionary(openai type).
+        """Convert the MessageSet messages to a list of dictionary(openai type). The
+        view is cached and updated incrementally, do not modify the returned dicts.
 
         Returns:
             List[Dict[str, str]]: the example is as follows:
@@ -244,12 +941,8 @@ class MessageSet:
                     {"role": "assistant", "content": "This is a message2."}
                 ]
         """
-        converted_messages = []
-        for message in self.messages:
-            converted_messages.append(
-                {"role": message.type, "content": message.content}
-            )
-        return converted_messages
+        self._sync_views()
+        return list(self._listdict_view)
 
     def to_llm_prompt(self, llm_type: LLMType) -> Any:
         """Convert the MessageSet messages to specified llm prompt"""
@@ -263,22 +956,133 @@ class MessageSet:
     def string_messages(self) -> str:
         """Convert the message to a string type, it can be used as a prompt for OpenAI
         completion."""
-        string_result = ""
-        for message in self.messages:
-            string_result += f"{message.content}\n"
-        return string_result
+        self._sync_views()
+        return self._string_view
+
+    def _get_tokenizer(self, tokenizer: Optional[Tokenizer] = None) -> Tokenizer:
+        return tokenizer or self.tokenizer or get_tokenizer()
+
+    def _get_token_counts(self, tokenizer: Tokenizer) -> List[int]:
+        """Get the cached token count of every message, only the new messages are
+        counted."""
+        self._sync_views()
+        counts: List[int] = self._token_counts.setdefault(tokenizer, [])
+        for content in self._view_contents[len(counts) :]:
+            counts.append(tokenizer(str(content)) + TOKENS_PER_MESSAGE)
+        return counts
+
+    @property
+    def token_count(self) -> int:
+        """Tokens of the messages counted by `tokenizer`, including the tokens of role
+        and separators of every message. The count of every message is cached."""
+        return self.count_tokens()
+
+    def count_tokens(self, tokenizer: Optional[Tokenizer] = None) -> int:
+        """Count tokens of the messages.
+
+        Args:
+            tokenizer(Optional[Tokenizer]): use `self.tokenizer` or the default
+                tokenizer if it is not specified.
+
+        Returns:
+            int: tokens of the messages.
+        """
+        return sum(self._get_token_counts(self._get_tokenizer(tokenizer)))
+
+    def fit_to(
+        self,
+        max_tokens: int,
+        strategy: Literal["drop_oldest", "pin_system", "summarize"] = "pin_system",
+        tokenizer: Optional[Tokenizer] = None,
+        summarizer: Optional[Callable[[str], str]] = None,
+    ) -> "MessageSet":
+        """Fit the messages into the context window, so that the request will not be
+        rejected by the provider. The latest messages are always kept.
+
+        Args:
+            max_tokens(int): max tokens of the messages.
+            strategy(str): how to drop the old messages, it can be:
+                - drop_oldest: drop the oldest messages.
+                - pin_system: keep the system messages at the beginning and drop the
+                    oldest of the others.
+                - summarize: the same as pin_system, but the dropped messages are
+                    summarized into a system message by `summarizer`.
+            tokenizer(Optional[Tokenizer]): use `self.tokenizer` or the default
+                tokenizer if it is not specified.
+            summarizer(Optional[Callable[[str], str]]): a function or an llm to
+                generate the summary from a prompt, it is required by summarize.
+
+        Returns:
+            MessageSet: a new MessageSet with the kept messages.
+        """
+        if strategy not in ("drop_oldest", "pin_system", "summarize"):
+            raise ValueError(f"Unknown strategy of fit_to: {strategy}")
+        if strategy == "summarize" and summarizer is None:
+            raise ValueError("summarizer is required by the summarize strategy.")
+
+        tokenizer = self._get_tokenizer(tokenizer)
+        counts: List[int] = self._get_token_counts(tokenizer)
+        messages = self._view_messages
+
+        def _build(kept: List[Union[BaseMessage, MessageRecord]]) -> "MessageSet":
+            return MessageSet(
+                messages=kept,
+                additional_kwargs=self.additional_kwargs,
+                tokenizer=self.tokenizer,
+            )
+
+        if sum(counts) <= max_tokens:
+            return _build(list(messages))
+
+        n_pinned = 0
+        if strategy != "drop_oldest":
+            while n_pinned < len(messages) and messages[n_pinned].type == "system":
+                n_pinned += 1
+
+        budget: int = max_tokens - sum(counts[:n_pinned])
+        start, used = len(messages), 0
+        while start > n_pinned and used + counts[start - 1] <= budget:
+            start -= 1
+            used += counts[start]
+        if start == len(messages):
+            raise ValueError(
+                f"The latest message can not fit into {max_tokens} tokens, "
+                f"messages need {sum(counts)} tokens."
+            )
+
+        kept = [*messages[:n_pinned], *messages[start:]]
+        if strategy == "summarize":
+            dropped = messages[n_pinned:start]
+            prompt = (
+                "Summarize the following conversation briefly and keep the key "
+                "information:\n"
+                + "\n".join(f"{message.type}: {message.content}" for message in dropped)
+            )
+            summary = MessageRecord(
+                "system", f"Summary of the earlier conversation:\n{summarizer(prompt)}"
+            )
+            summary_tokens: int = tokenizer(summary.content) + TOKENS_PER_MESSAGE
+            while start < len(messages) - 1 and used + summary_tokens > budget:
+                used -= counts[start]
+                start += 1
+            if used + summary_tokens <= budget:
+                kept = [*messages[:n_pinned], summary, *messages[start:]]
+            else:
+                logger.warning("[pne memory] summary is too long, it is dropped.")
+
+        return _build(kept)
 
     def add_message(self, message: BaseMessage) -> None:
         self.messages.append(message)
 
     def add_completion_message(self, message: str) -> None:
-        self.messages.append(CompletionMessage(content=message))
+        self.messages.append(MessageRecord("completion", message))
 
     def add_system_message(self, message: str) -> None:
-        self.messages.append(SystemMessage(content=message))
+        self.messages.append(MessageRecord("system", message))
 
     def add_user_message(self, message: str) -> None:
-        self.messages.append(UserMessage(content=message))
+        self.messages.append(MessageRecord("user", message))
 
     def add_ai_message(self, message: Union[str, BaseModel]) -> None:
         """Add a message from an AI model. If the message has a model_dump method, which
@@ -293,10 +1097,10 @@ class MessageSet:
         """
         if hasattr(message, "model_dump"):
             _: dict = message.model_dump()
-            self.messages.append(AssistantMessage(content=str(_), additional_kwargs=_))
+            self.messages.append(MessageRecord("assistant", str(_), _))
             return
 
-        self.messages.append(AssistantMessage(content=message))
+        self.messages.append(MessageRecord("assistant", message))
 
     def add_from_message_set(self, message_set: "MessageSet") -> None:
         """Add messages from another message.
@@ -0,0 +1,176 @@
+"""HTTP helpers shared by the llm providers.
+
+Providers should not call `requests.post` directly, because every call opens a new
+TCP+TLS connection. Use `get_session(url)` or `get_async_client(url)` instead, they
+return a keep-alive client pooled by base url. The pool settings can be configured by
+`pne_config.http_*` before the first request, eg:
+
+```python
+from promptulate.config import pne_config
+
+pne_config.http_pool_maxsize = 200
+pne_config.http_timeout = 60
+```
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from promptulate.config import pne_config
+from promptulate.utils.singleton import Singleton
+
+__all__ = [
+    "get_httpx_mounts",
+    "build_async_client",
+    "build_session",
+    "HTTPClientPool",
+    "get_session",
+    "get_async_client",
+    "aclose_async_clients",
+]
+
+
+def _get_httpx_limits() -> httpx.Limits:
+    keepalive = pne_config.http_pool_maxsize if pne_config.http_keep_alive else 0
+    return httpx.Limits(
+        max_connections=pne_config.http_pool_maxsize,
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=pne_config.http_keep_alive_expiry,
+    )
+
+
+def get_httpx_mounts(
+    proxies: Optional[dict],
+) -> Optional[Dict[str, httpx.AsyncHTTPTransport]]:
+    """Convert requests style proxies to httpx mounts.
+
+    Args:
+        proxies(Optional[dict]): requests style proxies, eg:
+            {"http": "http://127.0.0.1:7890", "https": "http://127.0.0.1:7890"}
+
+    Returns:
+        httpx mounts if proxies is provided, otherwise None.
+    """
+    if not proxies:
+        return None
+
+    return {
+        f"{scheme}://": httpx.AsyncHTTPTransport(proxy=url, limits=_get_httpx_limits())
+        for scheme, url in proxies.items()
+    }
+
+
+def build_async_client(
+    proxies: Optional[dict] = None, timeout: Optional[float] = None
+) -> httpx.AsyncClient:
+    """Build a non-blocking http client with the pool settings of pne_config.
+
+    Args:
+        proxies(Optional[dict]): requests style proxies, see `pne_config.proxies`.
+        timeout(Optional[float]): request timeout in seconds, None means no timeout.
+
+    Returns:
+        httpx.AsyncClient
+    """
+    return httpx.AsyncClient(
+        mounts=get_httpx_mounts(proxies),
+        limits=_get_httpx_limits(),
+        timeout=timeout,
+    )
+
+
+def build_session() -> requests.Session:
+    """Build a requests session with the pool settings of pne_config."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pne_config.http_pool_connections,
+        pool_maxsize=pne_config.http_pool_maxsize,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not pne_config.http_keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def _get_base_url(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _get_proxies_key(proxies: Optional[dict]) -> Tuple:
+    return tuple(sorted(proxies.items())) if proxies else ()
+
+
+class HTTPClientPool(metaclass=Singleton):
+    """Store keep-alive http clients by base url. requests.Session is shared by all
+    threads, httpx.AsyncClient is bound to the event loop which creates it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        # event loop -> {(base_url, proxies): httpx.AsyncClient}
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def get_session(self, url: str) -> requests.Session:
+        base_url = _get_base_url(url)
+        with self._lock:
+            if base_url not in self._sessions:
+                self._sessions[base_url] = build_session()
+            return self._sessions[base_url]
+
+    def get_async_client(
+        self, url: str, proxies: Optional[dict] = None
+    ) -> httpx.AsyncClient:
+        key = (_get_base_url(url), _get_proxies_key(proxies))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            if key not in clients or clients[key].is_closed:
+                clients[key] = build_async_client(
+                    proxies, timeout=pne_config.http_timeout
+                )
+            return clients[key]
+
+    async def aclose(self) -> None:
+        """Close the async clients of the running event loop. Call it before the
+        event loop is closed, eg: at the end of the coroutine passed to
+        `asyncio.run`."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients: dict = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+    def close(self) -> None:
+        """Close all sessions. Async clients of other event loops are dropped
+        without closing, use `aclose` to close them in their event loop. It will
+        rebuild clients with the latest pne_config when the next request comes."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._async_clients = weakref.WeakKeyDictionary()
+
+
+def get_session(url: str) -> requests.Session:
+    """Get the pooled keep-alive requests session of the base url."""
+    return HTTPClientPool().get_session(url)
+
+
+def get_async_client(url: str, proxies: Optional[dict] = None) -> httpx.AsyncClient:
+    """Get the pooled keep-alive httpx client of the base url in the running event
+    loop."""
+    return HTTPClientPool().get_async_client(url, proxies)
+
+
+async def aclose_async_clients() -> None:
+    """Close the pooled httpx clients of the running event loop."""
+    await HTTPClientPool().aclose()
@@ -7,11 +7,24 @@ from json.decoder import (
     py_scanstring,
 )
 from json.scanner import py_make_scanner
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
-from httpcore import stream
 from pydantic import BaseModel
 
+from promptulate.utils.logger import logger
+
 
 class FixResult(NamedTuple):
     success: bool
@@ -372,31 +385,411 @@ def change_model(model: BaseModel) -> BaseModel:
     return new_model
 
 
-def stream_to_model(response: stream, model: BaseModel) -> stream:
-    """stream response to model instance
+# parser modes of StreamJSONParser
+_VALUE, _KEY, _COLON, _COMMA, _STRING, _BARE = range(6)
+_WHITESPACE = " \t\r\n"
+_ESCAPES = {
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+_BARE_VALUES = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "True": True,
+    "False": False,
+    "None": None,
+}
+
+
+def _convert_bare(token: str) -> Any:
+    """Convert an unquoted token to number, bool, None or str."""
+    token = token.strip()
+    if token in _BARE_VALUES:
+        return _BARE_VALUES[token]
+    try:
+        return json.loads(token)
+    except ValueError:
+        return token
+
+
+def _snapshot(value: Any) -> Any:
+    """Copy the containers, so the snapshot is not changed by the next chunks."""
+    if isinstance(value, dict):
+        return {k: _snapshot(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_snapshot(v) for v in value]
+    return value
+
+
+class StreamJSONParser:
+    """Incremental JSON parser for LLM streams. It keeps the state between chunks, so
+    every character is scanned once, and the partial value is available after every
+    chunk: containers and strings are exposed while they are being parsed, numbers
+    and literals are exposed when they are finished.
+
+    It never raises on malformed input. Text before the first object or array, such
+    as markdown fences, and text after it are ignored. Single quoted strings,
+    unquoted keys and values, missing commas and trailing commas are tolerated.
+
+    ```python
+    parser = StreamJSONParser()
+    for chunk in ['```json{"name": "Jo', 'hn", "age": 3', "0}```"]:
+        parser.feed(chunk)
+        print(parser.value)
+    # {'name': 'Jo'}
+    # {'name': 'John'}
+    # {'name': 'John', 'age': 30}
+    ```
+    """
+
+    def __init__(self):
+        self.value: Optional[Union[dict, list]] = None
+        """The partial value of the root object or array."""
+        self.done: bool = False
+        """Whether the root object or array is closed."""
+        self.changed_keys: Set[str] = set()
+        """Keys of the root object changed by the last feed."""
+
+        # frame is [container, key], key is the current key of a dict
+        self._stack: List[list] = []
+        self._mode: int = _VALUE
+        self._changed: bool = False
+        # string state
+        self._quote: str = '"'
+        self._pieces: List[str] = []
+        self._escape: Optional[str] = None
+        self._is_key: bool = False
+        self._slot: Optional[Tuple[Union[dict, list], Any]] = None
+
+    def feed(self, chunk: str) -> bool:
+        """Parse the next chunk.
+
+        Args:
+            chunk(str): the next text of the stream.
+
+        Returns:
+            bool: whether the value has changed.
+        """
+        self._changed = False
+        self.changed_keys = set()
+        if self.done or not chunk:
+            return False
+
+        if self.value is None:
+            start = min(
+                (i for i in (chunk.find("{"), chunk.find("[")) if i != -1),
+                default=-1,
+            )
+            if start == -1:
+                return False
+            chunk = chunk[start:]
+
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            mode = self._mode
+            if mode == _STRING:
+                i = self._parse_string(chunk, i)
+                continue
+            if mode == _BARE:
+                i = self._parse_bare(chunk, i)
+                continue
+
+            char = chunk[i]
+            if char in _WHITESPACE:
+                i += 1
+            elif mode == _VALUE:
+                i = self._parse_value(char, i)
+            elif mode == _KEY:
+                i = self._parse_key(char, i)
+            elif mode == _COLON:
+                if char == ":":
+                    self._mode = _VALUE
+                    i += 1
+                elif char in "}]":
+                    self._close()
+                    i += 1
+                else:
+                    # missing colon
+                    self._mode = _VALUE
+            else:
+                i = self._parse_comma(char, i)
+
+        if self._mode == _STRING and not self._is_key:
+            self._put_string()
+        return self._changed
+
+    def close(self) -> bool:
+        """Finish the unterminated string or token at the end of the stream.
+
+        Returns:
+            bool: whether the value has changed.
+        """
+        self._changed = False
+        self.changed_keys = set()
+        if self._mode == _STRING and not self._is_key:
+            self._put_string()
+        elif self._mode == _BARE and not self._is_key:
+            self._set("".join(self._pieces), bare=True)
+        self._mode = _COMMA
+        return self._changed
+
+    def _parse_value(self, char: str, i: int) -> int:
+        if char == "{" or char == "[":
+            container: Union[dict, list] = {} if char == "{" else []
+            if self._stack:
+                self._set(container)
+            else:
+                self.value = container
+                self._changed = True
+            self._stack.append([container, None])
+            self._mode = _KEY if char == "{" else _VALUE
+        elif char == '"' or char == "'":
+            self._start_string(char, is_key=False)
+        elif char in "}]":
+            # trailing comma
+            self._close()
+        elif char == ",":
+            # missing value
+            self._mode = _KEY if isinstance(self._stack[-1][0], dict) else _VALUE
+        else:
+            self._pieces, self._is_key, self._mode = [], False, _BARE
+            return i
+        return i + 1
+
+    def _parse_key(self, char: str, i: int) -> int:
+        if char == '"' or char == "'":
+            self._start_string(char, is_key=True)
+        elif char in "}]":
+            self._close()
+        elif char != ",":
+            self._pieces, self._is_key, self._mode = [], True, _BARE
+            return i
+        return i + 1
+
+    def _parse_comma(self, char: str, i: int) -> int:
+        is_dict = isinstance(self._stack[-1][0], dict)
+        if char == ",":
+            self._mode = _KEY if is_dict else _VALUE
+            return i + 1
+        if char in "}]":
+            self._close()
+            return i + 1
+        # missing comma
+        self._mode = _KEY if is_dict else _VALUE
+        return i
+
+    def _start_string(self, quote: str, is_key: bool) -> None:
+        self._quote, self._pieces, self._escape = quote, [], None
+        self._is_key, self._mode = is_key, _STRING
+        if not is_key:
+            self._slot = self._set("")
+
+    def _parse_string(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        if self._escape is not None:
+            i = self._parse_escape(chunk, i)
+            if self._escape is not None:
+                return n
+
+        quote_index = chunk.find(self._quote, i)
+        escape_index = chunk.find("\\", i)
+        if quote_index == -1 and escape_index == -1:
+            self._pieces.append(chunk[i:])
+            return n
+        if escape_index != -1 and (quote_index == -1 or escape_index < quote_index):
+            self._pieces.append(chunk[i:escape_index])
+            self._escape = ""
+            return self._parse_escape(chunk, escape_index + 1)
+
+        self._pieces.append(chunk[i:quote_index])
+        text = "".join(self._pieces)
+        self._pieces = []
+        if self._is_key:
+            self._stack[-1][1] = text
+            self._mode = _COLON
+        else:
+            self._put_string(text)
+            self._slot = None
+            self._mode = _COMMA
+        return quote_index + 1
+
+    def _parse_escape(self, chunk: str, i: int) -> int:
+        """Parse the escape sequence after the backslash, it may be split by chunks."""
+        n = len(chunk)
+        while i < n:
+            self._escape += chunk[i]
+            i += 1
+            escape = self._escape
+            if escape[0] != "u":
+                self._pieces.append(_ESCAPES.get(escape, escape))
+                self._escape = None
+                return i
+            if len(escape) == 5:
+                try:
+                    self._pieces.append(chr(int(escape[1:], 16)))
+                except ValueError:
+                    self._pieces.append(escape)
+                self._escape = None
+                return i
+        return i
+
+    def _put_string(self, text: Optional[str] = None) -> None:
+        """Expose the string which is being parsed."""
+        if text is None:
+            text = "".join(self._pieces)
+            self._pieces = [text]
+        if self._slot is None:
+            return
+        container, key = self._slot
+        if container[key] != text:
+            container[key] = text
+            self._mark_changed()
+
+    def _parse_bare(self, chunk: str, i: int) -> int:
+        n = len(chunk)
+        stops = ":,}]\n" if self._is_key else ",}]\n"
+        j = i
+        while j < n and chunk[j] not in stops:
+            # a quote after whitespace starts the next key or value, eg: the comma
+            # is missing in {"a": 1 "b": 2}
+            if chunk[j] in "\"'" and not self._is_key:
+                previous = chunk[j - 1] if j > i else "".join(self._pieces)[-1:]
+                if previous.isspace():
+                    break
+            j += 1
+        self._pieces.append(chunk[i:j])
+        if j == n:
+            return n
+
+        token = "".join(self._pieces)
+        self._pieces = []
+        if self._is_key:
+            self._stack[-1][1] = token.strip().strip("'\"")
+            self._mode = _COLON
+        else:
+            self._set(token, bare=True)
+            self._mode = _COMMA
+        return j + 1 if chunk[j] == "\n" else j
+
+    def _set(self, value: Any, bare: bool = False) -> Tuple[Union[dict, list], Any]:
+        """Set the value into the current container, return its slot."""
+        if bare:
+            if not value.strip():
+                return None
+            value = _convert_bare(value)
+        container, key = self._stack[-1]
+        if isinstance(container, dict):
+            if key is None:
+                return None
+            container[key] = value
+        else:
+            key = len(container)
+            container.append(value)
+        self._mark_changed()
+        return container, key
+
+    def _close(self) -> None:
+        self._stack.pop()
+        if self._stack:
+            self._mode = _COMMA
+        else:
+            self.done = True
+            self._changed = True
+
+    def _mark_changed(self) -> None:
+        self._changed = True
+        # the current key of the root object is the key of the changed value
+        root, key = self._stack[0]
+        if isinstance(root, dict):
+            self.changed_keys.add(key)
+
+
+def _get_field_names(model: Type[BaseModel]) -> List[str]:
+    if hasattr(model, "model_fields"):
+        return list(model.model_fields)
+    return list(model.__fields__)
+
+
+def _build_partial_model(model: Type[BaseModel], values: Dict[str, Any]) -> BaseModel:
+    """Build the model without validation, missing fields are None."""
+    values = {name: values.get(name) for name in _get_field_names(model)}
+    if hasattr(model, "model_construct"):
+        return model.model_construct(**values)
+    return model.construct(**values)
+
+
+def _validate_model(model: Type[BaseModel], values: Dict[str, Any]) -> BaseModel:
+    if hasattr(model, "model_validate"):
+        return model.model_validate(values)
+    return model.parse_obj(values)
+
+
+def stream_to_model(
+    response: Iterable[Any], model: Type[BaseModel]
+) -> Iterator[BaseModel]:
+    """Parse the stream response to instances of the model incrementally. A partial
+    model is yielded only when a field value changes, its fields which are not
+    finished are None. When the JSON object is finished, the model is validated, and
+    the validated model is yielded if it passes. Malformed output never raises, the
+    last partial model is kept instead.
+
+    Like `match_keys`, keys which are not fields of the model are ignored and the
+    missing fields of a partial model are None. Unlike it, the fields are not made
+    optional for the final model, so a model missing required fields is not
+    validated and the last partial model is the result.
 
     Args:
-        response (stream): stream response
-        model (BaseModel): pydantic model
+        response(Iterable): stream response, chunks can be str or messages with
+            content.
+        model(Type[BaseModel]): pydantic model, both pydantic v1 and v2 are
+            supported.
 
     Returns:
-        stream: stream response
+        Iterator[BaseModel]: instances of the model.
     """
-    response_model = change_model(model)
-    Util = JSONFixer()
-    str = ""
-    json_started = False
-    for i in response:
-        if i == "{":
-            json_started = True
-        if i == "}":
-            json_started = False
-        if json_started:
-            str += i
-            try:
-                source = Util.fix(str)
-                result = match_keys(source.line, model)
-                result = response_model(**result)
-                yield result
-            except Exception as e:
-                raise e
+    parser = StreamJSONParser()
+    fields: Set[str] = set(_get_field_names(model))
+    values: Dict[str, Any] = {}
+    # whether values have changed since the last yield
+    pending = False
+
+    def _update() -> bool:
+        if not isinstance(parser.value, dict):
+            return False
+        keys = parser.changed_keys & fields
+        for key in keys:
+            values[key] = _snapshot(parser.value.get(key))
+        return bool(keys)
+
+    for chunk in response:
+        content = getattr(chunk, "content", chunk)
+        if not isinstance(content, str):
+            continue
+        if parser.feed(content) and _update():
+            pending = True
+            if not parser.done:
+                pending = False
+                yield _build_partial_model(model, values)
+        if parser.done:
+            break
+
+    if not parser.done and parser.close() and _update():
+        pending = True
+    if not isinstance(parser.value, dict):
+        logger.warning(f"[pne json] no JSON object of {model.__name__} in stream.")
+        return
+
+    try:
+        yield _validate_model(model, values)
+    except Exception as e:
+        logger.warning(f"[pne json] failed to validate {model.__name__}: {e}")
+        if pending:
+            yield _build_partial_model(model, values)
@@ -0,0 +1,223 @@
+"""Compact binary serialization of messages.
+
+Messages are stored by columns, so the hot path only runs a few C level operations
+no matter how long the history is:
+
+- roles: 1 byte per message.
+- timestamps: 8 bytes float per message.
+- contents: all the contents are joined and encoded to utf-8 once, with the end
+    offset of every content.
+- meta: the additional kwargs, which are sparse and small, encoded by msgpack if it
+    is installed, otherwise by json.
+
+The payload can be compressed by zstd or zlib. The serialized bytes start with a
+header which records the version, the meta codec and the compression, so they can
+be loaded without any parameter.
+
+Format: b"PNE" + version(1 byte) + codec(1 byte) + compression(1 byte) + payload
+Payload: count(uint32) + roles + timestamps + offsets(uint64) + text size(uint64)
+    + text + meta size(uint32) + meta
+"""
+
+import functools
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Any, List, Optional, Tuple
+
+from typing_extensions import Literal
+
+__all__ = ["dump_messages", "load_messages", "is_serialized"]
+
+Codec = Literal["msgpack", "json"]
+Compression = Literal["zstd", "zlib"]
+
+ROLES: Tuple[str, ...] = ("system", "user", "assistant", "completion")
+_ROLE_IDS = {role: i for i, role in enumerate(ROLES)}
+
+_MAGIC = b"PNE"
+_VERSION = 1
+_HEADER_SIZE = 6
+_CODECS = {"json": 0, "msgpack": 1}
+_COMPRESSIONS = {None: 0, "zlib": 1, "zstd": 2}
+_CODEC_NAMES = {v: k for k, v in _CODECS.items()}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSIONS.items()}
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError(
+            "Could not import msgpack python package. "
+            "This is needed in order to serialize by msgpack. "
+            "Please install it with `pip install msgpack`."
+        )
+    return msgpack
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Could not import zstandard python package. "
+            "This is needed in order to compress by zstd. "
+            "Please install it with `pip install zstandard`."
+        )
+    return zstandard
+
+
+@functools.lru_cache(maxsize=None)
+def _get_default_codec() -> Codec:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return "json"
+    return "msgpack"
+
+
+def _encode(obj: Any, codec: Codec) -> bytes:
+    if codec == "msgpack":
+        return _import_msgpack().packb(obj, use_bin_type=True, default=str)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def _decode(data: bytes, codec: Codec) -> Any:
+    if codec == "msgpack":
+        return _import_msgpack().unpackb(data, raw=False, strict_map_key=False)
+    return json.loads(data)
+
+
+def _compress(data: bytes, compression: Optional[Compression]) -> bytes:
+    if compression == "zstd":
+        return _import_zstandard().ZstdCompressor().compress(data)
+    if compression == "zlib":
+        return zlib.compress(data, 1)
+    return data
+
+
+def _decompress(data: bytes, compression: Optional[Compression]) -> bytes:
+    if compression == "zstd":
+        return _import_zstandard().ZstdDecompressor().decompress(data)
+    if compression == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+def _to_bytes(values: array) -> bytes:
+    """Numbers are stored in little endian."""
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def dump_messages(
+    roles: List[str],
+    contents: List[str],
+    timestamps: List[float],
+    meta: Any,
+    codec: Optional[Codec] = None,
+    compression: Optional[Compression] = None,
+) -> bytes:
+    """Serialize the columns of messages to bytes.
+
+    Args:
+        roles(List[str]): role of every message.
+        contents(List[str]): content of every message.
+        timestamps(List[float]): created timestamp of every message.
+        meta(Any): plain data, such as additional kwargs. Objects which can not be
+            serialized are converted to str.
+        codec(Optional[str]): msgpack or json to encode meta, use msgpack if it is
+            installed.
+        compression(Optional[str]): zstd, zlib or None.
+
+    Returns:
+        bytes: serialized messages with header.
+    """
+    codec = codec or _get_default_codec()
+    if codec not in _CODECS:
+        raise ValueError(f"Unknown codec: {codec}")
+    if compression not in _COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    text: bytes = "".join(contents).encode("utf-8", "surrogatepass")
+    meta_data: bytes = _encode(meta, codec)
+    payload = b"".join(
+        (
+            struct.pack("<I", len(roles)),
+            bytes(map(_ROLE_IDS.__getitem__, roles)),
+            _to_bytes(array("d", timestamps)),
+            _to_bytes(array("Q", accumulate(map(len, contents)))),
+            struct.pack("<Q", len(text)),
+            text,
+            struct.pack("<I", len(meta_data)),
+            meta_data,
+        )
+    )
+    header = _MAGIC + bytes((_VERSION, _CODECS[codec], _COMPRESSIONS[compression]))
+    return header + _compress(payload, compression)
+
+
+def is_serialized(data: Any) -> bool:
+    """Whether the data is serialized by `dump_messages`."""
+    if not isinstance(data, (bytes, bytearray)):
+        return False
+    return len(data) >= _HEADER_SIZE and data[: len(_MAGIC)] == _MAGIC
+
+
+def load_messages(data: bytes) -> Tuple[List[str], List[str], List[float], Any]:
+    """Deserialize bytes which are serialized by `dump_messages`.
+
+    Returns:
+        Tuple: roles, contents, timestamps and meta.
+    """
+    if not is_serialized(data):
+        raise ValueError("Invalid data, it is not serialized by promptulate.")
+
+    version, codec_id, compression_id = data[len(_MAGIC) : _HEADER_SIZE]
+    if (
+        version != _VERSION
+        or codec_id not in _CODEC_NAMES
+        or compression_id not in _COMPRESSION_NAMES
+    ):
+        raise ValueError(
+            f"Unsupported serialization header: {bytes(data[:_HEADER_SIZE])!r}"
+        )
+
+    payload = memoryview(
+        _decompress(data[_HEADER_SIZE:], _COMPRESSION_NAMES[compression_id])
+    )
+    (n,) = struct.unpack_from("<I", payload, 0)
+    pos = 4
+    roles: List[str] = list(map(ROLES.__getitem__, payload[pos : pos + n]))
+    pos += n
+    timestamps: List[float] = _from_bytes("d", payload[pos : pos + 8 * n]).tolist()
+    pos += 8 * n
+    offsets = _from_bytes("Q", payload[pos : pos + 8 * n])
+    pos += 8 * n
+    (text_size,) = struct.unpack_from("<Q", payload, pos)
+    pos += 8
+    text: str = str(payload[pos : pos + text_size], "utf-8", "surrogatepass")
+    pos += text_size
+    (meta_size,) = struct.unpack_from("<I", payload, pos)
+    pos += 4
+    meta = _decode(bytes(payload[pos : pos + meta_size]), _CODEC_NAMES[codec_id])
+
+    starts = [0, *offsets[:-1]] if n else []
+    contents: List[str] = list(map(text.__getitem__, map(slice, starts, offsets)))
+    return roles, contents, timestamps, meta
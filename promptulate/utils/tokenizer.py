@@ -0,0 +1,77 @@
+"""Count tokens of text with the tokenizer of a model.
+
+tiktoken is used if it is installed, the encoding is selected by the model name and
+falls back to cl100k_base for the models unknown to tiktoken. If tiktoken is not
+installed, tokens are estimated by characters.
+"""
+
+import functools
+from typing import Callable, Optional
+
+from promptulate.utils.logger import logger
+
+__all__ = ["Tokenizer", "get_tokenizer", "TOKENS_PER_MESSAGE"]
+
+Tokenizer = Callable[[str], int]
+"""A tokenizer counts the tokens of a text."""
+
+TOKENS_PER_MESSAGE = 4
+"""Tokens of the role and separators of every chat message."""
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+def _estimate(text: str) -> int:
+    return len(text) // 4 + 1 if text else 0
+
+
+def _get_encoding_name(model: Optional[str]) -> str:
+    try:
+        # litellm ships the encoding files and sets TIKTOKEN_CACHE_DIR, so the
+        # common encodings can be loaded offline.
+        import litellm.litellm_core_utils.default_encoding  # noqa: F401
+    except ImportError:
+        pass
+
+    import tiktoken
+
+    if model:
+        try:
+            return tiktoken.encoding_name_for_model(model.split("/")[-1])
+        except KeyError:
+            pass
+    return DEFAULT_ENCODING
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding_tokenizer(encoding_name: str) -> Tokenizer:
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_tokens(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count_tokens
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Get the tokenizer of the model. Models with the same encoding share the same
+    tokenizer object, so it can be used as a cache key.
+
+    Args:
+        model(Optional[str]): model name, eg: gpt-4o, deepseek/deepseek-chat. Use
+            the default encoding if it is not specified or unknown.
+
+    Returns:
+        Tokenizer: a function counts the tokens of a text.
+    """
+    try:
+        return _get_encoding_tokenizer(_get_encoding_name(model))
+    except Exception as e:
+        logger.warning(
+            f"[pne tokenizer] can not load tokenizer of {model}, estimate tokens by "
+            f"characters instead, reason: {e}"
+        )
+        return _estimate
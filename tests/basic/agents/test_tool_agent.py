@@ -1,5 +1,9 @@
+import json
+from typing import Any, List, Optional
+
 from promptulate.agents.tool_agent.agent import ToolAgent
 from promptulate.llms.base import BaseLLM
+from promptulate.pydantic_v1 import BaseModel, Field
 from promptulate.tools.base import BaseToolKit
 
 
@@ -53,3 +57,58 @@ def test_init_by_tool_and_kit():
     llm = FakeLLM()
     agent = ToolAgent(llm=llm, tools=[MockToolKit(), fake_tool_1, fake_tool_2])
     assert len(agent.tool_manager.tools) == 4
+
+
+class LLMResponse(BaseModel):
+    city: str = Field(description="City name")
+    temperature: float = Field(description="Temperature in Celsius")
+
+
+class StructuredLLM(BaseLLM):
+    """Finish with the given content, and record the calls."""
+
+    content: Any = {"city": "Shanghai", "temperature": 25}
+    calls: List[dict] = []
+
+    def _predict(self, prompts, *args, **kwargs):
+        pass
+
+    def get_response_format(self, output_schema=None) -> Optional[dict]:
+        if output_schema is None:
+            return {"type": "json_object"}
+        return {"type": "json_schema", "name": output_schema.__name__}
+
+    def __call__(self, instruction: str, *args, **kwargs):
+        self.calls.append(kwargs)
+        if "##User input" in instruction:
+            return json.dumps({"city": "Beijing", "temperature": 20})
+        return json.dumps(
+            {
+                "analysis": "finish",
+                "action": {"name": "finish", "args": {"content": self.content}},
+            }
+        )
+
+
+def test_run_with_output_schema():
+    llm = StructuredLLM(calls=[])
+    agent = ToolAgent(llm=llm)
+
+    result = agent.run("weather in Shanghai?", output_schema=LLMResponse)
+    assert result == LLMResponse(city="Shanghai", temperature=25)
+    # the final step generates the schema, no extra llm call
+    assert llm.calls == [{"response_format": {"type": "json_object"}}]
+    assert "temperature" in agent.conversation_prompt
+
+    # the result is formatted by an extra llm call if it does not match the schema
+    llm = StructuredLLM(calls=[], content={"text": "sunny"})
+    result = ToolAgent(llm=llm).run("weather in Shanghai?", output_schema=LLMResponse)
+    assert result == LLMResponse(city="Beijing", temperature=20)
+    assert llm.calls[-1] == {
+        "response_format": {"type": "json_schema", "name": "LLMResponse"}
+    }
+
+    # no output_schema
+    llm = StructuredLLM(calls=[], content="sunny")
+    assert ToolAgent(llm=llm).run("weather in Shanghai?") == "sunny"
+    assert llm.calls == [{}]
@@ -5,7 +5,7 @@ from promptulate.llms import ChatOpenAI
 
 
 class TestLLMHook(TestCase):
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_instance_hook(self, mock_post):
         mock_response = mock.Mock()
         mock_response.status_code = 200
@@ -50,7 +50,7 @@ class TestLLMHook(TestCase):
         self.assertTrue(start_flag)
         self.assertTrue(result_flag)
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_component_hook(self, mock_post):
         mock_response = mock.Mock()
         mock_response.status_code = 200
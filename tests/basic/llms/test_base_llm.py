@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from promptulate.llms import BaseLLM
+from promptulate.schema import AssistantMessage, MessageSet
+
+
+class EchoLLM(BaseLLM):
+    llm_type: str = "echo"
+
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
+        content = messages.messages[-1].content
+        if content == "error":
+            raise ValueError("mock error")
+        time.sleep(0.01)
+        return AssistantMessage(content=content)
+
+
+def _build_messages(contents):
+    return [
+        MessageSet.from_listdict_data([{"role": "user", "content": content}])
+        for content in contents
+    ]
+
+
+def test_batch_keeps_order():
+    llm = EchoLLM()
+    contents = [str(i) for i in range(20)]
+
+    results = llm.batch(_build_messages(contents), max_concurrency=4)
+    assert [result.content for result in results] == contents
+
+
+def test_batch_bounded_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    class CountLLM(EchoLLM):
+        def _predict(self, messages: MessageSet, *args, **kwargs):
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return AssistantMessage(content="ok")
+
+    CountLLM().batch(_build_messages(["a"] * 12), max_concurrency=3)
+    assert max_in_flight <= 3
+
+
+def test_batch_errors_per_item():
+    llm = EchoLLM()
+
+    results = llm.batch(_build_messages(["a", "error", "c"]))
+    assert results[0].content == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2].content == "c"
+
+    with pytest.raises(ValueError):
+        llm.batch(_build_messages(["a", "error"]), return_exceptions=False)
+
+
+def test_abatch_cancels_pending_on_error():
+    done = []
+
+    class AsyncLLM(EchoLLM):
+        async def _apredict(self, messages: MessageSet, *args, **kwargs):
+            content = messages.messages[-1].content
+            if content == "bad":
+                raise ValueError("mock error")
+            await asyncio.sleep(0.3)
+            done.append(content)
+            return AssistantMessage(content=content)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await AsyncLLM().abatch(
+                _build_messages(["a", "bad", "b"]), return_exceptions=False
+            )
+        await asyncio.sleep(0.5)
+
+    asyncio.run(main())
+    assert done == []
+
+
+def test_abatch():
+    llm = EchoLLM()
+
+    results = asyncio.run(
+        llm.abatch(_build_messages(["a", "error", "c"]), max_concurrency=2)
+    )
+    assert results[0].content == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2].content == "c"
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from typing import ClassVar, List
+
+import pytest
+
+from promptulate.config import pne_config
+from promptulate.llms import BaseLLM
+from promptulate.llms.cache import InMemoryCache, LLMCache, SemanticCache, SQLiteCache
+from promptulate.schema import AssistantMessage, MessageSet
+
+
+class CountLLM(BaseLLM):
+    llm_type: str = "count"
+    model: str = "fake-model"
+    temperature: float = 0.0
+    calls: ClassVar[List[str]] = []
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        CountLLM.calls.clear()
+
+    @property
+    def counter(self) -> int:
+        return len(CountLLM.calls)
+
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
+        CountLLM.calls.append(messages.messages[-1].content)
+        return AssistantMessage(
+            content=f"response {self.counter}", additional_kwargs={"id": self.counter}
+        )
+
+
+def _messages(content: str = "hello") -> MessageSet:
+    return MessageSet.from_listdict_data([{"role": "user", "content": content}])
+
+
+def test_predict_with_cache(tmp_path):
+    cache = LLMCache(database_path=str(tmp_path / "cache.db"))
+    llm = CountLLM(cache=cache)
+
+    assert llm.predict(_messages()).content == "response 1"
+    result = llm.predict(_messages())
+    assert result.content == "response 1"
+    assert result.additional_kwargs == {"id": 1}
+    assert llm.counter == 1
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+    # different messages or sampling config are cached separately
+    assert llm.predict(_messages("bye")).content == "response 2"
+    llm.temperature = 1.0
+    assert llm.predict(_messages()).content == "response 3"
+
+
+def test_predict_without_cache():
+    llm = CountLLM()
+    llm.predict(_messages())
+    llm.predict(_messages())
+    assert llm.counter == 2
+
+
+def test_global_llm_cache():
+    cache = LLMCache(enable_disk=False)
+    pne_config.llm_cache = cache
+    try:
+        llm = CountLLM()
+        llm.predict(_messages())
+        llm.predict(_messages())
+        asyncio.run(llm.apredict(_messages()))
+        assert llm.counter == 1
+        assert cache.stats.hits == 2
+    finally:
+        pne_config.llm_cache = None
+
+
+def test_disk_tier_persistence(tmp_path):
+    database_path = str(tmp_path / "cache.db")
+    CountLLM(cache=LLMCache(database_path=database_path)).predict(_messages())
+
+    # A new process only has the disk tier.
+    cache = LLMCache(database_path=database_path)
+    llm = CountLLM(cache=cache)
+    assert llm.predict(_messages()).content == "response 1"
+    assert llm.counter == 0
+    assert cache.disk.stats.hits == 1
+    assert len(cache.memory) == 1
+
+
+def test_in_memory_cache_lru_and_ttl():
+    cache = InMemoryCache(max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+    cache = InMemoryCache(ttl=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+
+def _fake_embedding(texts):
+    """Questions about refund are similar, others are orthogonal."""
+    vectors = []
+    for text in texts:
+        if "refund" in text:
+            vectors.append([1.0, 0.1 * len(text) / 100, 0.0])
+        else:
+            vectors.append([0.0, 0.0, 1.0])
+    return vectors
+
+
+def test_semantic_cache():
+    pytest.importorskip("numpy")
+    cache = SemanticCache(embedding=_fake_embedding, threshold=0.9)
+    llm = CountLLM(cache=cache)
+
+    assert llm.predict(_messages("How can I get a refund?")).content == "response 1"
+    result = llm.predict(_messages("how do I ask for a refund"))
+    assert result.content == "response 1"
+    assert llm.counter == 1
+    assert cache.stats.hits == 1
+
+    assert llm.predict(_messages("What is your address?")).content == "response 2"
+
+    # different model config does not share the cache
+    llm.temperature = 1.0
+    assert llm.predict(_messages("How can I get a refund?")).content == "response 3"
+
+
+def test_semantic_cache_model_threshold_and_eviction():
+    pytest.importorskip("numpy")
+    cache = SemanticCache(
+        embedding=_fake_embedding,
+        threshold=0.9,
+        model_thresholds={"fake-model": 1.1},
+        max_entries=1,
+    )
+    llm = CountLLM(cache=cache)
+    llm.predict(_messages("refund"))
+    llm.predict(_messages("refund"))
+    assert llm.counter == 2
+    assert len(cache) == 1
+
+
+def test_semantic_cache_reuses_embedding_and_bounds_namespaces():
+    pytest.importorskip("numpy")
+    texts: List[str] = []
+
+    def embedding(batch: List[str]) -> List[List[float]]:
+        texts.extend(batch)
+        return _fake_embedding(batch)
+
+    cache = SemanticCache(embedding=embedding, threshold=0.9, max_namespaces=2)
+    llm = CountLLM(cache=cache)
+    llm.predict(_messages("How can I get a refund?"))
+    llm.predict(_messages("What is your address?"))
+    # the missed query is embedded once for both lookup and update
+    assert texts == ["How can I get a refund?", "What is your address?"]
+
+    for content in ("a", "b", "c"):
+        llm.predict(
+            MessageSet.from_listdict_data(
+                [
+                    {"role": "system", "content": content},
+                    {"role": "user", "content": "refund"},
+                ]
+            )
+        )
+    assert len(cache._indexes) == 2
@@ -18,6 +18,29 @@ def test_init_litellm():
         )
 
 
+def test_litellm_response_format():
+    class LLMResponse(pne.pydantic_v1.BaseModel):
+        city: str
+
+    llm = pne.LLMFactory.build("gpt-4o-mini")
+    assert llm.get_response_format()["type"] == "json_object"
+    response_format = llm.get_response_format(LLMResponse)
+    assert response_format["type"] == "json_schema"
+    unknown_llm = pne.LLMFactory.build("unknown-model")
+    assert unknown_llm.get_response_format(LLMResponse) is None
+
+    import litellm
+
+    with mock.patch("litellm.completion") as completion:
+        completion.return_value = litellm.ModelResponse(
+            choices=[{"message": {"role": "assistant", "content": '{"city": "a"}'}}]
+        )
+        llm("hello", response_format=response_format)
+        assert completion.call_args.kwargs["response_format"] == response_format
+        llm("hello")
+        assert "response_format" not in completion.call_args.kwargs
+
+
 def test_init_zhipu():
     with pytest.raises(KeyError) as e:
         model = pne.LLMFactory.build(model_name="zhipu/glm4")
@@ -43,7 +66,7 @@ def mock_response():
     return mock_resp
 
 
-@mock.patch("requests.post")
+@mock.patch("requests.Session.post")
 def test_call(mock_post, llm_factory, mock_response):
     # Use the mock response
     mock_post.return_value = mock_response
@@ -58,3 +81,23 @@ def test_call(mock_post, llm_factory, mock_response):
     result = llm_factory(prompt)
     assert result is not None
     assert "[start] This is a test [end]" in result
+
+
+def test_litellm_apredict():
+    import asyncio
+
+    from promptulate.schema import MessageSet
+
+    mock_resp = mock.Mock()
+    mock_resp.choices = [mock.Mock(message=mock.Mock(content="async response"))]
+    mock_resp.json.return_value = {"id": "fake"}
+
+    llm = pne.LLMFactory.build("gpt-4o", model_config={"temperature": 0})
+    with mock.patch(
+        "litellm.acompletion", new=mock.AsyncMock(return_value=mock_resp)
+    ) as mock_acompletion:
+        messages = MessageSet.from_listdict_data([{"role": "user", "content": "hi"}])
+        result = asyncio.run(llm.apredict(messages))
+
+    assert result.content == "async response"
+    assert mock_acompletion.call_args.kwargs["temperature"] == 0
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from promptulate.llms import BaseLLM, HedgedLLM, LLMFactory
+from promptulate.llms.hedge import LatencyWindow
+from promptulate.schema import AssistantMessage, MessageSet
+
+
+class SleepLLM(BaseLLM):
+    llm_type: str = "sleep"
+    name: str
+    delay: float = 0.0
+    fail: bool = False
+    calls: int = 0
+
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return AssistantMessage(content=self.name)
+
+    async def _apredict(self, messages: MessageSet, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return AssistantMessage(content=self.name)
+
+
+def _messages() -> MessageSet:
+    return MessageSet.from_listdict_data([{"role": "user", "content": "hello"}])
+
+
+def test_latency_window():
+    window = LatencyWindow(window_size=100)
+    assert window.quantile(0.95) is None
+    for i in range(200):
+        window.add(i)
+    assert len(window) == 100
+    assert window.quantile(0.95) == 195
+    assert window.quantile(1) == 199
+
+
+def test_primary_answers_in_time():
+    primary = SleepLLM(name="primary")
+    backup = SleepLLM(name="backup")
+    llm = HedgedLLM([primary, backup], hedge_delay=0.5)
+
+    assert llm.predict(_messages()).content == "primary"
+    assert backup.calls == 0
+
+
+def test_hedge_wins():
+    primary = SleepLLM(name="primary", delay=1)
+    backup = SleepLLM(name="backup")
+    llm = HedgedLLM([primary, backup], hedge_delay=0.1)
+
+    start = time.monotonic()
+    assert llm.predict(_messages()).content == "backup"
+    assert time.monotonic() - start < 0.8
+    assert primary.calls == 1
+
+
+def test_hedge_on_error():
+    primary = SleepLLM(name="primary", fail=True)
+    backup = SleepLLM(name="backup")
+    llm = HedgedLLM([primary, backup], hedge_delay=10)
+
+    start = time.monotonic()
+    assert llm.predict(_messages()).content == "backup"
+    assert time.monotonic() - start < 1
+
+
+def test_all_failed():
+    llms = [SleepLLM(name=str(i), fail=True) for i in range(3)]
+    llm = HedgedLLM(llms, hedge_delay=0.05)
+
+    with pytest.raises(ConnectionError):
+        llm.predict(_messages())
+    assert all(item.calls == 1 for item in llms)
+
+
+def test_hedge_delay_from_latency():
+    llm = HedgedLLM(
+        [SleepLLM(name="a"), SleepLLM(name="b")],
+        min_samples=2,
+        initial_hedge_delay=3,
+    )
+    assert llm.get_hedge_delay(0) == 3
+
+    for _ in range(2):
+        llm.predict(_messages())
+    assert llm.get_hedge_delay(0) < 1
+
+
+def test_hedge_delay_starts_after_queue():
+    primary = SleepLLM(name="primary", delay=0.2)
+    backup = SleepLLM(name="backup")
+    llm = HedgedLLM([primary, backup], hedge_delay=0.3, max_workers=1)
+
+    # the second request waits 0.2s in the queue, which does not trigger a hedge
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(llm.predict, _messages()) for _ in range(2)]
+        assert [future.result().content for future in futures] == ["primary"] * 2
+    assert backup.calls == 0
+
+
+def test_nested_hedged_llm():
+    inner = HedgedLLM(
+        [SleepLLM(name="slow", delay=1), SleepLLM(name="fast")],
+        hedge_delay=0.05,
+        max_workers=2,
+    )
+    llm = HedgedLLM([inner, SleepLLM(name="backup", delay=1)], hedge_delay=0.5)
+    assert llm.predict(_messages()).content == "fast"
+
+
+def test_async_hedge_cancels_loser():
+    primary = SleepLLM(name="primary", delay=1)
+    backup = SleepLLM(name="backup")
+    llm = HedgedLLM([primary, backup], hedge_delay=0.1)
+
+    start = time.monotonic()
+    assert asyncio.run(llm.apredict(_messages())).content == "backup"
+    assert time.monotonic() - start < 0.8
+
+
+def test_build_hedged():
+    llm = LLMFactory.build_hedged(["gpt-4o", "deepseek/deepseek-chat"], hedge_delay=1)
+    assert isinstance(llm, HedgedLLM)
+    assert len(llm.llms) == 2
+
+    with pytest.raises(ValueError):
+        LLMFactory.build_hedged(["gpt-4o"])
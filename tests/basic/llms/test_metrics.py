@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from promptulate.hook import Hook
+from promptulate.llms import BaseLLM
+from promptulate.llms.metrics import LatencyWindow, StreamMetrics, stream_metrics
+from promptulate.schema import AsyncStreamIterator, MessageSet, StreamIterator
+
+
+def parse_content(chunk):
+    return chunk, {}
+
+
+def _tokens():
+    time.sleep(0.02)
+    for token in ["Hello", " ", "world"]:
+        time.sleep(0.005)
+        yield token
+
+
+async def _atokens():
+    for token in ["Hello", " ", "world"]:
+        yield token
+
+
+class StreamLLM(BaseLLM):
+    llm_type: str = "stream"
+    model: str = "stream-model"
+
+    def _predict(self, messages: MessageSet, *args, **kwargs):
+        return StreamIterator(_tokens(), parse_content=parse_content)
+
+    async def _apredict(self, messages: MessageSet, *args, **kwargs):
+        return AsyncStreamIterator(_atokens(), parse_content=parse_content)
+
+
+def _messages() -> MessageSet:
+    return MessageSet.from_listdict_data([{"role": "user", "content": "hi"}])
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    stream_metrics.reset()
+    yield
+    stream_metrics.reset()
+
+
+def test_stream_hooks():
+    events = []
+
+    @Hook.on_llm_first_token(hook_type="instance")
+    def handle_first_token(*args, **kwargs):
+        events.append(("first_token", kwargs["token"], kwargs["ttft"]))
+
+    @Hook.on_llm_token(hook_type="instance")
+    def handle_token(*args, **kwargs):
+        events.append(("token", kwargs["token"], kwargs["index"]))
+
+    @Hook.on_llm_stream_end(hook_type="instance")
+    def handle_stream_end(*args, **kwargs):
+        events.append(("end", kwargs["result"], kwargs["stats"]))
+
+    llm = StreamLLM(hooks=[handle_first_token, handle_token, handle_stream_end])
+    assert list(llm.predict(_messages())) == ["Hello", " ", "world"]
+
+    assert events[0][:2] == ("first_token", "Hello")
+    assert events[0][2] >= 0.02
+    assert [event[1:] for event in events[1:4]] == [
+        ("Hello", 0),
+        (" ", 1),
+        ("world", 2),
+    ]
+    _, result, stats = events[4]
+    assert result == "Hello world"
+    assert stats.token_count == 3
+    assert len(stats.inter_token_latencies) == 2
+    assert stats.tokens_per_second > 0
+
+    for hook in [handle_first_token, handle_token, handle_stream_end]:
+        Hook.unregister_hook(hook)
+
+
+def test_stream_metrics():
+    llm = StreamLLM()
+    for _ in range(3):
+        list(llm.predict(_messages()))
+
+    metrics = stream_metrics.get("stream-model")
+    assert list(metrics) == ["StreamLLM(stream-model)"]
+    metrics = metrics["StreamLLM(stream-model)"]
+    assert metrics["count"] == 3
+    assert metrics["ttft"]["p50"] >= 0.02
+    assert metrics["inter_token_latency"]["p99"] >= 0.005
+    assert metrics["tokens_per_second"]["p50"] > 0
+
+
+def test_async_stream_metrics():
+    llm = StreamLLM()
+
+    async def main():
+        iterator = await llm.apredict(_messages())
+        return [token async for token in iterator]
+
+    assert asyncio.run(main()) == ["Hello", " ", "world"]
+    assert stream_metrics.get()["StreamLLM(stream-model)"]["count"] == 1
+
+
+def test_stream_metrics_error():
+    def broken():
+        yield "Hello"
+        raise ConnectionError("disconnected")
+
+    class BrokenLLM(StreamLLM):
+        def _predict(self, messages: MessageSet, *args, **kwargs):
+            return StreamIterator(broken(), parse_content=parse_content)
+
+    with pytest.raises(ConnectionError):
+        list(BrokenLLM().predict(_messages()))
+    assert stream_metrics.get()["BrokenLLM(stream-model)"]["errors"] == 1
+
+
+def test_latency_window_quantiles():
+    window = LatencyWindow(window_size=100)
+    assert window.quantiles() == {"p50": None, "p90": None, "p99": None}
+    for i in range(100):
+        window.add(i)
+    assert window.quantiles() == {"p50": 50, "p90": 90, "p99": 99}
+    assert StreamMetrics().get() == {}
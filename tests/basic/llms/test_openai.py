@@ -4,7 +4,7 @@ from promptulate.llms.openai import ChatOpenAI, OpenAI
 
 
 class TestOpenAI(TestCase):
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_call(self, mock_post):
         # Mock the API response
         mock_response = mock.Mock()
@@ -26,7 +26,7 @@ class TestOpenAI(TestCase):
         self.assertIsNotNone(result)
         self.assertTrue("[start] This is a test [end]" in result)
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_call_with_stop(self, mock_post):
         # Mock the API response
         mock_response = mock.Mock()
@@ -53,7 +53,7 @@ class TestOpenAI(TestCase):
 
 
 class TestOpenAIChat(TestCase):
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_call(self, mock_post):
         # Mock the API response
         mock_response = mock.Mock()
@@ -75,7 +75,7 @@ class TestOpenAIChat(TestCase):
         self.assertIsNotNone(result)
         self.assertTrue("[start] This is a test [end]" in result)
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_call_with_stop(self, mock_post):
         # Mock the API response
         mock_response = mock.Mock()
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from promptulate.llms import LLMFactory
+from promptulate.llms.rate_limit import RateLimiter, TokenBucket, get_rate_limiter
+from promptulate.schema import AssistantMessage, MessageSet, UserMessage
+
+
+def test_token_bucket():
+    bucket = TokenBucket(capacity=60, period=60)
+    assert bucket.get_wait_time(60) == 0
+    bucket.consume(60)
+    assert 0.9 < bucket.get_wait_time(1) <= 1
+
+    # larger than capacity waits for a full bucket instead of forever
+    assert bucket.get_wait_time(1000) <= 60
+
+
+def test_rate_limiter_rpm():
+    limiter = RateLimiter(rpm=600)  # a request every 0.1s after the burst
+    for _ in range(600):
+        limiter.acquire()
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_rate_limiter_tpm_shared_by_threads():
+    limiter = RateLimiter(tpm=6000)  # 100 tokens per second
+    limiter.acquire(6000)
+
+    threads = [threading.Thread(target=limiter.acquire, args=(10,)) for _ in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.25
+
+
+def test_rate_limiter_async():
+    limiter = RateLimiter(rpm=1200)
+    for _ in range(1200):
+        limiter.acquire()
+
+    start = time.monotonic()
+    asyncio.run(limiter.aacquire())
+    assert time.monotonic() - start >= 0.02
+
+
+def test_reconcile():
+    limiter = RateLimiter(tpm=6000)
+    limiter.acquire(100)
+    limiter.reconcile(estimated_tokens=100, actual_tokens=6000)
+    assert limiter._try_acquire(100) > 0
+
+
+def test_get_rate_limiter():
+    limiter = get_rate_limiter("openai", "gpt-4o-test", "key1", rpm=10)
+    assert get_rate_limiter("openai", "gpt-4o-test", "key1") is limiter
+    assert get_rate_limiter("openai", "gpt-4o-test", "key2") is not limiter
+    assert get_rate_limiter("openai", "gpt-4o-mini-test", "key1") is not limiter
+
+
+def test_factory_shares_rate_limiter():
+    model_config = {"rate_limit": {"rpm": 60, "tpm": 1000}, "temperature": 0}
+    llm1 = LLMFactory.build("gpt-4o", model_config=model_config)
+    llm2 = LLMFactory.build("gpt-4o", model_config=model_config)
+
+    assert llm1.rate_limiter is not None
+    assert llm1.rate_limiter is llm2.rate_limiter
+    assert llm1.rate_limiter.rpm == 60
+    assert "rate_limit" not in llm1._model_config
+    assert "rate_limit" in model_config
+
+    # the provider is resolved like litellm, so both names share the quota
+    llm3 = LLMFactory.build("openai/gpt-4o", model_config=model_config)
+    assert llm3.rate_limiter is llm1.rate_limiter
+
+
+def test_predict_acquires_rate_limiter():
+    llm = LLMFactory.build("gpt-4o-predict-test", model_config={"rate_limit": {}})
+    llm.rate_limiter = mock.Mock(spec=RateLimiter)
+    message = AssistantMessage(
+        content="hello", additional_kwargs={"usage": {"total_tokens": 42}}
+    )
+
+    with mock.patch.object(type(llm), "_predict", return_value=message):
+        llm.predict(MessageSet(messages=[UserMessage(content="hi")]))
+
+    llm.rate_limiter.acquire.assert_called_once()
+    estimated_tokens = llm.rate_limiter.acquire.call_args[0][0]
+    llm.rate_limiter.reconcile.assert_called_once_with(estimated_tokens, 42)
@@ -0,0 +1,106 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from promptulate.config import pne_config
+from promptulate.error import NetWorkError, OpenAIError
+from promptulate.llms.openai import ChatOpenAI
+from promptulate.llms.retry import RetryPolicy, get_retry_after
+
+
+def test_get_delay():
+    policy = RetryPolicy(initial_delay=1, max_delay=5, jitter=False)
+    assert [policy.get_delay(i) for i in range(4)] == [1, 2, 4, 5]
+
+    policy = RetryPolicy(initial_delay=1, max_delay=5)
+    assert all(0 <= policy.get_delay(i) <= 5 for i in range(10))
+
+
+def test_retry_after():
+    assert get_retry_after(OpenAIError("", 429, {"Retry-After": "3"})) == 3
+    assert get_retry_after(OpenAIError("", 429, {"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(OpenAIError("", 429)) is None
+
+    policy = RetryPolicy(max_delay=10)
+    e = OpenAIError("", 429, {"Retry-After": "100"})
+    assert policy.get_delay(0, e) == 10
+
+
+def test_retry_until_success():
+    policy = RetryPolicy(max_retries=3, initial_delay=0, jitter=False)
+    fn = mock.Mock(side_effect=[NetWorkError("test", status_code=503), "ok"])
+
+    assert policy.call(fn, 1, a=2) == "ok"
+    assert fn.call_count == 2
+    fn.assert_called_with(1, a=2)
+
+
+def test_non_retryable_error():
+    policy = RetryPolicy(initial_delay=0)
+
+    fn = mock.Mock(side_effect=OpenAIError("invalid api key", status_code=401))
+    with pytest.raises(OpenAIError):
+        policy.call(fn)
+    assert fn.call_count == 1
+
+    fn = mock.Mock(side_effect=ValueError("bad input"))
+    with pytest.raises(ValueError):
+        policy.call(fn)
+    assert fn.call_count == 1
+
+
+def test_retry_exhausted():
+    policy = RetryPolicy(max_retries=2, initial_delay=0)
+    fn = mock.Mock(side_effect=ConnectionError())
+
+    with pytest.raises(ConnectionError):
+        policy.call(fn)
+    assert fn.call_count == 3
+
+
+def test_async_retry():
+    policy = RetryPolicy(max_retries=3, initial_delay=0)
+    fn = mock.AsyncMock(side_effect=[TimeoutError(), TimeoutError(), "ok"])
+
+    assert asyncio.run(policy.acall(fn)) == "ok"
+    assert fn.call_count == 3
+
+
+@mock.patch("requests.Session.post")
+def test_chat_openai_retry(mock_post):
+    rate_limited = mock.Mock(
+        status_code=429, text="rate limited", headers={"Retry-After": "0"}
+    )
+    success = mock.Mock(status_code=200)
+    success.json.return_value = {
+        "choices": [{"message": {"role": "assistant", "content": "hello"}}]
+    }
+    mock_post.side_effect = [rate_limited, success]
+
+    llm = ChatOpenAI(retry_policy=RetryPolicy(initial_delay=0))
+    llm.set_private_api_key("my key")
+    assert llm("hi") == "hello"
+    assert mock_post.call_count == 2
+
+    mock_post.reset_mock()
+    mock_post.side_effect = [rate_limited, success]
+    llm = ChatOpenAI(enable_retry=False)
+    llm.set_private_api_key("my key")
+    with pytest.raises(OpenAIError):
+        llm("hi")
+    assert mock_post.call_count == 1
+
+
+def test_chat_openai_global_retry_policy():
+    policy = RetryPolicy(max_retries=1)
+    pne_config.retry_policy = policy
+    try:
+        assert ChatOpenAI()._get_retry_policy() is policy
+        assert ChatOpenAI(enable_retry=False)._get_retry_policy() is policy
+    finally:
+        pne_config.retry_policy = None
+
+    assert ChatOpenAI(enable_retry=False)._get_retry_policy() is None
+    llm = ChatOpenAI()
+    assert llm._get_retry_policy().max_retries == llm.retry_times
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+import promptulate as pne
+from promptulate.llms import BaseLLM, RouterLLM
+from promptulate.llms.router import BackendHealth
+from promptulate.schema import AssistantMessage, MessageSet
+
+
+class FakeLLM(BaseLLM):
+    llm_type: str = "fake"
+    name: str
+    delay: float = 0.0
+    fail: bool = False
+    calls: int = 0
+
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> AssistantMessage:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return AssistantMessage(content=self.name)
+
+    async def _apredict(self, messages: MessageSet, *args, **kwargs):
+        return self._predict(messages, *args, **kwargs)
+
+
+def _messages() -> MessageSet:
+    return MessageSet.from_listdict_data([{"role": "user", "content": "hello"}])
+
+
+def test_backend_health():
+    health = BackendHealth(alpha=0.5, recovery_time=0.1)
+    health.record_success(1.0)
+    health.record_success(3.0)
+    assert health.latency == 2.0
+    assert health.score(error_penalty=10) == 2.0
+
+    health.record_failure()
+    assert health.error_rate == pytest.approx(0.5, abs=0.05)
+    assert health.score(error_penalty=10) > 10
+
+    time.sleep(0.3)
+    assert health.error_rate < 0.1
+
+
+def test_route_to_fastest():
+    slow = FakeLLM(name="slow", delay=0.1)
+    fast = FakeLLM(name="fast")
+    llm = RouterLLM([slow, fast])
+
+    # every llm is tried once, then the fastest one is preferred
+    results = [llm.predict(_messages()).content for _ in range(5)]
+    assert results[:2] == ["slow", "fast"]
+    assert results[2:] == ["fast"] * 3
+    assert slow.calls == 1
+
+
+def test_failover():
+    down = FakeLLM(name="down", fail=True)
+    backup = FakeLLM(name="backup", delay=0.01)
+    llm = RouterLLM([down, backup])
+
+    assert llm.predict(_messages()).content == "backup"
+    assert llm.predict(_messages()).content == "backup"
+    assert down.calls == 1
+    assert llm.get_health()[0]["error_rate"] > 0
+
+
+def test_all_failed():
+    llm = RouterLLM([FakeLLM(name="a", fail=True), FakeLLM(name="b", fail=True)])
+    with pytest.raises(ConnectionError):
+        llm.predict(_messages())
+
+
+def test_async_failover():
+    llm = RouterLLM([FakeLLM(name="down", fail=True), FakeLLM(name="backup")])
+    assert asyncio.run(llm.apredict(_messages())).content == "backup"
+
+
+def test_router_in_aichat():
+    llm = RouterLLM([FakeLLM(name="down", fail=True), FakeLLM(name="backup")])
+    ai = pne.AIChat(custom_llm=llm)
+    assert ai.run("hello") == "backup"
+    assert llm("hello") == "backup"
+
+
+def test_build_from_model_names():
+    llm = RouterLLM(["gpt-4o", "deepseek/deepseek-chat"])
+    assert len(llm.llms) == 2
+    assert llm.get_health()[0]["llm"] == "LiteLLM(gpt-4o)"
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar, List
+
+import pytest
+
+from promptulate.llms import BaseLLM
+from promptulate.llms.singleflight import SingleFlight
+from promptulate.schema import AssistantMessage, MessageSet, StreamIterator
+
+
+class SlowLLM(BaseLLM):
+    llm_type: str = "slow"
+    model: str = "fake-model"
+    single_flight: bool = True
+    calls: ClassVar[List[str]] = []
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        SlowLLM.calls.clear()
+
+    def _predict(self, messages: MessageSet, stream: bool = False, *args, **kwargs):
+        SlowLLM.calls.append(messages.messages[-1].content)
+        time.sleep(0.2)
+        if stream:
+            return StreamIterator(
+                response_stream=iter(["a", "b", "c"]),
+                parse_content=lambda chunk: (chunk, {}),
+            )
+        return AssistantMessage(content=f"response {len(SlowLLM.calls)}")
+
+    async def _apredict(self, messages: MessageSet, *args, **kwargs):
+        SlowLLM.calls.append(messages.messages[-1].content)
+        await asyncio.sleep(0.2)
+        return AssistantMessage(content=f"response {len(SlowLLM.calls)}")
+
+
+def _messages(content: str = "hello") -> MessageSet:
+    return MessageSet.from_listdict_data([{"role": "user", "content": content}])
+
+
+def test_single_flight_do():
+    group = SingleFlight()
+    calls = []
+
+    def fn(x):
+        calls.append(x)
+        time.sleep(0.2)
+        return x * 2
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: group.do("key", fn, 1), range(5)))
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [2] * 5
+    assert sorted(shared for _, shared in results) == [False] + [True] * 4
+
+    # the key is released after the call is finished
+    assert group.do("key", fn, 2) == (4, False)
+
+
+def test_single_flight_error():
+    group = SingleFlight()
+    barrier = threading.Barrier(3)
+
+    def fn():
+        time.sleep(0.2)
+        raise ValueError("failed")
+
+    def call():
+        barrier.wait()
+        with pytest.raises(ValueError):
+            group.do("key", fn)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_single_flight_stream():
+    group = SingleFlight()
+
+    def fn():
+        time.sleep(0.2)
+        return StreamIterator(
+            response_stream=iter([1, 2, 3]), parse_content=lambda chunk: (chunk, {})
+        )
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(lambda _: group.do("key", fn), range(3)))
+
+    streams = [stream for stream, _ in results]
+    assert len({id(stream) for stream in streams}) == 3
+    assert next(streams[0]) == 1
+    assert list(streams[1]) == [1, 2, 3]
+    assert list(streams[0]) == [2, 3]
+    assert list(streams[2]) == [1, 2, 3]
+
+
+def test_predict_coalesced_by_threads():
+    llm = SlowLLM()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: llm.predict(_messages()), range(4)))
+
+    assert SlowLLM.calls == ["hello"]
+    assert {result.content for result in results} == {"response 1"}
+    assert len({id(result) for result in results}) == 4
+
+    # different messages are not coalesced
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.map(llm.predict, [_messages("a"), _messages("b")])
+    assert len(SlowLLM.calls) == 3
+
+
+def test_predict_stream_fan_out():
+    llm = SlowLLM()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        streams = list(
+            executor.map(lambda _: llm.predict(_messages(), stream=True), range(3))
+        )
+
+    assert SlowLLM.calls == ["hello"]
+    assert [list(stream) for stream in streams] == [["a", "b", "c"]] * 3
+
+
+def test_apredict_coalesced():
+    llm = SlowLLM()
+
+    async def main():
+        return await asyncio.gather(*[llm.apredict(_messages()) for _ in range(4)])
+
+    results = asyncio.run(main())
+    assert SlowLLM.calls == ["hello"]
+    assert {result.content for result in results} == {"response 1"}
+
+
+def test_single_flight_disabled():
+    llm = SlowLLM(single_flight=False)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: llm.predict(_messages()), range(3)))
+
+    assert len(SlowLLM.calls) == 3
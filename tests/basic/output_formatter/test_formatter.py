@@ -4,7 +4,12 @@ import pytest
 
 from promptulate.agents import BaseAgent
 from promptulate.llms import BaseLLM
-from promptulate.output_formatter import OutputFormatter, formatting_result
+from promptulate.output_formatter import (
+    OutputFormatter,
+    formatting_result,
+    get_formatted_instructions,
+    to_response_format,
+)
 from promptulate.pydantic_v1 import BaseModel, Field
 from promptulate.schema import BaseMessage, MessageSet
 
@@ -104,3 +109,35 @@ def test_formatting_result_with_error_llm_output():
     assert f"Failed to parse {LLMResponse.__name__} from completion test." in str(
         excinfo.value
     )
+
+
+def test_formatted_instructions_cache():
+    examples = [LLMResponse(city="Shanghai", temperature=25)]
+    instructions = get_formatted_instructions(LLMResponse, examples)
+    assert '"city"' in instructions
+    assert '{"city": "Shanghai", "temperature": 25.0}' in instructions
+    assert get_formatted_instructions(LLMResponse, examples) is instructions
+    assert OutputFormatter(LLMResponse, examples).get_formatted_instructions() == (
+        instructions
+    )
+
+    # other examples are rendered
+    other = [LLMResponse(city="Beijing", temperature=20)]
+    assert "Beijing" in get_formatted_instructions(LLMResponse, other)
+    assert "Shanghai" not in get_formatted_instructions(LLMResponse)
+
+    # examples are cached by content, a changed example is rendered again
+    equal = [LLMResponse(city="Shanghai", temperature=25)]
+    assert get_formatted_instructions(LLMResponse, equal) is instructions
+    examples[0].city = "Hangzhou"
+    assert "Hangzhou" in get_formatted_instructions(LLMResponse, examples)
+
+
+def test_to_response_format():
+    response_format = to_response_format(LLMResponse)
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "LLMResponse"
+    assert set(response_format["json_schema"]["schema"]["properties"]) == {
+        "city",
+        "temperature",
+    }
@@ -2,6 +2,9 @@
 TODO add test: test pne's llm, test litellm llm
 """
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Generator, Optional, Union
 
 import pytest
@@ -9,6 +12,7 @@ import pytest
 import promptulate as pne
 from promptulate import chat
 from promptulate.llms import BaseLLM
+from promptulate.memory import BufferChatMemory, TokenWindowPolicy
 from promptulate.pydantic_v1 import BaseModel, Field
 from promptulate.schema import (
     AssistantMessage,
@@ -181,11 +185,12 @@ def test_stream_llm_chat_response():
         output_schema=LLMResponse,
     )
 
-    # check if the answer is a stream of response
-    for answer in answer_stream:
-        assert isinstance(answer, LLMResponse)
-        assert getattr(answer, "province", None) == "beijing"
-        assert getattr(answer, "capital", None) == "beijing1"
+    # check if the answer is a stream of partial response
+    answers = list(answer_stream)
+    assert all(isinstance(answer, LLMResponse) for answer in answers)
+    assert answers[0].province == "beijing" and answers[0].capital is None
+    assert answers[-1].province == "beijing"
+    assert answers[-1].capital == "beijing1"
 
 
 def test_streaming():
@@ -222,3 +227,155 @@ def test_aichat_memory():
     assert ai.memory.messages[2].content == "fake response"
     assert ai.memory.messages[3].content == "bye"
     assert ai.memory.messages[4].content == "fake response"
+
+
+class RecordLLM(FakeLLM):
+    received: list = []
+
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> BaseMessage:
+        self.received.append(messages)
+        return super()._predict(messages, *args, **kwargs)
+
+
+def test_aichat_context_policy():
+    llm = RecordLLM(received=[])
+    ai = pne.AIChat(
+        custom_llm=llm,
+        enable_memory=True,
+        context_policy=TokenWindowPolicy(max_tokens=100, tokenizer=len),
+    )
+
+    for i in range(5):
+        ai.run(f"hello {i}")
+
+    assert len(ai.memory.messages) == 11
+    context: MessageSet = llm.received[-1]
+    assert context.count_tokens(len) <= 100
+    assert context.messages[0].content == "You are a helpful assistant"
+    assert context.messages[-1].content == "hello 4"
+    assert len(context.messages) < 10
+
+
+class FailLLM(FakeLLM):
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> BaseMessage:
+        if "error" in messages.messages[-1].content:
+            raise ValueError("fake error")
+        return super()._predict(messages, *args, **kwargs)
+
+
+def test_chat_many():
+    prompts = ["hello", "error", [{"role": "user", "content": "bye"}]]
+    results = pne.chat_many(prompts, custom_llm=FailLLM(), max_concurrency=2)
+    assert results[0] == "fake response"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "fake response"
+
+    with pytest.raises(ValueError):
+        pne.chat_many(prompts, custom_llm=FailLLM(), return_exceptions=False)
+
+    message_set = MessageSet.from_listdict_data([{"role": "user", "content": "hi"}])
+    ai = pne.AIChat(custom_llm=FakeLLM())
+    results = ai.run_many(["weather?", message_set], output_schema=LLMResponse)
+    assert all(isinstance(result, LLMResponse) for result in results)
+    # the prompts are not changed
+    assert message_set.listdict_messages == [{"role": "user", "content": "hi"}]
+    assert ai.memory.messages == []
+
+
+class SlowLLM(FakeLLM):
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> BaseMessage:
+        time.sleep(0.01)
+        return super()._predict(messages, *args, **kwargs)
+
+
+def test_chat_sessions():
+    sessions = pne.ChatSessions(SlowLLM(), max_sessions=100)
+
+    def _run(i: int):
+        sessions.run(f"user-{i % 2}", f"hello {i}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(_run, range(8)))
+
+    # requests of the same session run in order
+    assert len(sessions) == 2
+    for session_id in ("user-0", "user-1"):
+        messages = sessions.get_memory(session_id).messages
+        assert len(messages) == 9
+        assert [m.content for m in messages[2::2]] == ["fake response"] * 4
+
+
+def test_chat_sessions_eviction():
+    memory = BufferChatMemory()
+    sessions = pne.ChatSessions(FakeLLM(), max_sessions=2, memory=memory)
+    sessions.run("a", "hello")
+    sessions.run("b", "hello")
+    sessions.run("a", "bye")
+    sessions.run("c", "hello")
+
+    # b is the least recently used session
+    assert "b" not in sessions and len(sessions) == 2
+    sessions.run("b", "bye")
+    assert [m.content for m in sessions.get_memory("b").messages][1:] == [
+        "hello",
+        "fake response",
+        "bye",
+        "fake response",
+    ]
+
+    sessions = pne.ChatSessions(FakeLLM(), ttl=0)
+    sessions.run("a", "hello")
+    assert len(sessions) == 0
+
+
+class ContentDelayLLM(FakeLLM):
+    def _predict(self, messages: MessageSet, *args, **kwargs) -> BaseMessage:
+        if messages.messages[-1].content == "slow":
+            time.sleep(0.6)
+        return super()._predict(messages, *args, **kwargs)
+
+
+def test_chat_sessions_ttl_out_of_order():
+    sessions = pne.ChatSessions(ContentDelayLLM(), ttl=0.4)
+
+    # a starts before b but finishes after it
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(sessions.run, "a", "slow")
+        time.sleep(0.05)
+        sessions.run("b", "fast")
+        future.result()
+
+    time.sleep(0.3)
+    sessions.run("c", "fast")
+    assert "b" not in sessions
+    assert "a" in sessions and "c" in sessions
+
+
+def test_achat():
+    llm = FakeLLM()
+
+    answer = asyncio.run(pne.achat("hello", custom_llm=llm))
+    assert answer == "fake response"
+
+    answer = asyncio.run(
+        pne.achat(
+            "what's weather tomorrow in shanghai?",
+            output_schema=LLMResponse,
+            custom_llm=llm,
+        )
+    )
+    assert isinstance(answer, LLMResponse)
+    assert getattr(answer, "city", None) == "Shanghai"
+
+
+def test_aichat_arun_memory():
+    ai = pne.AIChat(custom_llm=FakeLLM(), enable_memory=True)
+
+    async def main():
+        await ai.arun("hello")
+        await ai.arun("bye")
+
+    asyncio.run(main())
+    assert len(ai.memory.messages) == 5
+    assert ai.memory.messages[3].content == "bye"
+    assert ai.memory.messages[4].content == "fake response"
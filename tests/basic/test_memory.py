@@ -0,0 +1,98 @@
+import pytest
+
+from promptulate.error import EmptyMessageSetError
+from promptulate.memory import (
+    BufferChatMemory,
+    FileChatMemory,
+    SummaryWindowPolicy,
+    TokenWindowPolicy,
+)
+from promptulate.schema import MessageSet
+
+
+def _build_message_set() -> MessageSet:
+    message_set = MessageSet(messages=[])
+    message_set.add_system_message("system")
+    for i in range(3):
+        message_set.add_user_message(f"question {i}")
+        message_set.add_ai_message(f"answer {i}")
+    return message_set
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_buffer_chat_memory(binary):
+    memory = BufferChatMemory(binary=binary, compression="zlib" if binary else None)
+    with pytest.raises(EmptyMessageSetError):
+        memory.load_message_set_from_memory()
+
+    message_set = _build_message_set()
+    memory.save_message_set_to_memory(message_set)
+
+    loaded = memory.load_message_set_from_memory()
+    assert loaded.listdict_messages == message_set.listdict_messages
+    loaded = memory.load_message_set_from_memory(recently_n=2)
+    assert loaded.listdict_messages == message_set.listdict_messages[-2:]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_file_chat_memory(tmp_path, binary):
+    memory = FileChatMemory(file_path=str(tmp_path), binary=binary)
+    message_set = _build_message_set()
+    memory.save_message_set_to_memory(message_set)
+
+    loaded = memory.load_message_set_from_memory()
+    assert loaded.listdict_messages == message_set.listdict_messages
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_token_window_policy():
+    message_set = _build_message_set()
+    policy = TokenWindowPolicy(max_tokens=20, tokenizer=_count_words)
+
+    context = policy.build(message_set, llm=None)
+    assert context.count_tokens(_count_words) <= 20
+    assert context.messages[0].content == "system"
+    assert context.messages[-1].content == "answer 2"
+    assert len(message_set.messages) == 7
+
+
+def test_summary_window_policy():
+    prompts = []
+
+    def summarizer(prompt: str) -> str:
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    policy = SummaryWindowPolicy(
+        max_tokens=40, trigger_tokens=30, keep_tokens=12, summarizer=summarizer
+    )
+    policy.tokenizer = _count_words
+    message_set = MessageSet(messages=[])
+    message_set.add_system_message("system")
+
+    for i in range(20):
+        message_set.add_user_message(f"question {i}")
+        context = policy.build(message_set, llm=None)
+        policy.wait()
+        assert context.count_tokens(_count_words) <= 40
+        assert context.messages[0].content == "system"
+        assert context.messages[-1].content == f"question {i}"
+        message_set.add_ai_message(f"answer {i}")
+
+    # summaries are merged into the next summary
+    assert len(prompts) > 1
+    assert "summary 1" in prompts[1]
+    assert "question 0" in prompts[0] and "question 0" not in prompts[1]
+
+    context = policy.build(message_set, llm=None)
+    assert context.messages[1].type == "system"
+    assert policy.summary in context.messages[1].content
+    assert len(message_set.messages) == 41
+
+    # a new conversation resets the summary
+    context = policy.build(_build_message_set(), llm=None)
+    assert "summary" not in context.string_messages
+    policy.close()
@@ -0,0 +1,227 @@
+import pytest
+
+from promptulate.schema import (
+    AssistantMessage,
+    MessageRecord,
+    MessageSet,
+    SystemMessage,
+    UserMessage,
+)
+from promptulate.utils.tokenizer import get_tokenizer
+
+
+def test_message_record():
+    record = MessageRecord("user", "hello")
+    assert record.type == "user"
+    assert record.additional_kwargs == {}
+    assert record.created_at is not None
+
+    message = record.to_message()
+    assert isinstance(message, UserMessage)
+    assert message.content == "hello"
+    assert message.created_at == record.created_at
+    assert record == message
+
+    assert MessageRecord.from_message(AssistantMessage(content="hi")) == (
+        MessageRecord("assistant", "hi")
+    )
+
+    with pytest.raises(KeyError):
+        MessageRecord("unknown", "hello")
+
+    with pytest.raises(AttributeError):
+        record.name = "slots"
+
+
+def test_message_set_from_listdict_data():
+    data = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "hello"},
+    ]
+    message_set = MessageSet.from_listdict_data(data)
+
+    assert all(isinstance(item, MessageRecord) for item in message_set.messages)
+    assert message_set.listdict_messages == data
+    assert message_set.string_messages == "You are a helpful assistant.\nhello\n"
+
+    messages = message_set.to_messages()
+    assert isinstance(messages[0], SystemMessage)
+    assert isinstance(messages[1], UserMessage)
+
+
+def test_message_set_mixed_messages():
+    message_set = MessageSet(messages=[SystemMessage(content="system")])
+    message_set.add_user_message("hello")
+    message_set.add_ai_message("hi")
+    message_set.messages[-1].content += "!"
+
+    assert message_set.listdict_messages == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "hi!"},
+    ]
+    assert [message.type for message in message_set.to_messages()] == [
+        "system",
+        "user",
+        "assistant",
+    ]
+
+
+def test_message_set_cached_views():
+    message_set = MessageSet(messages=[SystemMessage(content="system")])
+    assert message_set.string_messages == "system\n"
+
+    message_set.add_user_message("hello")
+    message_set.add_from_message_set(
+        MessageSet.from_listdict_data([{"role": "assistant", "content": "hi"}])
+    )
+    assert message_set.listdict_messages == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "hi"},
+    ]
+    assert message_set.string_messages == "system\nhello\nhi\n"
+
+    # the returned list is a copy of the cached view
+    message_set.listdict_messages.clear()
+    assert len(message_set.listdict_messages) == 3
+
+    # direct changes of messages are detected
+    message_set.messages[1].content += "!"
+    assert message_set.listdict_messages[1]["content"] == "hello!"
+    message_set.messages[0] = UserMessage(content="user")
+    assert message_set.listdict_messages[0] == {"role": "user", "content": "user"}
+    message_set.messages = message_set.messages[:1]
+    assert message_set.string_messages == "user\n"
+    message_set.messages.append(AssistantMessage(content="hi"))
+    assert message_set.string_messages == "user\nhi\n"
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def _build_history() -> MessageSet:
+    message_set = MessageSet(messages=[], tokenizer=_count_words)
+    message_set.add_system_message("you are a helpful assistant")
+    for i in range(5):
+        message_set.add_user_message(f"question {i}")
+        message_set.add_ai_message(f"answer {i}")
+    return message_set
+
+
+def test_message_set_token_count():
+    message_set = _build_history()
+    # 4 tokens of role and separators per message
+    assert message_set.token_count == 5 + 10 * 2 + 11 * 4
+    message_set.add_user_message("one more question")
+    assert message_set.token_count == 69 + 3 + 4
+    message_set.messages[-1].content = "edited"
+    assert message_set.token_count == 69 + 1 + 4
+    assert message_set.count_tokens(len) > message_set.token_count
+
+    assert get_tokenizer("gpt-4o") is get_tokenizer("openai/gpt-4o")
+    assert get_tokenizer()("hello world") > 0
+
+
+def test_message_set_fit_to():
+    message_set = _build_history()
+
+    fitted = message_set.fit_to(100)
+    assert fitted.listdict_messages == message_set.listdict_messages
+
+    fitted = message_set.fit_to(24, strategy="drop_oldest")
+    assert fitted.token_count <= 24
+    assert [m["content"] for m in fitted.listdict_messages] == [
+        "question 3",
+        "answer 3",
+        "question 4",
+        "answer 4",
+    ]
+
+    fitted = message_set.fit_to(30, strategy="pin_system")
+    assert fitted.token_count <= 30
+    assert fitted.messages[0].type == "system"
+    assert fitted.messages[-1].content == "answer 4"
+    assert len(message_set.messages) == 11
+
+    prompts = []
+
+    def summarizer(prompt: str) -> str:
+        prompts.append(prompt)
+        return "greetings"
+
+    fitted = message_set.fit_to(40, strategy="summarize", summarizer=summarizer)
+    assert fitted.token_count <= 40
+    assert "user: question 0" in prompts[0]
+    assert fitted.messages[1].type == "system"
+    assert "greetings" in fitted.messages[1].content
+    assert fitted.messages[-1].content == "answer 4"
+
+    with pytest.raises(ValueError):
+        message_set.fit_to(3)
+    with pytest.raises(ValueError):
+        message_set.fit_to(30, strategy="summarize")
+
+
+@pytest.mark.parametrize(
+    "codec, compression",
+    [("json", None), ("json", "zlib"), ("msgpack", None), ("msgpack", "zstd")],
+)
+def test_message_set_to_bytes(codec, compression):
+    if codec == "msgpack":
+        pytest.importorskip("msgpack")
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+
+    message_set = MessageSet(
+        messages=[SystemMessage(content="system")], additional_kwargs={"k": "v"}
+    )
+    message_set.add_user_message("你好")
+    message_set.messages.append(
+        MessageRecord("assistant", "hi", {"usage": {"total_tokens": 1}})
+    )
+
+    data = message_set.to_bytes(codec=codec, compression=compression)
+    loaded = MessageSet.from_bytes(data)
+
+    assert loaded.listdict_messages == message_set.listdict_messages
+    assert loaded.additional_kwargs == {"k": "v"}
+    assert loaded.messages[2].additional_kwargs == {"usage": {"total_tokens": 1}}
+    assert loaded.messages[1]._additional_kwargs is None
+    assert [m.created_at for m in loaded.messages] == [
+        m.created_at for m in message_set.messages
+    ]
+
+    with pytest.raises(ValueError):
+        MessageSet.from_bytes(b"[]")
+
+
+def test_message_set_fork():
+    parent = _build_history()
+    assert parent.string_messages
+    assert parent.token_count == 69
+
+    child = parent.fork()
+    grandchild = child.fork()
+    assert child._messages == [] and child._fork_parent is parent
+
+    # views and token counts are reused from the parent
+    assert child.token_count == 69
+    assert child.string_messages == parent.string_messages
+    assert child.messages[0] is parent.messages[0]
+
+    child.add_user_message("child question")
+    parent.add_user_message("parent question")
+    assert child.messages[-1].content == "child question"
+    assert parent.messages[-1].content == "parent question"
+    assert len(child.messages) == len(parent.messages) == 12
+
+    # the grandchild shares the prefix at the time of the fork
+    assert len(grandchild.messages) == 11
+    assert grandchild.string_messages.endswith("answer 4\n")
+    assert grandchild.tokenizer is _count_words
+
+    parent.messages.pop(0)
+    assert child.messages[0].type == "system"
+    assert child.listdict_messages[-1]["content"] == "child question"
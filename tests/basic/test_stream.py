@@ -0,0 +1,263 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+
+import promptulate as pne
+from promptulate.schema import (
+    AsyncStreamIterator,
+    LazyChunkData,
+    StreamAccumulator,
+    StreamBroadcast,
+    StreamIterator,
+)
+
+
+def _chunks():
+    return [
+        {"choices": [{"delta": {"content": "Hello"}, "finish_reason": None}]},
+        {"choices": [{"delta": {"content": " world"}, "finish_reason": None}]},
+        {
+            "choices": [{"delta": {"content": None}, "finish_reason": "stop"}],
+            "usage": {"total_tokens": 10},
+        },
+    ]
+
+
+def parse_content(chunk):
+    return chunk["choices"][0]["delta"]["content"], chunk
+
+
+async def _agen(items, consumed=None):
+    for item in items:
+        if consumed is not None:
+            consumed.append(item)
+        yield item
+
+
+def test_stream_iterator_accumulation():
+    iterator = StreamIterator(iter(_chunks()), parse_content=parse_content)
+    assert list(iterator) == ["Hello", " world"]
+    assert iterator.content == "Hello world"
+    assert iterator.usage == {"total_tokens": 10}
+    assert iterator.finish_reason == "stop"
+
+    message = iterator.to_message()
+    assert message.content == "Hello world"
+    assert message.additional_kwargs["finish_reason"] == "stop"
+
+
+def test_async_stream_iterator():
+    async def main():
+        iterator = AsyncStreamIterator(_agen(_chunks()), parse_content=parse_content)
+        return [content async for content in iterator], iterator
+
+    contents, iterator = asyncio.run(main())
+    assert contents == ["Hello", " world"]
+    assert iterator.content == "Hello world"
+    assert iterator.usage == {"total_tokens": 10}
+    assert iterator.finish_reason == "stop"
+
+
+def test_async_stream_iterator_raw_response():
+    async def main():
+        iterator = AsyncStreamIterator(
+            _agen(_chunks()), parse_content=parse_content, return_raw_response=True
+        )
+        return [message async for message in iterator]
+
+    messages = asyncio.run(main())
+    assert [message.content for message in messages] == ["Hello", " world"]
+    assert messages[0].additional_kwargs == _chunks()[0]
+
+
+def test_async_stream_iterator_backpressure():
+    chunks = [
+        {"choices": [{"delta": {"content": str(i)}, "finish_reason": None}]}
+        for i in range(100)
+    ]
+
+    async def main():
+        consumed = []
+        iterator = AsyncStreamIterator(
+            _agen(chunks, consumed), parse_content=parse_content, max_buffer_size=5
+        )
+        async with iterator:
+            first = await iterator.__anext__()
+            await asyncio.sleep(0.05)
+            # the producer stops reading when the buffer is full
+            assert len(consumed) <= 7
+        return first, iterator
+
+    first, iterator = asyncio.run(main())
+    assert first == "0"
+    assert iterator.content == "0"
+
+
+def test_async_stream_iterator_error():
+    async def broken():
+        yield _chunks()[0]
+        raise ConnectionError("disconnected")
+
+    async def main():
+        iterator = AsyncStreamIterator(
+            broken(), parse_content=parse_content, max_buffer_size=2
+        )
+        return [content async for content in iterator]
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(main())
+
+
+def test_aichat_arun_stream():
+    class Delta:
+        def __init__(self, content):
+            self.choices = [mock.Mock(delta=mock.Mock(content=content))]
+
+        def json(self):
+            return {"choices": [{"delta": {"content": self.choices[0].delta.content}}]}
+
+    async def acompletion(*args, **kwargs):
+        assert kwargs["stream"] is True
+        return _agen([Delta("Hello"), Delta(" world")])
+
+    async def main():
+        with mock.patch("litellm.acompletion", new=acompletion):
+            iterator = await pne.achat("hi", model="gpt-4o", stream=True)
+            return [content async for content in iterator], iterator
+
+    contents, iterator = asyncio.run(main())
+    assert contents == ["Hello", " world"]
+    assert iterator.content == "Hello world"
+
+
+def test_lazy_chunk_data():
+    loader = mock.Mock(return_value={"id": "chunk"})
+    data = LazyChunkData(loader, usage={"total_tokens": 1}, finish_reason="stop")
+
+    accumulator = StreamAccumulator()
+    accumulator.add("hi", data)
+    assert accumulator.usage == {"total_tokens": 1}
+    assert accumulator.finish_reason == "stop"
+    loader.assert_not_called()
+
+    assert dict(data) == {"id": "chunk"}
+    assert data["id"] == "chunk"
+    loader.assert_called_once()
+
+
+def test_litellm_parse_content_is_lazy():
+    from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
+
+    from promptulate.llms._litellm import parse_content as litellm_parse_content
+
+    chunks = [
+        ModelResponseStream(
+            id="chunk", choices=[StreamingChoices(delta=Delta(content="Hello"))]
+        ),
+        ModelResponseStream(
+            id="chunk",
+            choices=[StreamingChoices(delta=Delta(content=None), finish_reason="stop")],
+            usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        ),
+    ]
+
+    with mock.patch.object(ModelResponseStream, "json") as mock_json:
+        iterator = StreamIterator(iter(chunks), parse_content=litellm_parse_content)
+        assert list(iterator) == ["Hello"]
+        mock_json.assert_not_called()
+    assert iterator.finish_reason == "stop"
+    assert iterator.usage["total_tokens"] == 2
+
+    iterator = StreamIterator(
+        iter(chunks), parse_content=litellm_parse_content, return_raw_response=True
+    )
+    message = next(iterator)
+    assert message.additional_kwargs["id"] == "chunk"
+    assert message.additional_kwargs["choices"][0]["delta"]["content"] == "Hello"
+
+
+def _counted_chunks(n, pulled):
+    for i in range(n):
+        pulled.append(i)
+        yield {"choices": [{"delta": {"content": str(i)}, "finish_reason": None}]}
+
+
+def test_stream_iterator_tee():
+    pulled = []
+    iterator = StreamIterator(_counted_chunks(5, pulled), parse_content=parse_content)
+    first, second = iterator.tee(2)
+
+    assert list(first) == ["0", "1", "2", "3", "4"]
+    assert list(second) == ["0", "1", "2", "3", "4"]
+    assert second.content == "01234"
+    assert list(iterator) == []
+    # the upstream is read once and the buffer is released
+    assert pulled == [0, 1, 2, 3, 4]
+    assert len(first.response_stream._broadcast._buffer) == 0
+
+
+def test_stream_iterator_subscribe():
+    pulled = []
+    iterator = StreamIterator(_counted_chunks(4, pulled), parse_content=parse_content)
+    assert next(iterator) == "0"
+
+    subscriber = iterator.subscribe()
+    assert list(iterator) == ["1", "2", "3"]
+    assert list(subscriber) == ["1", "2", "3"]
+    assert subscriber.content == iterator.content == "0123"
+    assert pulled == [0, 1, 2, 3]
+
+
+def test_stream_iterator_tee_closed_subscriber():
+    iterator = StreamIterator(_counted_chunks(10, []), parse_content=parse_content)
+    first, second = iterator.tee(2, max_buffer_size=1)
+    second.response_stream.close()
+    # a closed subscriber does not hold back the bounded buffer
+    assert len(list(first)) == 10
+
+
+def test_stream_broadcast_bounded_buffer():
+    sizes = []
+    broadcast = None
+
+    def source():
+        for i in range(200):
+            if broadcast is not None:
+                sizes.append(len(broadcast._buffer))
+            yield i
+
+    broadcast = StreamBroadcast(source(), max_buffer_size=4)
+    subscriptions = [broadcast.subscribe() for _ in range(3)]
+    results = [[] for _ in subscriptions]
+
+    def consume(subscription, result):
+        result.extend(subscription)
+
+    threads = [
+        threading.Thread(target=consume, args=(subscription, result))
+        for subscription, result in zip(subscriptions, results)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert all(result == list(range(200)) for result in results)
+    assert max(sizes) <= 4
+
+
+def test_stream_broadcast_error():
+    def broken():
+        yield 1
+        raise ConnectionError("disconnected")
+
+    broadcast = StreamBroadcast(broken())
+    first, second = broadcast.subscribe(), broadcast.subscribe()
+    assert next(first) == 1
+    with pytest.raises(ConnectionError):
+        next(first)
+    assert next(second) == 1
+    with pytest.raises(ConnectionError):
+        next(second)
@@ -0,0 +1,52 @@
+import asyncio
+
+from promptulate.utils.http import (
+    HTTPClientPool,
+    aclose_async_clients,
+    get_async_client,
+    get_session,
+)
+
+
+def test_get_session_by_base_url():
+    session = get_session("https://api.openai.com/v1/chat/completions")
+    assert session is get_session("https://api.openai.com/v1/completions")
+    assert session is not get_session("https://open.bigmodel.cn/api/paas/v4/chat")
+
+
+def test_get_async_client_by_event_loop():
+    async def get_clients():
+        return (
+            get_async_client("https://api.openai.com/v1/chat/completions"),
+            get_async_client("https://api.openai.com/v1/completions"),
+            get_async_client(
+                "https://api.openai.com/v1/completions",
+                proxies={"https": "http://127.0.0.1:7890"},
+            ),
+        )
+
+    client1, client2, proxy_client = asyncio.run(get_clients())
+    assert client1 is client2
+    assert client1 is not proxy_client
+
+    # httpx client can not be shared across event loops
+    client3, _, _ = asyncio.run(get_clients())
+    assert client3 is not client1
+
+
+def test_close_pool():
+    session = get_session("https://api.openai.com/v1/chat/completions")
+    HTTPClientPool().close()
+    assert session is not get_session("https://api.openai.com/v1/chat/completions")
+
+
+def test_aclose_async_clients():
+    async def main():
+        client = get_async_client("https://api.openai.com/v1/chat/completions")
+        await aclose_async_clients()
+        assert client.is_closed
+        new_client = get_async_client("https://api.openai.com/v1/chat/completions")
+        assert new_client is not client
+        await aclose_async_clients()
+
+    asyncio.run(main())
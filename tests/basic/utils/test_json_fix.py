@@ -0,0 +1,95 @@
+import json
+import random
+from typing import List, Optional
+
+from promptulate.pydantic_v1 import BaseModel
+from promptulate.utils.json_fix import StreamJSONParser, stream_to_model
+
+
+def _parse(text: str, chunk_size: int):
+    parser = StreamJSONParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i : i + chunk_size])
+    parser.close()
+    return parser.value
+
+
+def test_stream_json_parser():
+    data = {
+        "name": 'Jo"hn\n',
+        "age": 30,
+        "items": [1, 2.5, {"a": [True, None, "é"]}],
+        "empty": {},
+        "text": "你好",
+    }
+    for text in (f"```json\n{json.dumps(data, indent=2)}\n```", json.dumps(data)):
+        for chunk_size in range(1, 8):
+            assert _parse(text, chunk_size) == data
+
+    parser = StreamJSONParser()
+    assert parser.feed('{"name": "Jo')
+    assert parser.value == {"name": "Jo"}
+    assert parser.changed_keys == {"name"}
+    assert parser.feed('hn", ')
+    assert not parser.feed(' "age": 3')
+    # numbers are exposed when they are finished
+    assert parser.value == {"name": "John"}
+    parser.feed("0}")
+    assert parser.done and parser.value == {"name": "John", "age": 30}
+
+
+def test_stream_json_parser_malformed():
+    assert _parse("{ 'province': beijing, 'capital': beijing1 }```", 3) == {
+        "province": "beijing",
+        "capital": "beijing1",
+    }
+    assert _parse('{"a": 1, "b": [1, 2,], "c": "unterminated', 4) == {
+        "a": 1,
+        "b": [1, 2],
+        "c": "unterminated",
+    }
+    assert _parse("no json", 2) is None
+    # missing comma after an unquoted value
+    for chunk_size in range(1, 8):
+        assert _parse('{"a": 1 "b": 2,}', chunk_size) == {"a": 1, "b": 2}
+        assert _parse("[yes 'no']", chunk_size) == ["yes", "no"]
+
+    random.seed(0)
+    for _ in range(2000):
+        text = "".join(random.choice("{}[]\",:\\'ab 1\nu") for _ in range(30))
+        _parse(text, random.randint(1, 5))
+
+
+class Person(BaseModel):
+    name: str
+    tags: List[str]
+    age: Optional[int] = None
+
+
+def test_stream_to_model():
+    chunks = [
+        'Sure: ```json{"na',
+        'me": "Al',
+        'ice", "ta',
+        'gs": ["a",',
+        ' "b"], "other": 1',
+        ', "age": 3',
+        "0}```",
+    ]
+    results = list(stream_to_model(iter(chunks), Person))
+    assert [result.name for result in results] == [
+        "Al",
+        "Alice",
+        "Alice",
+        "Alice",
+        "Alice",
+    ]
+    assert results[2].tags == ["a"]
+    # the yielded partial model is not changed by the next chunks
+    assert results[3].tags == ["a", "b"]
+    assert results[-1] == Person(name="Alice", tags=["a", "b"], age=30)
+
+    # malformed output does not raise
+    results = list(stream_to_model(iter(['{"name": "Bob"']), Person))
+    assert results[-1].name == "Bob" and results[-1].tags is None
+    assert list(stream_to_model(iter(["no json"]), Person)) == []